@@ -0,0 +1,197 @@
+"""Run benchmarks
+
+This script measures the time of each stage of the analysis on synthetic
+data of several sizes (see project_Kochanska.synthetic), saves the results
+to a json file and compares them with the baseline results.
+
+Example:
+
+    python -m benchmarks.run_benchmarks --scales 1 10 --output results.json \
+        --baseline benchmarks/baseline.json
+
+The number of countries, the years and the fractions of duplicated rows and
+of countries with aliases (names changed by the dictionary of country names)
+can be changed, by default the data has the size of the real files.
+
+The script exits with code 1 if any stage is slower than the baseline
+by more than the allowed tolerance.
+
+This file contains the following functions:
+
+    * time_stages - returns time of each stage of the analysis
+    * compare_results - returns stages slower than in the baseline
+    * main - the main function of the script
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.read_data as read_data
+import project_Kochanska.synthetic as synthetic
+from project_Kochanska.analyze_data import HIGHEST_COLUMNS
+
+
+def _measure(stage: Callable, repeat: int) -> tuple:
+    """Function which runs the stage a few times and measures the best time
+
+    :param stage: Function running the stage, called without arguments
+    :type stage: Callable
+    :param repeat: Number of runs
+    :type repeat: int
+    :return: Best time in seconds and the result of the last run
+    :rtype: tuple
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = stage()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def time_stages(gdp_path: str, populations_path: str, co2_path: str, out: str,
+                repeat: int = 3, countries_dict: Optional[dict] = None) -> Dict[str, float]:
+    """Function which measures the time of each stage of the analysis
+
+    :param gdp_path: Path to gdp file
+    :type gdp_path: str
+    :param populations_path: Path to population file
+    :type populations_path: str
+    :param co2_path: Path to emission file
+    :type co2_path: str
+    :param out: Path to output file
+    :type out: str
+    :param repeat: Number of runs of each stage, defaults to 3
+    :type repeat: int, optional
+    :param countries_dict: Dictionary with incorrect country names stored as keys and
+    their correct counterparts stored as values, defaults to None (COUNTRIES_DICT is used)
+    :type countries_dict: Optional[dict], optional
+    :return: Best time of each stage in seconds
+    :rtype: Dict[str, float]
+    """
+    times = {}
+    times["read_co2"], co2 = _measure(
+        lambda: read_data.read_file_to_df(co2_path, skip=False), repeat)
+    times["read_populations"], populations = _measure(
+        lambda: read_data.read_file_to_df(populations_path), repeat)
+    times["read_gdp"], gdp = _measure(lambda: read_data.read_file_to_df(gdp_path), repeat)
+    times["check_data"], checked = _measure(
+        lambda: read_data.check_data(gdp, populations, co2, [None, None], report=False,
+                                     countries_dict=countries_dict), repeat)
+    times["join_data"], joined_data = _measure(lambda: read_data.join_data(*checked), repeat)
+    times["get_per_capita"], data_processed = _measure(
+        lambda: analyze_data.get_per_capita(joined_data.copy()), repeat)
+    times["find_5_highest_emission"], emission = _measure(
+        lambda: analyze_data.find_5_highest(data_processed, *HIGHEST_COLUMNS["emission"]),
+        repeat)
+    times["find_5_highest_gdp"], gdp_table = _measure(
+        lambda: analyze_data.find_5_highest(data_processed, *HIGHEST_COLUMNS["gdp"]), repeat)
+    times["find_co2_changes"], (changes, _) = _measure(
+        lambda: analyze_data.find_co2_changes(data_processed), repeat)
+    times["save_results"], _ = _measure(
+        lambda: analyze_data.save_results(out, [emission, gdp_table, changes],
+                                          ["emission\n", "gdp\n", "changes\n"]), repeat)
+    return times
+
+
+def compare_results(results: dict, baseline: dict, tolerance: float,
+                    minimum: float = 0.005) -> List[str]:
+    """Function which finds stages slower than in the baseline
+
+    :param results: New results
+    :type results: dict
+    :param baseline: Baseline results
+    :type baseline: dict
+    :param tolerance: Allowed relative slowdown (0.25 means 25%)
+    :type tolerance: float
+    :param minimum: Stages faster than that (in seconds) are not compared, defaults to 0.005
+    :type minimum: float, optional
+    :return: Descriptions of the slower stages
+    :rtype: List[str]
+    """
+    regressions = []
+    for scale, times in results["scales"].items():
+        baseline_times = baseline.get("scales", {}).get(scale, {})
+        for stage, seconds in times.items():
+            if stage not in baseline_times or max(seconds, baseline_times[stage]) < minimum:
+                continue
+            if seconds > baseline_times[stage] * (1 + tolerance):
+                regressions.append(f"scale {scale}, {stage}: {seconds:.4f} s "
+                                   f"(baseline {baseline_times[stage]:.4f} s)")
+    return regressions
+
+
+def main(argv: List[str] = None):
+    """Function which generates the data, runs the benchmarks and compares the results
+
+    :param argv: Command line arguments, defaults to None (sys.argv is used)
+    :type argv: List[str], optional
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks of the analysis stages')
+    parser.add_argument('--scales', nargs='+', type=float, default=[1, 10],
+                        help='Sizes of the data relative to the real files. '\
+                            'Defaults to %(default)s')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of runs of each stage. Defaults to %(default)s')
+    parser.add_argument('--countries', type=int, default=synthetic.COUNTRIES,
+                        help='Number of countries at scale 1. Defaults to %(default)s')
+    parser.add_argument('--years', nargs=2, type=int, metavar=('FIRST', 'LAST'),
+                        help='First and last year of all of the files. Defaults to the years '\
+                            'of the real files')
+    parser.add_argument('--duplicates', type=float, default=0.01,
+                        help='Fraction of duplicated emission rows. Defaults to %(default)s')
+    parser.add_argument('--aliases', type=float, default=0,
+                        help='Fraction of countries written with other names in the gdp and '\
+                            'population files and in some of the emission rows, which are '\
+                            'changed by the dictionary of country names. Defaults to %(default)s')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random data. Defaults to %(default)s')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='Name of json file with the results. Defaults to %(default)s')
+    parser.add_argument('--baseline',
+                        help='Name of json file with the baseline results')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative slowdown. Defaults to %(default)s')
+    args = parser.parse_args(argv)
+
+    results = {"python": platform.python_version(), "pandas": pd.__version__,
+               "machine": platform.machine(), "countries": args.countries, "years": args.years,
+               "duplicates": args.duplicates, "aliases": args.aliases, "scales": {}}
+    years = {} if args.years is None else {"wdi_years": tuple(args.years),
+                                           "emission_years": tuple(args.years)}
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            data_dir = os.path.join(directory, f"scale_{scale:g}")
+            gdp, populations, co2 = synthetic.generate_data(
+                data_dir, scale=scale, seed=args.seed, duplicates=args.duplicates,
+                countries=args.countries, aliases=args.aliases, **years)
+            countries_dict = {**read_data.COUNTRIES_DICT, **synthetic.get_aliases(
+                max(1, int(args.countries * scale)), args.aliases)}
+            times = time_stages(gdp, populations, co2, os.path.join(data_dir, "results.csv"),
+                                repeat=args.repeat, countries_dict=countries_dict)
+            results["scales"][f"{scale:g}"] = times
+            print(f"Scale {scale:g}:")
+            for stage, seconds in times.items():
+                print(f"    {stage:<25} {seconds:.4f} s")
+    with open(args.output, 'w', encoding='UTF-8') as file:
+        json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='UTF-8') as file:
+            baseline = json.load(file)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print("Stages slower than the baseline:")
+            print("\n".join(f"    {regression}" for regression in regressions))
+            sys.exit(1)
+        print("No stage is slower than the baseline.")
+
+
+if __name__ == '__main__':
+    main()
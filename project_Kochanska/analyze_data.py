@@ -1,7 +1,7 @@
 """Analyze data
 
 This script analyzes data stored in one Dataframe and saves the results
-to csv file.
+to csv file (or another format, see writers.py).
 
 This file contains the following functions:
 
@@ -9,56 +9,96 @@ This file contains the following functions:
     * create_multiindex - returns pandas Multiindex
     * find_5_highest - return Dataframe with data about countries with
     highest data in provided category
+    * select_highest - return rows with the highest values of each year
+    * fill_highest_table - return Dataframe of find_5_highest from the chosen rows
+    * select_table_years - return highest values table with only chosen years
     * find_co2_changes - return Dataframe with data about countries which
     had biggest and smallest changes in co2 emission
-    * save_results - Saves obtained results to  csv file
+    * get_boundary_years - return years between which changes in co2 emission
+    are calculated
+    * get_co2_extremes - return Dataframe with countries which had biggest and
+    smallest changes in co2 emission
+    * get_co2_changes - return Dataframe with changes in co2 emission for
+    all of the countries
+    * get_window_changes - return Dataframe with countries which had biggest and
+    smallest changes in co2 emission in every window of years
+    * find_window_extremes - return the same Dataframe from the country x year matrix
+    * save_results - Saves obtained results to  csv file or another format
 """
 import itertools
-import os
-from typing import List, Union
+from typing import Iterable, List, Optional, TextIO, Union
+import numpy as np
 import pandas as pd
+import project_Kochanska.writers as writers
 
-def get_per_capita(data: pd.DataFrame) -> pd.DataFrame:
-    """Function to calculate per capita data for emissions and gdp for each year
+# Emission sources which can be converted to per capita values
+EMISSION_COLUMNS = ["Solid Fuel", "Liquid Fuel", "Gas Fuel", "Cement", "Gas Flaring"]
+# Column names and the sort column of the tables with highest values
+HIGHEST_COLUMNS = {"emission": ({"Country": "Country Name",
+                                 "Total emission": "Total including bunker",
+                                 "Emission per capita": 'Total and bunker per capita'},
+                                'Total and bunker per capita'),
+                   "gdp": ({"Country": "Country Name",
+                            "GDP": "GDP",
+                            "GDP per capita": "GDP per capita"},
+                           "GDP per capita")}
+
+
+def get_per_capita(data: pd.DataFrame, sub_columns: bool = False) -> pd.DataFrame:
+    """Function to calculate per capita data for emissions and gdp for each year.
+    All of the columns are computed on whole columns at once and rows with
+    population equal to 0 or missing get NaN as their per capita values
 
     :param data: Dataframe with all the necessary data without per capita columns
     :type data: pd.DataFrame
+    :param sub_columns: Whether to also add per capita columns for every emission
+    source (see EMISSION_COLUMNS), defaults to False
+    :type sub_columns: bool, optional
     :return: DataFrame with added per capita columns
     :rtype: pd.DataFrame
     """
-    data['Total per capita'] = data.apply(
-        lambda row: row["Total"] / row["Population"], axis=1)
-    data['Total including bunker'] = data.apply(
-        lambda row: row["Total"] + row["Bunker fuels (Not in Total)"], axis=1)
-    data['Total and bunker per capita'] = data.apply(
-        lambda row: row['Total including bunker'] / row["Population"], axis=1)
-    data['GDP per capita'] = data.apply(
-        lambda row: row['GDP'] / row["Population"], axis=1)
+    # Keep float32 data (see read_data.compact_data) in float32
+    dtype = np.float32 if data["Population"].dtype == np.float32 else float
+    # Treat population equal to 0 as missing, the same way join_data does
+    population = data["Population"].replace(0, np.nan).astype(dtype).to_numpy()
+    data['Total per capita'] = data["Total"].to_numpy(dtype=dtype) / population
+    data['Total including bunker'] = data["Total"] + data["Bunker fuels (Not in Total)"]
+    data['Total and bunker per capita'] = \
+        data['Total including bunker'].to_numpy(dtype=dtype) / population
+    data['GDP per capita'] = data["GDP"].to_numpy(dtype=dtype) / population
+    if sub_columns:
+        # Divide all of the emission sources by population in one broadcast
+        values = data[EMISSION_COLUMNS].to_numpy(dtype=dtype) / population[:, np.newaxis]
+        for index, column in enumerate(EMISSION_COLUMNS):
+            data[f"{column} per capita"] = values[:, index]
     return data
 
 
-def create_multiindex(column_names: list) -> pd.MultiIndex:
+def create_multiindex(column_names: list, k: int = 5) -> pd.MultiIndex:
     """Function which creates new pandas MultiIndex with
-    5 main groups (one for each country) and len(column names)
+    k main groups (one for each country) and len(column names)
     columns in each of them
 
     :param column_names: names of columns
     :type column_names: list
+    :param k: Number of country groups, defaults to 5
+    :type k: int, optional
     :return: Multiindex for new dataFrame
     :rtype: pd.MultiIndex
     """
     array = list(itertools.chain.from_iterable(
-        [len(column_names) * [f"Country {index + 1}"] for index in range(5)])
-    ), 5 * column_names
+        [len(column_names) * [f"Country {index + 1}"] for index in range(k)])
+    ), k * column_names
     multi_index = pd.MultiIndex.from_arrays(array, names=['Country', 'Data'])
     return multi_index
 
 # "Country" : "Country Name", "Total emission" : "Total", "Emission per capita" : "Total per capita"
 
 
-def find_5_highest(data_processed: pd.DataFrame, column_names: dict, sort_by: str) -> pd.DataFrame:
+def find_5_highest(data_processed: pd.DataFrame, column_names: dict, sort_by: str,
+                   k: int = 5) -> pd.DataFrame:
     """Function which based on one dataframe creates a new one
-    with 5 countries for each year which have the highest values
+    with k (by default 5) countries for each year which have the highest values
     of one column passed as argument
 
     :param data_processed: Processed pandas DataFrame with per capita data
@@ -66,29 +106,101 @@ def find_5_highest(data_processed: pd.DataFrame, column_names: dict, sort_by: st
     :param column_names: Names of new and old columns which will be used
     :type column_names: dict
     :param sort_by: Name of column based on which data will be sorted and
-    only 5 highest values will be used
+    only k highest values will be used
     :type sort_by: str
+    :param k: Number of countries chosen for each year, defaults to 5
+    :type k: int, optional
     :rtype: pd.DataFrame
     """
-    years = set(data_processed["Year"])
-    # Create empty dataFrame which will store results
-    highest_values = pd.DataFrame(
-        columns=create_multiindex(list(column_names.keys())), index=pd.Index(years))
-    for year in years:
-        # Select countries with highest values per capita for each year
-        year_data = data_processed[data_processed["Year"] == year]
-        largest = year_data[sort_by].nlargest(5)
-        # Fill new table with highest values
-        for index, index_val in enumerate(largest.index):
-            group_name = highest_values.columns.levels[0][index] # type: ignore
-            for key, value in column_names.items():
-                new_value = data_processed.loc[index_val][value]
-                if not isinstance(new_value, str):
-                    new_value = new_value.round(5)
-                highest_values.loc[year][group_name, key] = new_value
+    largest, ranks = select_highest(data_processed, sort_by, k)
+    return fill_highest_table(largest, ranks, pd.Index(set(data_processed["Year"])),
+                              column_names, k)
+
+
+def select_highest(data_processed: pd.DataFrame, sort_by: str,
+                   k: int = 5) -> tuple[pd.DataFrame, np.ndarray]:
+    """Function which chooses k rows with the highest values of one column for each year
+
+    :param data_processed: Processed pandas DataFrame with per capita data
+    :type data_processed: pd.DataFrame
+    :param sort_by: Name of column based on which rows are chosen
+    :type sort_by: str
+    :param k: Number of rows chosen for each year, defaults to 5
+    :type k: int, optional
+    :return: Chosen rows and position of each of them among the highest values
+    of its year (0 for the highest one)
+    :rtype: tuple[pd.DataFrame, np.ndarray]
+    """
+    # Sort all of the rows at once, stable sort keeps the order of equal values
+    # the same as nlargest does
+    ordered = data_processed[data_processed[sort_by].notna()].sort_values(
+        sort_by, ascending=False, kind='mergesort')
+    largest = ordered.groupby("Year", sort=False).head(k)
+    ranks = largest.groupby("Year", sort=False).cumcount().to_numpy()
+    return largest, ranks
+
+
+def fill_highest_table(largest: pd.DataFrame, ranks: np.ndarray, year_index: pd.Index,
+                       column_names: dict, k: int = 5) -> pd.DataFrame:
+    """Function which creates the table of find_5_highest from the chosen rows
+
+    :param largest: Rows with the highest values of each year
+    :type largest: pd.DataFrame
+    :param ranks: Position of each row among the highest values of its year
+    (0 for the highest one)
+    :type ranks: np.ndarray
+    :param year_index: Years which are rows of the new table
+    :type year_index: pd.Index
+    :param column_names: Names of new and old columns which will be used
+    :type column_names: dict
+    :param k: Number of countries chosen for each year, defaults to 5
+    :type k: int, optional
+    :return: Table with countries with the highest values
+    :rtype: pd.DataFrame
+    """
+    # Position of every chosen row in the new table
+    rows = year_index.get_indexer(largest["Year"])
+    # Fill the whole table at once
+    values = np.full((len(year_index), k * len(column_names)), np.nan, dtype=object)
+    for column_index, value in enumerate(column_names.values()):
+        values[rows, ranks * len(column_names) + column_index] = _round_values(largest[value])
+    highest_values = pd.DataFrame(values, columns=create_multiindex(
+        list(column_names.keys()), k), index=year_index)
     return highest_values
 
 
+def select_table_years(highest_values: pd.DataFrame, years: list) -> pd.DataFrame:
+    """Function which selects rows from the chosen years from the table created
+    by find_5_highest in the same order find_5_highest would create them
+
+    :param highest_values: Table with countries with the highest values
+    :type highest_values: pd.DataFrame
+    :param years: Years to be chosen
+    :type years: list
+    :return: Table with only chosen years
+    :rtype: pd.DataFrame
+    """
+    return highest_values.loc[pd.Index(set(years))]
+
+
+def _round_values(column: pd.Series) -> np.ndarray:
+    """Function which rounds numeric values of a column to 5 decimal places
+    and leaves the text values unchanged
+
+    :param column: Column with values to round
+    :type column: pd.Series
+    :return: Array with rounded values
+    :rtype: np.ndarray
+    """
+    if pd.api.types.is_float_dtype(column):
+        # Round float32 values after conversion, so that they are printed as float64
+        return column.astype(float).round(5).to_numpy()
+    if pd.api.types.is_numeric_dtype(column):
+        return column.round(5).to_numpy()
+    return np.array([value if isinstance(value, str) else value.round(5)
+                     for value in column], dtype=object)
+
+
 def find_co2_changes(data_processed: pd.DataFrame)-> Union[tuple[pd.DataFrame, List[int]],
                                                            tuple[None, None]]:
     """Function which analyzes the data and looks for countries with biggest decrease
@@ -99,65 +211,184 @@ def find_co2_changes(data_processed: pd.DataFrame)-> Union[tuple[pd.DataFrame, L
     :return: Dataframe with the name of the countries and list of years which had been analyzed
     :rtype: Union[tuple[pd.DataFrame, List[int]], tuple[None, None]]
     """
-    years = set(data_processed["Year"])
-    if len(years) == 1:
-        print("Only one year provided. No changes can be calculated")
+    boundary_years = get_boundary_years(set(data_processed["Year"]))
+    if boundary_years is None:
         return None, None
+    changes_table = get_co2_changes(data_processed, boundary_years)
+    return get_co2_extremes(changes_table), boundary_years
+
+
+def get_boundary_years(years: Iterable[int]) -> Optional[List[int]]:
+    """Function which chooses the first and the last of the last 10 (or less) years.
+    Years are sorted first, so the result does not depend on their order
+
+    :param years: Years with data
+    :type years: Iterable[int]
+    :return: First and last of the chosen years or None if only one year is provided
+    :rtype: Optional[List[int]]
+    """
+    sorted_years = sorted(set(years))
+    if len(sorted_years) == 1:
+        print("Only one year provided. No changes can be calculated")
+        return None
     # Choose the last 10 years or the maximum number of years that there is data for
-    if len(years) < 10:
+    if len(sorted_years) < 10:
         print(
             "There is not enough data to calculate the change in the last 10 years. " \
-                f"Will use provided {len(years)} years instead.")
-        years_subset = list(years)
+                f"Will use provided {len(sorted_years)} years instead.")
+        years_subset = sorted_years
     else:
-        years_subset = list(years)[-10:]
-    max_change, min_change = 0, 0
-    max_country, min_country = [], []
-    # Iterate through all of the countries
-    for country in set(data_processed["Country Name"]):
-        # Choose the rows about the country and two concerning years
-        rows = data_processed[(data_processed["Country Name"] == country) &
-                              (data_processed["Year"].isin(years_subset[::len(years_subset)-1]))]
-        # Make sure that there is data from both of the concerning years
-        if len(rows) == 2:
-            difference = rows["Total and bunker per capita"].diff().values[-1]
-            # Use lists to allow for the possibility that two countries
-            # have exactly the same change in emission per capita
-            if difference and difference <= min_change:
-                if difference == min_change:
-                    min_country.append(country)
-                else:
-                    min_country = [country]
-                    min_change = difference
-            elif difference and difference >= max_change:
-                if difference == max_change:
-                    max_country.append(country)
-                else:
-                    max_country = [country]
-                    max_change = difference
+        years_subset = sorted_years[-10:]
+    return years_subset[::len(years_subset)-1]
+
+
+def get_co2_extremes(changes_table: pd.DataFrame) -> pd.DataFrame:
+    """Function which chooses countries with biggest growth and decrease in CO2 emission
+
+    :param changes_table: Changes in emission of all of the countries (see get_co2_changes)
+    :type changes_table: pd.DataFrame
+    :return: Dataframe with the names of the countries and their changes
+    :rtype: pd.DataFrame
+    """
+    # Countries with exactly the same change in emission per capita are joined together
+    growth = changes_table[changes_table["Change"] > 0]
+    decrease = changes_table[changes_table["Change"] < 0]
+    max_change = growth["Change"].max() if len(growth) else 0
+    min_change = decrease["Change"].min() if len(decrease) else 0
+    max_country = growth.index[growth["Change"] == max_change]
+    min_country = decrease.index[decrease["Change"] == min_change]
     changes = pd.DataFrame({"Growth in emission": ', '.join(max_country),
                             "Growth": [max_change],
                             "Decrease in emission": ', '.join(min_country),
                             "Decrease": [min_change]},
                            index=[1])
-    return changes,  years_subset[::len(years_subset)-1]
+    return changes
+
+
+def get_co2_changes(data_processed: pd.DataFrame, years: list) -> pd.DataFrame:
+    """Function which calculates the change in CO2 emission per capita
+    between two years for all of the countries which have data for both of them
+
+    :param data_processed: Processed pandas DataFrame
+    :type data_processed: pd.DataFrame
+    :param years: Two years between which the change is calculated
+    :type years: list
+    :return: Dataframe indexed by country name with emission in both years,
+    the change between them and the rank of the change (1 is the biggest growth,
+    equal changes have the same rank)
+    :rtype: pd.DataFrame
+    """
+    start, end = min(years), max(years)
+    rows = data_processed[data_processed["Year"].isin([start, end])]
+    # Use only countries with exactly one row for each of the years
+    counts = rows.groupby("Country Name")["Year"].agg(['size', 'nunique'])
+    complete = counts.index[(counts['size'] == 2) & (counts['nunique'] == 2)]
+    rows = rows[rows["Country Name"].isin(complete)]
+    # Align the emission from both years by country name
+    emission = rows.set_index("Country Name")["Total and bunker per capita"].astype(float)
+    changes_table = pd.DataFrame({"Start": emission[(rows["Year"] == start).to_numpy()],
+                                  "End": emission[(rows["Year"] == end).to_numpy()]})
+    changes_table.index.name = "Country Name"
+    changes_table["Change"] = changes_table["End"] - changes_table["Start"]
+    changes_table = changes_table.sort_values(["Change"], ascending=False, kind='mergesort')
+    # Countries with the same change have the same rank, as get_co2_extremes joins them
+    changes_table["Rank"] = changes_table["Change"].rank(
+        method="min", ascending=False, na_option="bottom").astype(int)
+    return changes_table
+
+
+def get_window_changes(data_processed: pd.DataFrame, window: int) -> Optional[pd.DataFrame]:
+    """Function which chooses countries with biggest growth and decrease in CO2 emission
+    per capita in every window of the chosen number of years (see find_window_extremes)
+
+    :param data_processed: Processed pandas DataFrame
+    :type data_processed: pd.DataFrame
+    :param window: Number of years in each window
+    :type window: int
+    :return: Dataframe with the boundary years of each window and the names of the
+    countries and their changes or None if there are less years than the window has
+    :rtype: Optional[pd.DataFrame]
+    """
+    years = np.array(sorted(set(data_processed["Year"])), dtype=np.int64)
+    country_codes, countries = pd.factorize(data_processed["Country Name"], sort=True)
+    year_codes = np.searchsorted(years, data_processed["Year"].to_numpy(dtype=np.int64))
+    shape = (len(countries), len(years))
+    counts = np.zeros(shape, dtype=np.int64)
+    np.add.at(counts, (country_codes, year_codes), 1)
+    emission = np.full(shape, np.nan)
+    emission[country_codes, year_codes] = \
+        data_processed["Total and bunker per capita"].to_numpy(dtype=float)
+    # Use only countries with exactly one row in the year, the same way get_co2_changes does
+    emission[counts != 1] = np.nan
+    return find_window_extremes(emission, np.asarray(countries, dtype=object), years, window)
+
+
+def find_window_extremes(emission: np.ndarray, countries: np.ndarray, years: np.ndarray,
+                         window: int) -> Optional[pd.DataFrame]:
+    """Function which calculates changes in CO2 emission per capita of all of the countries
+    in every window of the chosen number of years at once and chooses countries with
+    biggest growth and decrease in each of them (the same as get_co2_extremes chooses them)
+
+    :param emission: Emission per capita of each country (rows) and year (columns),
+    NaN for missing data
+    :type emission: np.ndarray
+    :param countries: Sorted names of the countries
+    :type countries: np.ndarray
+    :param years: Sorted years
+    :type years: np.ndarray
+    :param window: Number of years in each window, the change is calculated between
+    the first and the last of them
+    :type window: int
+    :return: Dataframe with the boundary years of each window and the names of the
+    countries and their changes or None if there are less years than the window has
+    :rtype: Optional[pd.DataFrame]
+    """
+    if len(years) < window:
+        print(f"There is not enough data to calculate changes in windows of {window} years.")
+        return None
+    windows = len(years) - window + 1
+    # Changes of all of the countries in all of the windows
+    changes = emission[:, window - 1:] - emission[:, :windows]
+    max_change = np.max(np.where(changes > 0, changes, -np.inf), axis=0, initial=-np.inf)
+    min_change = np.min(np.where(changes < 0, changes, np.inf), axis=0, initial=np.inf)
+    max_change[np.isinf(max_change)] = 0
+    min_change[np.isinf(min_change)] = 0
+    growth_countries, decrease_countries = [], []
+    for position in range(windows):
+        # Countries with exactly the same change in emission per capita are joined together
+        column = changes[:, position]
+        growth_countries.append(', '.join(countries[(column > 0) &
+                                                    (column == max_change[position])]))
+        decrease_countries.append(', '.join(countries[(column < 0) &
+                                                      (column == min_change[position])]))
+    return pd.DataFrame({"Start": years[:windows], "End": years[window - 1:],
+                         "Growth in emission": growth_countries, "Growth": max_change,
+                         "Decrease in emission": decrease_countries, "Decrease": min_change},
+                        index=np.arange(1, windows + 1))
 
 
-def save_results(filename: str, data_list: List[Union[pd.DataFrame, None]], title_list: List[str]):
-    """Function which saves Dataframe's to one csv file
+def save_results(filename: str, data_list: List[Union[pd.DataFrame, None]], title_list: List[str],
+                 output_format: str = "csv", names: Optional[List[str]] = None,
+                 stream: Optional[TextIO] = None):
+    """Function which saves Dataframe's to one file (see writers.py)
 
-    :param filename: Name of the output csv file
+    :param filename: Name of the output file, '-' means the standard output
     :type filename: str
     :param data_list: List of Dataframe's which will be written to the file
     :type data_list: List[pd.DataFrame]
     :param title_list: List of Titles of the corresponding dataframe's
     :type title_list: List[str]
+    :param output_format: Format of the output file, defaults to "csv"
+    :type output_format: str, optional
+    :param names: Names of the corresponding dataframe's used by json and npz formats,
+    defaults to None ('table_1', 'table_2', ...)
+    :type names: Optional[List[str]], optional
+    :param stream: Standard output used for '-', defaults to None (sys.stdout)
+    :type stream: Optional[TextIO], optional
     """
-    if os.path.exists(filename):
-        os.remove(filename)
-    with open(filename, 'a', encoding='UTF-8', newline='') as file:
-        for title, dataframe in zip(title_list, data_list):
-            if title and dataframe is not None:
-                file.write(title)
-                dataframe.to_csv(file, float_format='%.5f')
-                file.write("\n")
+    if names is None:
+        names = [f"table_{number}" for number in range(1, len(data_list) + 1)]
+    tables = [(name, title, dataframe)
+              for name, title, dataframe in zip(names, title_list, data_list)
+              if title and dataframe is not None]
+    writers.write_tables(filename, tables, output_format, stream)
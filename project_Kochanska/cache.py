@@ -0,0 +1,236 @@
+"""Cache
+
+This script stores the cleaned and joined data between the runs of the program.
+Entries are identified by the content of the input files and the dictionary
+used to change country names, so they are reused only when nothing has changed.
+Each entry holds data from all of the common years, which allows to reuse it
+for any range of years.
+
+Entries are pickled, so only the ones owned by the current user are loaded
+(other users could place files running any code in a shared cache directory).
+
+This file contains the following functions:
+
+    * get_cache_dir - returns the default directory of the cache
+    * get_file_hash - returns hash of the content of the file
+    * get_cache_key - returns the name of the cache entry for the input files
+    * create_entry - returns cache entry with cleaned and joined data
+    * load_entry - returns saved cache entry
+    * save_entry - saves cache entry and removes the oldest ones
+    * evict_entries - removes least recently used entries above the size limit
+    * clear_cache - removes all of the cache entries
+    * select_entry_years - returns joined data from the chosen years
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import List, Optional
+import pandas as pd
+import project_Kochanska.matrix as matrix
+import project_Kochanska.read_data as read_data
+from project_Kochanska.errors import DataError
+
+# Change it whenever the content of the entries changes
+CACHE_VERSION = 1
+ENTRY_SUFFIX = ".pkl"
+
+
+def get_cache_dir() -> str:
+    """Function which returns the default directory of the cache
+
+    :return: Path to the cache directory
+    :rtype: str
+    """
+    base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "project_Kochanska")
+
+
+def get_file_hash(file_path: str) -> str:
+    """Function which calculates hash of the content of the file
+
+    :param file_path: Path to the file
+    :type file_path: str
+    :return: Hexadecimal sha256 hash
+    :rtype: str
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def get_cache_key(file_paths: List[str], countries_dict: dict) -> str:
+    """Function which creates the name of the cache entry for the input files
+
+    :param file_paths: Paths to co2, populations and gdp files (in this order), directories
+    and glob patterns are identified by the content of all of their files
+    :type file_paths: List[str]
+    :param countries_dict: Dictionary used to change country names
+    :type countries_dict: dict
+    :return: Name of the cache entry
+    :rtype: str
+    """
+    key = hashlib.sha256(f"{CACHE_VERSION}".encode())
+    for file_path in file_paths:
+        for shard in read_data.expand_input(file_path):
+            archive, member = read_data.split_zip_member(shard)
+            key.update(get_file_hash(archive).encode())
+            if member is not None:
+                key.update(member.encode())
+    key.update(json.dumps(countries_dict, sort_keys=True).encode())
+    return key.hexdigest()
+
+
+def create_entry(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame,
+                 countries_dict: Optional[dict] = None, engine: str = "pandas") -> dict:
+    """Function which cleans and joins data from all of the common years
+
+    :param gdp: DataFrame with gdp information
+    :type gdp: pd.DataFrame
+    :param populations: DataFrame with population information
+    :type populations: pd.DataFrame
+    :param co2: DataFrame with emission information
+    :type co2: pd.DataFrame
+    :param countries_dict: Dictionary used to change country names,
+    defaults to None (read_data.COUNTRIES_DICT is used)
+    :type countries_dict: Optional[dict], optional
+    :param engine: Engine joining the data, 'pandas' or 'matrix' (see matrix.py),
+    defaults to "pandas"
+    :type engine: str, optional
+    :return: Cache entry with joined data, list of common years and names
+    of countries from each file
+    :rtype: dict
+    """
+    if engine == "matrix":
+        matrices = matrix.build_matrices(gdp, populations, co2, [None, None], countries_dict)
+        if matrices is not None:
+            countries = matrices["countries"]
+            return {"joined": matrix.matrices_to_frame(matrices),
+                    "years": sorted(matrices["common_years"]),
+                    "gdp_countries": set(countries[matrices["gdp_countries"]]),
+                    "pop_countries": set(countries[matrices["pop_countries"]]),
+                    "co2_countries": matrix.get_co2_countries(matrices)}
+    gdp_subset, populations_subset, co2_subset, common_years = read_data.check_data(
+        gdp, populations, co2, [None, None], report=False, countries_dict=countries_dict)
+    joined_data = read_data.join_data(
+        gdp_subset, populations_subset, co2_subset, common_years)
+    return {"joined": joined_data,
+            "years": sorted(common_years),
+            "gdp_countries": set(gdp_subset["Country Name"].to_list()),
+            "pop_countries": set(populations_subset["Country Name"].to_list()),
+            "co2_countries": co2_subset[["Year", "Country Name"]].reset_index(drop=True)}
+
+
+def load_entry(key: str, cache_dir: str) -> Optional[dict]:
+    """Function which loads saved cache entry
+
+    :param key: Name of the cache entry
+    :type key: str
+    :param cache_dir: Directory of the cache
+    :type cache_dir: str
+    :return: Cache entry or None if it does not exist, can't be read
+    or is owned by another user
+    :rtype: Optional[dict]
+    """
+    path = os.path.join(cache_dir, key + ENTRY_SUFFIX)
+    try:
+        with open(path, 'rb') as file:
+            # Unpickling can run any code, so entries of other users are not trusted
+            if hasattr(os, "getuid") and os.fstat(file.fileno()).st_uid != os.getuid():
+                return None
+            entry = pickle.load(file)
+        # Mark the entry as recently used
+        os.utime(path)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    return entry
+
+
+def save_entry(key: str, entry: dict, cache_dir: str, max_size: int):
+    """Function which saves cache entry and makes sure that the cache
+    is not bigger than the limit
+
+    :param key: Name of the cache entry
+    :type key: str
+    :param entry: Cache entry
+    :type entry: dict
+    :param cache_dir: Directory of the cache
+    :type cache_dir: str
+    :param max_size: Maximal size of the cache in bytes
+    :type max_size: int
+    """
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to temporary file first so that other runs never read partial entries
+        file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(file_descriptor, 'wb') as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, os.path.join(cache_dir, key + ENTRY_SUFFIX))
+    except OSError:
+        print("Cache could not be saved.")
+        return
+    evict_entries(cache_dir, max_size)
+
+
+def evict_entries(cache_dir: str, max_size: int):
+    """Function which removes least recently used cache entries until
+    the size of the cache is not bigger than the limit
+
+    :param cache_dir: Directory of the cache
+    :type cache_dir: str
+    :param max_size: Maximal size of the cache in bytes
+    :type max_size: int
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(ENTRY_SUFFIX):
+            status = os.stat(os.path.join(cache_dir, name))
+            entries.append((status.st_mtime, status.st_size, name))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        total_size -= size
+
+
+def clear_cache(cache_dir: str):
+    """Function which removes all of the cache entries
+
+    :param cache_dir: Directory of the cache
+    :type cache_dir: str
+    """
+    if os.path.isdir(cache_dir):
+        evict_entries(cache_dir, max_size=-1)
+
+
+def select_entry_years(entry: dict, years: list) -> tuple[pd.DataFrame, list]:
+    """Function which selects joined data from the chosen years
+    the same way select_years and check_data do
+
+    :param entry: Cache entry
+    :type entry: dict
+    :param years: Years to be chosen, if None provided all common years will be chosen
+    :type years: list
+    :return: Joined data from the chosen years and the list of them
+    :rtype: tuple[pd.DataFrame, list]
+    """
+    common_years = entry["years"]
+    first = min(common_years) if years[0] is None else years[0]
+    last = max(common_years) if years[1] is None else years[1]
+    chosen_years = [year for year in common_years if first <= year <= last]
+    if len(chosen_years) == 0:
+        raise DataError("Error, provided files have no data for chosen years")
+    joined_data = entry["joined"]
+    joined_data = joined_data[joined_data["Year"].isin(chosen_years)].reset_index(drop=True)
+    co2_countries = entry["co2_countries"]
+    read_data.report_odd_countries(
+        entry["gdp_countries"], entry["pop_countries"],
+        set(co2_countries[co2_countries["Year"].isin(chosen_years)]["Country Name"]))
+    return joined_data, chosen_years
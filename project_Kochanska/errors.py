@@ -0,0 +1,15 @@
+"""Errors
+
+This script contains the exception raised when the input data can't be
+read or analyzed. The program prints its message and exits with code -1,
+library users can catch it instead.
+
+This file contains the following classes:
+
+    * DataError - error in the input data or files
+"""
+
+
+class DataError(Exception):
+    """Error in the input data or files, its message describes the problem
+    """
@@ -0,0 +1,244 @@
+"""Incremental
+
+This script updates the results when data from new years is added to the
+input files (or data from some years changes). The results of each year and
+the fingerprints of the cleaned data they were calculated from are kept
+in a state file, so only new or changed years are joined and analyzed again.
+Changes in CO2 emission are calculated again only when their years or the
+data from those years change.
+
+This file contains the following functions:
+
+    * get_year_fingerprints - returns fingerprints of the data from each year
+    * load_state - returns saved state
+    * save_state - saves state
+    * update_results - returns results updated with new or changed years
+    * run - updates the results and saves them to a csv file
+    * watch - updates the results whenever the input files change
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.program as program
+import project_Kochanska.read_data as read_data
+from project_Kochanska.analyze_data import HIGHEST_COLUMNS
+from project_Kochanska.errors import DataError
+
+# Change it whenever the content of the state changes
+STATE_VERSION = 1
+
+
+def get_year_fingerprints(gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
+                          co2_subset: pd.DataFrame, years: list) -> Dict[int, str]:
+    """Function which calculates fingerprints of the cleaned data from each year
+
+    :param gdp_subset: Cleaned Dataframe with gdp information
+    :type gdp_subset: pd.DataFrame
+    :param populations_subset: Cleaned Dataframe with population information
+    :type populations_subset: pd.DataFrame
+    :param co2_subset: Cleaned Dataframe with emission information
+    :type co2_subset: pd.DataFrame
+    :param years: Years for which fingerprints are calculated
+    :type years: list
+    :return: Fingerprint of each year
+    :rtype: Dict[int, str]
+    """
+    co2_hashes = pd.util.hash_pandas_object(co2_subset, index=False).to_numpy()
+    co2_years = co2_subset["Year"].to_numpy()
+    fingerprints = {}
+    for year in years:
+        year_hash = hashlib.sha256()
+        for data in (gdp_subset, populations_subset):
+            year_hash.update(pd.util.hash_pandas_object(
+                data[["Country Name", year]], index=False).to_numpy().tobytes())
+        year_hash.update(np.ascontiguousarray(co2_hashes[co2_years == year]).tobytes())
+        fingerprints[int(year)] = year_hash.hexdigest()
+    return fingerprints
+
+
+def load_state(file_path: str) -> dict:
+    """Function which loads the state saved by the previous update
+
+    :param file_path: Path to the state file
+    :type file_path: str
+    :return: Saved state or a new one if it does not exist or can't be read
+    :rtype: dict
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            state = pickle.load(file)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass
+    return {"version": STATE_VERSION, "fingerprints": {}, "emission": None, "gdp": None,
+            "changes_key": None, "changes": None}
+
+
+def save_state(file_path: str, state: dict):
+    """Function which saves the state, so that the next update can use it
+
+    :param file_path: Path to the state file
+    :type file_path: str
+    :param state: State to save
+    :type state: dict
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    # Write to temporary file first so that the state is never saved partially
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(file_descriptor, 'wb') as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, file_path)
+
+
+def _process_years(gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
+                   co2_subset: pd.DataFrame, years: list) -> pd.DataFrame:
+    """Function which joins and processes data only from some years
+
+    :param gdp_subset: Cleaned Dataframe with gdp information
+    :type gdp_subset: pd.DataFrame
+    :param populations_subset: Cleaned Dataframe with population information
+    :type populations_subset: pd.DataFrame
+    :param co2_subset: Cleaned Dataframe with emission information
+    :type co2_subset: pd.DataFrame
+    :param years: Years to process
+    :type years: list
+    :return: Processed DataFrame with per capita data
+    :rtype: pd.DataFrame
+    """
+    joined_data = read_data.join_data(gdp_subset[["Country Name"] + years],
+                                      populations_subset[["Country Name"] + years],
+                                      co2_subset[co2_subset["Year"].isin(years)], years)
+    return analyze_data.get_per_capita(joined_data)
+
+
+def _update_table(table: pd.DataFrame, new_rows: pd.DataFrame, years: list) -> pd.DataFrame:
+    """Function which replaces rows of the chosen years in the table of highest values
+
+    :param table: Saved table or None
+    :type table: pd.DataFrame
+    :param new_rows: New rows of the chosen years
+    :type new_rows: pd.DataFrame
+    :param years: Years which were processed again
+    :type years: list
+    :return: Updated table
+    :rtype: pd.DataFrame
+    """
+    if table is None:
+        return new_rows
+    return pd.concat([table[~table.index.isin(years)], new_rows])
+
+
+def update_results(state: dict, gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
+                   co2_subset: pd.DataFrame, years: list) -> tuple:
+    """Function which analyzes new or changed years and updates the state with them
+
+    :param state: State saved by the previous update (see load_state)
+    :type state: dict
+    :param gdp_subset: Cleaned Dataframe with gdp information
+    :type gdp_subset: pd.DataFrame
+    :param populations_subset: Cleaned Dataframe with population information
+    :type populations_subset: pd.DataFrame
+    :param co2_subset: Cleaned Dataframe with emission information
+    :type co2_subset: pd.DataFrame
+    :param years: Years which are analyzed
+    :type years: list
+    :return: Tables with highest emission and gdp, changes in emission, their years
+    and the list of years which were processed again
+    :rtype: tuple
+    """
+    fingerprints = get_year_fingerprints(gdp_subset, populations_subset, co2_subset, years)
+    changed_years = [year for year in years
+                     if state["fingerprints"].get(year) != fingerprints[year]]
+    if changed_years:
+        data_processed = _process_years(gdp_subset, populations_subset, co2_subset,
+                                        changed_years)
+        emission = analyze_data.find_5_highest(data_processed, *HIGHEST_COLUMNS["emission"])
+        gdp = analyze_data.find_5_highest(data_processed, *HIGHEST_COLUMNS["gdp"])
+        state["emission"] = _update_table(state["emission"], emission, changed_years)
+        state["gdp"] = _update_table(state["gdp"], gdp, changed_years)
+        state["fingerprints"].update({year: fingerprints[year] for year in changed_years})
+
+    # Years with any joined data are the ones present in the tables
+    analyzed_years = [year for year in years if year in state["emission"].index]
+    boundary_years = analyze_data.get_boundary_years(set(analyzed_years)) \
+        if analyzed_years else None
+    if boundary_years is None:
+        changes = None
+    else:
+        changes_key = (tuple(boundary_years),
+                       tuple(fingerprints[year] for year in boundary_years))
+        if state["changes_key"] != changes_key:
+            data_processed = _process_years(gdp_subset, populations_subset, co2_subset,
+                                            sorted(boundary_years))
+            state["changes"] = analyze_data.get_co2_extremes(
+                analyze_data.get_co2_changes(data_processed, boundary_years))
+            state["changes_key"] = changes_key
+        changes = state["changes"]
+    emission = analyze_data.select_table_years(state["emission"], analyzed_years)
+    gdp = analyze_data.select_table_years(state["gdp"], analyzed_years)
+    return emission, gdp, changes, boundary_years, changed_years
+
+
+def run(args: argparse.Namespace) -> List[int]:
+    """Function which reads the input files, updates the results
+    and saves them to a csv file
+
+    :param args: Command line arguments
+    :type args: argparse.Namespace
+    :return: Years which were processed again
+    :rtype: List[int]
+    """
+    co2, populations, gdp = read_data.read_files(
+        [(args.co2, False, None), (args.populations, True, [args.y1, args.y2]),
+         (args.gdp, True, [args.y1, args.y2])], workers=getattr(args, "workers", 1))
+    countries_dict = dict(read_data.COUNTRIES_DICT)
+    if args.countries_file:
+        countries_dict.update(read_data.load_countries_dict(args.countries_file))
+    gdp_subset, populations_subset, co2_subset, common_years = read_data.check_data(
+        gdp, populations, co2, [args.y1, args.y2], countries_dict=countries_dict)
+
+    state = load_state(args.incremental)
+    emission, gdp_table, changes, years, changed_years = update_results(
+        state, gdp_subset, populations_subset, co2_subset, sorted(common_years))
+    save_state(args.incremental, state)
+    program.write_results(args.out, emission, gdp_table, changes, years,
+                          getattr(args, "format", "csv"))
+    return changed_years
+
+
+def watch(args: argparse.Namespace):
+    """Function which checks the input files every args.watch seconds
+    and updates the results whenever they change
+
+    :param args: Command line arguments
+    :type args: argparse.Namespace
+    """
+    last_change = None
+    try:
+        while True:
+            change = []
+            for path in (args.co2, args.populations, args.gdp):
+                try:
+                    change.append(read_data.get_input_signature(path))
+                except (OSError, DataError):
+                    change.append(None)
+            if change != last_change:
+                try:
+                    changed_years = run(args)
+                except DataError as error:
+                    # Files may be incomplete while they are being written, try again later
+                    print(error)
+                else:
+                    print(f"Results updated, {len(changed_years)} years have been processed.")
+                    last_change = change
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,327 @@
+"""Matching
+
+This script finds country names which are written differently in the gdp and
+population files (World Bank names) and in the emission file, so that they don't
+need to be added to COUNTRIES_DICT by hand. Names are split into normalized tokens
+and an inverted index from tokens to names is built, so only names sharing a token
+are compared instead of all pairs of names. Rare tokens weigh more than common ones
+(like 'ISLANDS') and pairs of names are accepted only when each of them is
+the best match of the other one.
+
+Accepted matches are saved in a mapping cache (a json file) under the names
+from the gdp and population files, so later runs only look them up, also when
+the input files change. Only names which are not in the mapping cache yet are
+matched. Names which have not been matched are saved together with the fingerprint
+of the names they were compared with and are matched again only when it changes.
+
+This file contains the following functions:
+
+    * normalize_tokens - returns normalized tokens of a country name
+    * build_index - returns inverted index from tokens to names
+    * match_names - returns pairs of names which match each other
+    * get_unmatched_names - returns names missing from the emission file and names found only in it
+    * find_country_matches - returns country names which should be changed
+    * update_mapping - matches names missing from the mapping cache and adds them to it
+    * report_matches - informs about matched country names
+    * load_mapping - returns the mapping cache
+    * save_mapping - saves the mapping cache
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+import project_Kochanska.read_data as read_data
+from project_Kochanska.errors import DataError
+from project_Kochanska.writers import atomic_open
+
+# Change it whenever the matching algorithm or the content of the mapping cache changes
+MAPPING_VERSION = 2
+# Name of the default mapping cache in the cache directory
+MAPPING_FILE = "countries.json"
+# Words which don't tell countries apart
+STOP_WORDS = {"THE", "OF", "AND", "FORMER", "FORMERLY", "INCLUDING", "EXCLUDING"}
+# Abbreviations used in World Bank names
+ABBREVIATIONS = {"REP": "REPUBLIC", "DEM": "DEMOCRATIC", "ST": "SAINT", "FED": "FEDERATED",
+                 "PDR": "PEOPLE S DEMOCRATIC REPUBLIC", "SAR": "SPECIAL ADMINISTRATIVE REGION"}
+
+
+def normalize_tokens(name: str) -> List[str]:
+    """Function which splits country name into upper case tokens with no accents
+    and punctuation, expanded abbreviations and no stop words. Adjectives ending
+    with 'AN' lose the last letter, so that e.g. 'LIBYAN' and 'LIBYA' are the same
+
+    :param name: Country name
+    :type name: str
+    :return: Distinct tokens of the name in the order of their appearance
+    :rtype: List[str]
+    """
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().upper()
+    words = re.sub(r"[^A-Z0-9]+", " ", name).split()
+    tokens = " ".join(ABBREVIATIONS.get(word, word) for word in words).split()
+    return list(dict.fromkeys(token[:-1] if len(token) > 5 and token.endswith("AN") else token
+                              for token in tokens if token not in STOP_WORDS))
+
+
+def build_index(tokens: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """Function which creates inverted index from tokens to names containing them
+
+    :param tokens: Tokens of each name (see normalize_tokens)
+    :type tokens: Dict[str, Iterable[str]]
+    :return: Names containing each token
+    :rtype: Dict[str, List[str]]
+    """
+    index: Dict[str, List[str]] = {}
+    for name, name_tokens in tokens.items():
+        for token in name_tokens:
+            index.setdefault(token, []).append(name)
+    return index
+
+
+def match_names(names: Iterable[str], candidates: Iterable[str], threshold: float = 0.8,
+                max_postings: int = 50) -> Dict[str, str]:
+    """Function which finds names matching candidates. Each name is compared only with
+    candidates sharing one of its tokens which is not found in more than max_postings
+    candidates, so the time grows linearly with the number of names. The score of
+    a pair is the weight of shared tokens divided by the weight of tokens of the shorter
+    name (each token weighs log(number of names / number of names containing it))
+
+    :param names: Names which are matched
+    :type names: Iterable[str]
+    :param candidates: Names which they can be matched with
+    :type candidates: Iterable[str]
+    :param threshold: Minimal score of accepted pairs, defaults to 0.8
+    :type threshold: float, optional
+    :param max_postings: Tokens found in more candidates are not used to find them,
+    defaults to 50
+    :type max_postings: int, optional
+    :return: Names and candidates which are the only best match of each other
+    :rtype: Dict[str, str]
+    """
+    name_tokens = {name: set(normalize_tokens(name)) for name in names}
+    candidate_tokens = {name: set(normalize_tokens(name)) for name in candidates}
+    frequency = Counter(token for tokens in (*name_tokens.values(), *candidate_tokens.values())
+                        for token in tokens)
+    total = len(name_tokens) + len(candidate_tokens)
+    weights = {token: math.log((total + 1) / count) for token, count in frequency.items()}
+    index = build_index(candidate_tokens)
+
+    # Best score of each name and candidate with the pairs which have it
+    best: Dict[tuple, tuple] = {}
+    for name, tokens in name_tokens.items():
+        found = {candidate for token in tokens if len(index.get(token, [])) <= max_postings
+                 for candidate in index.get(token, [])}
+        name_weight = sum(weights[token] for token in tokens)
+        for candidate in found:
+            candidate_weight = sum(weights[token] for token in candidate_tokens[candidate])
+            shared = sum(weights[token] for token in tokens & candidate_tokens[candidate])
+            # Among pairs with equal score the one with fewer other tokens wins
+            score = (round(shared / min(name_weight, candidate_weight), 9),
+                     round(2 * shared / (name_weight + candidate_weight), 9))
+            if score[0] < threshold:
+                continue
+            for key in (("name", name), ("candidate", candidate)):
+                if key not in best or score > best[key][0]:
+                    best[key] = (score, [(name, candidate)])
+                elif score == best[key][0]:
+                    best[key][1].append((name, candidate))
+    matches = {}
+    for name in name_tokens:
+        pairs = best.get(("name", name), (None, []))[1]
+        if len(pairs) == 1 and best[("candidate", pairs[0][1])][1] == pairs:
+            matches[name] = pairs[0][1]
+    return matches
+
+
+def get_unmatched_names(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame,
+                        countries_dict: dict) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Function which finds country names of gdp and population files not found in
+    the emission file and names found only in the emission file
+
+    :param gdp: Dataframe with gdp information
+    :type gdp: pd.DataFrame
+    :param populations: Dataframe with population information
+    :type populations: pd.DataFrame
+    :param co2: Dataframe with emission information
+    :type co2: pd.DataFrame
+    :param countries_dict: Dictionary with incorrect country names
+    stored as keys and their correct counterparts stored as values
+    :type countries_dict: dict
+    :return: Names changed the same way read_data.check_data changes them stored as keys
+    and original names from gdp and population files stored as values, and sorted names
+    found only in the emission file
+    :rtype: Tuple[Dict[str, List[str]], List[str]]
+    """
+    # Names after the changes made by read_data.check_data
+    wdi_names: Dict[str, set] = {}
+    for data in (gdp, populations):
+        for name in data["Country Name"].dropna().unique():
+            changed = str(countries_dict.get(name, name)).upper()
+            wdi_names.setdefault(changed, set()).add(name)
+    common = set(read_data.normalize_country_names(
+        gdp["Country Name"].dropna(), countries_dict, upper=True)) & set(
+            read_data.normalize_country_names(
+                populations["Country Name"].dropna(), countries_dict, upper=True))
+    co2_names = set(read_data.normalize_country_names(co2["Country Name"].dropna(),
+                                                      countries_dict))
+    names = {name: sorted(wdi_names[name]) for name in sorted(common - co2_names)}
+    return names, sorted(co2_names - common)
+
+
+def _match_originals(names: Dict[str, List[str]], candidates: List[str],
+                     threshold: float) -> Dict[str, str]:
+    """Function which matches names and returns matches of their original names
+
+    :param names: Changed names with their original names (see get_unmatched_names)
+    :type names: Dict[str, List[str]]
+    :param candidates: Names found only in the emission file
+    :type candidates: List[str]
+    :param threshold: Minimal score of accepted pairs (see match_names)
+    :type threshold: float
+    :return: Original names stored as keys and names from the emission file stored as values
+    :rtype: Dict[str, str]
+    """
+    matches = match_names(list(names), candidates, threshold) if names else {}
+    return {original: matched for name, matched in sorted(matches.items())
+            for original in names[name]}
+
+
+def find_country_matches(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame,
+                         countries_dict: dict, threshold: float = 0.8) -> Dict[str, str]:
+    """Function which matches country names of gdp and population files not found
+    in the emission file with names found only in the emission file
+
+    :param gdp: Dataframe with gdp information
+    :type gdp: pd.DataFrame
+    :param populations: Dataframe with population information
+    :type populations: pd.DataFrame
+    :param co2: Dataframe with emission information
+    :type co2: pd.DataFrame
+    :param countries_dict: Dictionary with incorrect country names
+    stored as keys and their correct counterparts stored as values
+    :type countries_dict: dict
+    :param threshold: Minimal score of accepted pairs (see match_names), defaults to 0.8
+    :type threshold: float, optional
+    :return: Names from gdp and population files stored as keys and names
+    from the emission file stored as values, which can extend countries_dict
+    :rtype: Dict[str, str]
+    """
+    return _match_originals(*get_unmatched_names(gdp, populations, co2, countries_dict),
+                            threshold)
+
+
+def update_mapping(mapping: dict, gdp: pd.DataFrame, populations: pd.DataFrame,
+                   co2: pd.DataFrame, countries_dict: dict,
+                   threshold: float = 0.8) -> Dict[str, str]:
+    """Function which matches only the names which are not in the mapping cache yet
+    and adds the new matches to it. Names which have not been matched are skipped
+    while the names found only in the emission file stay the same
+
+    :param mapping: Mapping cache (see load_mapping), which is changed in place
+    :type mapping: dict
+    :param gdp: Dataframe with gdp information
+    :type gdp: pd.DataFrame
+    :param populations: Dataframe with population information
+    :type populations: pd.DataFrame
+    :param co2: Dataframe with emission information
+    :type co2: pd.DataFrame
+    :param countries_dict: Dictionary with incorrect country names stored as keys and
+    their correct counterparts stored as values, it is more important than the mapping
+    :type countries_dict: dict
+    :param threshold: Minimal score of accepted pairs (see match_names), defaults to 0.8
+    :type threshold: float, optional
+    :return: Matches of the names from gdp and population files (saved and new ones)
+    :rtype: Dict[str, str]
+    """
+    known = {**mapping["matches"], **countries_dict}
+    names, candidates = get_unmatched_names(gdp, populations, co2, known)
+    skipped = set(mapping["unmatched"]) & set(names) \
+        if mapping["candidates"] == _get_fingerprint(candidates) else set()
+    new_names = {name: originals for name, originals in names.items() if name not in skipped}
+    new_matches = _match_originals(new_names, candidates, threshold)
+    mapping["matches"].update(new_matches)
+    # Matched names are not compared again, so they are not a part of the fingerprint
+    matched = set(new_matches.values())
+    mapping["candidates"] = _get_fingerprint([name for name in candidates
+                                              if name not in matched])
+    mapping["unmatched"] = sorted(skipped | {name for name, originals in new_names.items()
+                                             if originals[0] not in new_matches})
+    sources = set(gdp["Country Name"].dropna()) | set(populations["Country Name"].dropna())
+    return {name: matched for name, matched in mapping["matches"].items()
+            if name in sources and name not in countries_dict}
+
+
+def report_matches(matches: Dict[str, str], applied: bool):
+    """Function which informs about matched country names
+
+    :param matches: Matched names (see find_country_matches)
+    :type matches: Dict[str, str]
+    :param applied: Whether the matches are used in the analysis
+    :type applied: bool
+    """
+    if not matches:
+        print("No new matches of country names have been found.")
+        return
+    if applied:
+        print(f"{len(matches)} country names have been matched with names from "
+              "the emission file:")
+    else:
+        print(f"Proposed matches of {len(matches)} country names (use --match_countries "
+              "apply to use them):")
+    for name, matched in matches.items():
+        print(f"    {name} -> {matched}")
+
+
+def _get_fingerprint(names: List[str]) -> str:
+    """Function which creates the fingerprint of the names
+
+    :param names: Sorted names
+    :type names: List[str]
+    :return: Hash of the names
+    :rtype: str
+    """
+    return hashlib.sha256(json.dumps(names).encode()).hexdigest()
+
+
+def load_mapping(file_path: Optional[str]) -> dict:
+    """Function which reads the mapping cache
+
+    :param file_path: Path to the mapping cache, None means an empty cache kept in memory
+    :type file_path: Optional[str]
+    :return: Accepted matches, names which have not been matched and the fingerprint
+    of the names they were compared with, the cache is empty if it does not exist
+    or can't be read
+    :rtype: dict
+    """
+    mapping = {"version": MAPPING_VERSION, "matches": {}, "unmatched": [], "candidates": None}
+    if file_path is None:
+        return mapping
+    try:
+        with open(file_path, 'r', encoding='UTF-8') as file:
+            saved = json.load(file)
+    except (OSError, ValueError):
+        return mapping
+    if isinstance(saved, dict) and saved.get("version") == MAPPING_VERSION:
+        mapping.update({key: saved[key] for key in ("matches", "unmatched", "candidates")
+                        if key in saved})
+    return mapping
+
+
+def save_mapping(file_path: str, mapping: dict):
+    """Function which saves the mapping cache
+
+    :param file_path: Path to the mapping cache
+    :type file_path: str
+    :param mapping: Mapping cache (see load_mapping)
+    :type mapping: dict
+    """
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        with atomic_open(file_path) as file:
+            json.dump(mapping, file, indent=2, sort_keys=True)
+    except OSError as error:
+        raise DataError(f"Error, mapping cache {file_path} could not be saved") from error
@@ -0,0 +1,273 @@
+"""Matrix
+
+This script cleans and joins the gdp, population and emission data without
+merging and grouping by country names. Each country and year gets an integer
+id once, the data from all of the files is stored in dense country x year
+numpy matrices and rows about the same country and year are added with
+index accumulation. The long Dataframe is built only at the end, in the same
+order and with the same types as read_data.join_data creates it. Per capita
+values and changes in CO2 emission can be calculated directly on the matrices.
+
+This file contains the following functions:
+
+    * build_matrices - returns matrices with cleaned data from all of the files
+    * matrices_to_frame - returns joined Dataframe built from the matrices
+    * get_co2_countries - returns countries present in the emission file in each year
+    * report_odd_countries - informs about countries missing from some of the files
+    * get_per_capita_matrices - returns per capita matrices
+    * get_co2_changes_matrix - returns changes in CO2 emission per capita of all countries
+    * get_window_changes_matrix - returns biggest changes in CO2 emission in every window of years
+"""
+from typing import Optional
+import numpy as np
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.read_data as read_data
+
+# Per capita columns created by analyze_data.get_per_capita
+PER_CAPITA_COLUMNS = ['Total per capita', 'Total including bunker',
+                      'Total and bunker per capita', 'GDP per capita']
+
+
+def _accumulate(codes: np.ndarray, year_codes: Optional[np.ndarray], values: np.ndarray,
+                shape: tuple, dtype: np.dtype) -> np.ndarray:
+    """Function which adds values of the rows to the cells of their country and year.
+    Missing values are added as 0, the same way groupby sum does
+
+    :param codes: Country id of each row (-1 for rows which are skipped)
+    :type codes: np.ndarray
+    :param year_codes: Year id of each row or None if rows contain all of the years
+    :type year_codes: Optional[np.ndarray]
+    :param values: Values of the rows, one value or one value for each year
+    :type values: np.ndarray
+    :param shape: Number of countries and years
+    :type shape: tuple
+    :param dtype: Type of the matrix
+    :type dtype: np.dtype
+    :return: Country x year matrix
+    :rtype: np.ndarray
+    """
+    matrix = np.zeros(shape, dtype=dtype)
+    kept = codes >= 0
+    values = values[kept]
+    if np.issubdtype(dtype, np.floating):
+        values = np.nan_to_num(values, nan=0.0)
+    if year_codes is None:
+        np.add.at(matrix, codes[kept], values)
+    else:
+        np.add.at(matrix, (codes[kept], year_codes[kept]), values)
+    return matrix
+
+
+def build_matrices(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame,
+                   years: list, countries_dict: Optional[dict] = None) -> Optional[dict]:
+    """Function which selects the chosen years, changes country names and stores
+    the data from all of the files in country x year matrices
+
+    :param gdp: Dataframe with gdp information
+    :type gdp: pd.DataFrame
+    :param populations: Dataframe with populations information
+    :type populations: pd.DataFrame
+    :param co2: Dataframe with emissions information
+    :type co2: pd.DataFrame
+    :param years: Years which will be chosen
+    :type years: list
+    :param countries_dict: Dictionary with incorrect country names stored as keys and
+    their correct counterparts stored as values, defaults to None (COUNTRIES_DICT is used)
+    :type countries_dict: Optional[dict], optional
+    :return: Dictionary with sorted country names ('countries'), sorted years ('years'),
+    list of chosen years in the order of check_data ('common_years'), masks of countries
+    present in gdp and population files, mask of cells present in the emission file,
+    emission, gdp and population matrices ('values') and column names of the emission
+    file ('co2_columns'), or None if the data can't be joined this way (names which
+    become equal only after changing them to upper case or values which are not numbers)
+    :rtype: Optional[dict]
+    """
+    countries_dict = read_data.COUNTRIES_DICT if countries_dict is None else countries_dict
+    gdp_subset, populations_subset, co2_subset, common_years = read_data.select_years(
+        gdp, populations, co2, years)
+    value_columns = [column for column in co2_subset.columns
+                     if column not in ("Year", "Country Name")]
+    if not all(pd.api.types.is_numeric_dtype(co2_subset[column]) for column in value_columns) \
+            or not all(pd.api.types.is_numeric_dtype(data[year]) for year in common_years
+                       for data in (gdp_subset, populations_subset)):
+        return None
+
+    co2_names = read_data.normalize_country_names(co2_subset["Country Name"], countries_dict)
+    wide_names = []
+    for data in (gdp_subset, populations_subset):
+        names = read_data.normalize_country_names(data["Country Name"], countries_dict)
+        upper_names = read_data.normalize_country_names(names, {}, upper=True)
+        # check_data changes names to upper case after merging the rows, so different
+        # names which become equal are not merged and this can't be reproduced here
+        if names.nunique() != upper_names.nunique():
+            return None
+        wide_names.append(upper_names)
+
+    # Integer ids of the countries in the order of their names
+    codes, countries = pd.factorize(pd.concat([co2_names] + wide_names, ignore_index=True),
+                                    sort=True)
+    co2_codes, gdp_codes, populations_codes = np.split(
+        codes, np.cumsum([len(co2_names), len(wide_names[0])]))
+    sorted_years = np.array(sorted(common_years), dtype=np.int64)
+    shape = (len(countries), len(sorted_years))
+    year_codes = np.searchsorted(sorted_years, co2_subset["Year"].to_numpy(dtype=np.int64))
+
+    values = {}
+    for column in value_columns:
+        dtype = np.int64 if pd.api.types.is_integer_dtype(co2_subset[column]) else np.float64
+        values[column] = _accumulate(co2_codes, year_codes, co2_subset[column].to_numpy(dtype),
+                                     shape, dtype)
+    for column, data, data_codes in (("GDP", gdp_subset, gdp_codes),
+                                     ("Population", populations_subset, populations_codes)):
+        # Type of the melted column
+        dtype = np.result_type(*[data[year].dtype for year in common_years])
+        values[column] = _accumulate(data_codes, None, data[sorted_years.tolist()].to_numpy(dtype),
+                                     shape, dtype)
+
+    present = np.zeros(shape, dtype=bool)
+    kept = co2_codes >= 0
+    present[co2_codes[kept], year_codes[kept]] = True
+    return {"countries": np.asarray(countries, dtype=object),
+            "years": sorted_years,
+            "common_years": common_years,
+            "gdp_countries": np.bincount(gdp_codes[gdp_codes >= 0],
+                                         minlength=len(countries)) > 0,
+            "pop_countries": np.bincount(populations_codes[populations_codes >= 0],
+                                         minlength=len(countries)) > 0,
+            "co2_present": present,
+            "co2_columns": list(co2_subset.columns),
+            "values": values}
+
+
+def matrices_to_frame(matrices: dict, columns: Optional[list] = None) -> pd.DataFrame:
+    """Function which builds the long joined Dataframe from the matrices. Rows are
+    ordered by year and country name, the same way read_data.join_data orders them
+
+    :param matrices: Matrices created by build_matrices
+    :type matrices: dict
+    :param columns: Names of matrices which become columns, defaults to None
+    (the same columns as join_data creates)
+    :type columns: Optional[list], optional
+    :return: Joined Dataframe
+    :rtype: pd.DataFrame
+    """
+    if columns is None:
+        columns = matrices["co2_columns"] + ["GDP", "Population"]
+    joined = matrices["co2_present"] & \
+        (matrices["gdp_countries"] & matrices["pop_countries"])[:, np.newaxis]
+    # Cells ordered by year first
+    year_ids, country_ids = np.nonzero(joined.T)
+    data = {}
+    for column in columns:
+        if column == "Year":
+            data[column] = np.array(matrices["years"][year_ids].tolist(), dtype=object)
+        elif column == "Country Name":
+            data[column] = matrices["countries"][country_ids]
+        else:
+            data[column] = matrices["values"][column][country_ids, year_ids]
+    joined_data = pd.DataFrame(data, columns=columns,
+                               index=pd.Index(np.arange(len(year_ids)), dtype=np.int64))
+    if "Population" in joined_data.columns:
+        joined_data['Population'].replace(to_replace=0, value=float('nan'), inplace=True)
+    return joined_data
+
+
+def get_co2_countries(matrices: dict) -> pd.DataFrame:
+    """Function which lists countries present in the emission file in each year
+
+    :param matrices: Matrices created by build_matrices
+    :type matrices: dict
+    :return: Dataframe with 'Year' and 'Country Name' columns ordered by year
+    :rtype: pd.DataFrame
+    """
+    year_ids, country_ids = np.nonzero(matrices["co2_present"].T)
+    return pd.DataFrame({"Year": matrices["years"][year_ids],
+                         "Country Name": matrices["countries"][country_ids]})
+
+
+def report_odd_countries(matrices: dict):
+    """Function which informs how many countries are not present in all of the files
+    (see read_data.report_odd_countries)
+
+    :param matrices: Matrices created by build_matrices
+    :type matrices: dict
+    """
+    countries = matrices["countries"]
+    read_data.report_odd_countries(set(countries[matrices["gdp_countries"]]),
+                                   set(countries[matrices["pop_countries"]]),
+                                   set(countries[matrices["co2_present"].any(axis=1)]))
+
+
+def get_per_capita_matrices(matrices: dict) -> dict:
+    """Function which adds per capita matrices (the same as columns added by
+    analyze_data.get_per_capita) to the matrices
+
+    :param matrices: Matrices created by build_matrices
+    :type matrices: dict
+    :return: The same matrices with added per capita ones
+    :rtype: dict
+    """
+    values = matrices["values"]
+    # Treat population equal to 0 as missing, the same way join_data does
+    population = values["Population"].astype(float)
+    population[population == 0] = np.nan
+    values['Total per capita'] = values["Total"].astype(float) / population
+    values['Total including bunker'] = values["Total"] + values["Bunker fuels (Not in Total)"]
+    values['Total and bunker per capita'] = \
+        values['Total including bunker'].astype(float) / population
+    values['GDP per capita'] = values["GDP"].astype(float) / population
+    return matrices
+
+
+def get_co2_changes_matrix(matrices: dict, years: list) -> pd.DataFrame:
+    """Function which calculates the change in CO2 emission per capita between two
+    years for all of the countries which have data for both of them. The result is
+    the same as the result of analyze_data.get_co2_changes for the joined data
+
+    :param matrices: Matrices with per capita ones (see get_per_capita_matrices)
+    :type matrices: dict
+    :param years: Two years between which the change is calculated
+    :type years: list
+    :return: Dataframe indexed by country name with emission in both years,
+    the change between them and the rank of the change (1 is the biggest growth,
+    equal changes have the same rank)
+    :rtype: pd.DataFrame
+    """
+    start, end = np.searchsorted(matrices["years"], [min(years), max(years)])
+    joined = matrices["co2_present"] & \
+        (matrices["gdp_countries"] & matrices["pop_countries"])[:, np.newaxis]
+    complete = joined[:, start] & joined[:, end]
+    emission = matrices["values"]['Total and bunker per capita']
+    changes_table = pd.DataFrame({"Start": emission[complete, start],
+                                  "End": emission[complete, end]},
+                                 index=pd.Index(matrices["countries"][complete],
+                                                name="Country Name"))
+    changes_table["Change"] = changes_table["End"] - changes_table["Start"]
+    changes_table = changes_table.sort_values(["Change"], ascending=False, kind='mergesort')
+    # Countries with the same change have the same rank, as get_co2_extremes joins them
+    changes_table["Rank"] = changes_table["Change"].rank(
+        method="min", ascending=False, na_option="bottom").astype(int)
+    return changes_table
+
+
+def get_window_changes_matrix(matrices: dict, window: int) -> Optional[pd.DataFrame]:
+    """Function which chooses countries with biggest growth and decrease in CO2 emission
+    per capita in every window of the chosen number of years. The result is the same
+    as the result of analyze_data.get_window_changes for the joined data
+
+    :param matrices: Matrices with per capita ones (see get_per_capita_matrices)
+    :type matrices: dict
+    :param window: Number of years in each window
+    :type window: int
+    :return: Dataframe with the boundary years of each window and the names of the
+    countries and their changes or None if there are less years than the window has
+    :rtype: Optional[pd.DataFrame]
+    """
+    joined = matrices["co2_present"] & \
+        (matrices["gdp_countries"] & matrices["pop_countries"])[:, np.newaxis]
+    # Only years with joined data are analyzed, the same as in the joined Dataframe
+    year_mask = joined.any(axis=0)
+    emission = np.where(joined, matrices["values"]['Total and bunker per capita'], np.nan)
+    return analyze_data.find_window_extremes(emission[:, year_mask], matrices["countries"],
+                                             matrices["years"][year_mask], window)
@@ -0,0 +1,197 @@
+"""Parallel
+
+This script finds countries with the highest values of each year
+(see analyze_data.find_5_highest) on a pool of processes. Processed data
+is partitioned by year and its numeric columns needed by the workers
+are placed in shared memory, so they are not copied to each process.
+Each worker returns positions of the highest rows of its years, which
+are merged into the same tables find_5_highest returns. When only one
+process is used or the pool can't be started the tables are found
+in the current process.
+
+This file contains the following functions:
+
+    * partition_years - returns boundaries of partitions of rows sorted by year
+    * find_highest_tables - returns tables with the highest values of each year
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+
+
+def partition_years(sorted_years: np.ndarray, partitions: int) -> List[Tuple[int, int]]:
+    """Function which splits rows sorted by year into partitions with
+    similar numbers of rows, so that rows of each year are in one partition
+
+    :param sorted_years: Years of rows sorted by year
+    :type sorted_years: np.ndarray
+    :param partitions: Maximal number of partitions
+    :type partitions: int
+    :return: Start and end of each partition
+    :rtype: List[Tuple[int, int]]
+    """
+    # Positions where each year starts
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_years)) + 1])
+    targets = np.linspace(0, len(sorted_years), partitions + 1)[1:-1]
+    bounds = np.unique(np.concatenate(
+        [[0], starts[np.searchsorted(starts, targets)
+                     .clip(max=len(starts) - 1)], [len(sorted_years)]]))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _attach(specs: Dict[str, tuple]) -> Tuple[list, Dict[str, np.ndarray]]:
+    """Function which opens shared memory blocks as numpy arrays
+
+    :param specs: Name of the block, shape and type of each array
+    :type specs: Dict[str, tuple]
+    :return: Opened blocks (which need to be closed) and arrays
+    :rtype: Tuple[list, Dict[str, np.ndarray]]
+    """
+    blocks, arrays = [], {}
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _select_highest(arrays: Dict[str, np.ndarray], start: int, stop: int,
+                    sort_columns: List[str], k: int) -> List[tuple]:
+    """Function which finds k rows with the highest values of each year from one partition
+
+    :param arrays: Arrays with data, 'order' holds positions of rows sorted by year
+    and 'Year' years of the rows
+    :type arrays: Dict[str, np.ndarray]
+    :param start: Start of the partition in 'order'
+    :type start: int
+    :param stop: End of the partition in 'order'
+    :type stop: int
+    :param sort_columns: Columns based on which the rows are chosen
+    :type sort_columns: List[str]
+    :param k: Number of rows chosen for each year
+    :type k: int
+    :return: Positions of the chosen rows and their ranks for each sort column
+    :rtype: List[tuple]
+    """
+    positions = arrays["order"][start:stop]
+    years = arrays["Year"][positions]
+    results = []
+    for column in sort_columns:
+        values = arrays[column][positions]
+        present = ~np.isnan(values)
+        chosen, chosen_years = positions[present], years[present]
+        # Sort by year and then by descending value, stable sort keeps
+        # the order of equal values the same as find_5_highest does
+        order = np.lexsort((-values[present], chosen_years))
+        chosen, chosen_years = chosen[order], chosen_years[order]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(chosen_years)) + 1])
+        ranks = np.arange(len(chosen)) - np.repeat(
+            starts, np.diff(np.concatenate([starts, [len(chosen)]])))
+        results.append((chosen[ranks < k], ranks[ranks < k]))
+    return results
+
+
+def _find_partition_highest(specs: Dict[str, tuple], start: int, stop: int,
+                            sort_columns: List[str], k: int) -> List[tuple]:
+    """Function run by the workers which opens the shared arrays and finds
+    k rows with the highest values of each year from one partition
+
+    :param specs: Shared memory arrays (see _attach)
+    :type specs: Dict[str, tuple]
+    :param start: Start of the partition
+    :type start: int
+    :param stop: End of the partition
+    :type stop: int
+    :param sort_columns: Columns based on which the rows are chosen
+    :type sort_columns: List[str]
+    :param k: Number of rows chosen for each year
+    :type k: int
+    :return: Positions of the chosen rows and their ranks for each sort column
+    :rtype: List[tuple]
+    """
+    blocks, arrays = _attach(specs)
+    try:
+        return _select_highest(arrays, start, stop, sort_columns, k)
+    finally:
+        # Arrays need to be released before the blocks are closed
+        del arrays
+        for block in blocks:
+            block.close()
+
+
+def _share(array: np.ndarray, blocks: list) -> tuple:
+    """Function which copies an array to a new shared memory block
+
+    :param array: Array to copy
+    :type array: np.ndarray
+    :param blocks: List to which the new block is added
+    :type blocks: list
+    :return: Name of the block, shape and type of the array
+    :rtype: tuple
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block.name, array.shape, array.dtype.str
+
+
+def find_highest_tables(data_processed: pd.DataFrame, tables: List[Tuple[dict, str]],
+                        processes: int = 1, k: int = 5) -> List[pd.DataFrame]:
+    """Function which finds countries with the highest values of each year
+    for many tables at once on a pool of processes
+
+    :param data_processed: Processed pandas DataFrame with per capita data
+    :type data_processed: pd.DataFrame
+    :param tables: Column names and the sort column of each table (the same
+    as arguments of analyze_data.find_5_highest)
+    :type tables: List[Tuple[dict, str]]
+    :param processes: Number of processes, with 1 the tables are found
+    in the current process, defaults to 1
+    :type processes: int, optional
+    :param k: Number of countries chosen for each year, defaults to 5
+    :type k: int, optional
+    :return: Tables with countries with the highest values, the same
+    as find_5_highest returns
+    :rtype: List[pd.DataFrame]
+    """
+    years = data_processed["Year"].to_numpy(dtype=np.int64)
+    if processes <= 1 or len(np.unique(years)) < 2:
+        return [analyze_data.find_5_highest(data_processed, column_names, sort_by, k)
+                for column_names, sort_by in tables]
+
+    sort_columns = list(dict.fromkeys(sort_by for _, sort_by in tables))
+    order = np.argsort(years, kind='stable')
+    blocks = []
+    try:
+        specs = {"order": _share(order, blocks), "Year": _share(years, blocks)}
+        for column in sort_columns:
+            specs[column] = _share(data_processed[column].to_numpy(dtype=np.float64), blocks)
+        # A few partitions for each process even the load when years differ in size
+        partitions = partition_years(years[order], processes * 4)
+        with ProcessPoolExecutor(max_workers=processes,
+                                 mp_context=multiprocessing.get_context()) as executor:
+            results = list(executor.map(
+                _find_partition_highest, *zip(*[(specs, start, stop, sort_columns, k)
+                                                for start, stop in partitions])))
+    except (OSError, BrokenProcessPool):
+        print("Processes could not be started, the data will be analyzed in one process.")
+        return find_highest_tables(data_processed, tables, processes=1, k=k)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    year_index = pd.Index(set(data_processed["Year"]))
+    highest_tables = []
+    for column_names, sort_by in tables:
+        column = sort_columns.index(sort_by)
+        positions = np.concatenate([result[column][0] for result in results])
+        ranks = np.concatenate([result[column][1] for result in results])
+        highest_tables.append(analyze_data.fill_highest_table(
+            data_processed.iloc[positions], ranks, year_index, column_names, k))
+    return highest_tables
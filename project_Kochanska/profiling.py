@@ -0,0 +1,150 @@
+"""Profiling
+
+This script measures the stages of the analysis: wall time, CPU time,
+peak memory traced by tracemalloc and the number of input and output rows.
+Stages are measured only after enable_profiling is called, otherwise
+profile_stage simply calls the function, so the measurements cost nothing
+when they are disabled. It can also be used by the library users:
+
+    profiling.enable_profiling()
+    data = profiling.profile_stage("read_gdp", read_data.read_file_to_df, "gdp.csv")
+    records = profiling.disable_profiling()
+
+This file contains the following functions:
+
+    * enable_profiling - starts measuring the stages
+    * disable_profiling - stops measuring the stages and returns the measurements
+    * is_enabled - returns whether the stages are measured
+    * profile_stage - runs the function and measures it as a stage
+    * count_rows - returns the number of rows of the data
+    * write_report - saves the measurements to a json file or prints them
+"""
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional
+
+# Measurements of the stages or None when profiling is disabled
+_records: Optional[List[dict]] = None
+
+
+def enable_profiling():
+    """Function which starts measuring the stages and removes previous measurements
+    """
+    global _records
+    _records = []
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable_profiling() -> List[dict]:
+    """Function which stops measuring the stages
+
+    :return: Measurements of the stages since enable_profiling was called
+    :rtype: List[dict]
+    """
+    global _records
+    records = _records or []
+    _records = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return records
+
+
+def is_enabled() -> bool:
+    """Function which checks whether the stages are measured
+
+    :return: True if profiling is enabled
+    :rtype: bool
+    """
+    return _records is not None
+
+
+def count_rows(data: Any) -> Optional[int]:
+    """Function which counts rows of the data. For tuples and lists
+    rows of all of the DataFrame's (or arrays) in them are added
+
+    :param data: DataFrame, array, tuple or list of them
+    :type data: Any
+    :return: Number of rows or None if data contains no tables
+    :rtype: Optional[int]
+    """
+    shape = getattr(data, "shape", None)
+    if shape:
+        return int(shape[0])
+    if isinstance(data, (tuple, list)):
+        counts = [count_rows(element) for element in data]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+def profile_stage(name: str, function: Callable, *args, **kwargs) -> Any:
+    """Function which runs the function and, if profiling is enabled,
+    saves its measurements as a stage of the analysis
+
+    :param name: Name of the stage
+    :type name: str
+    :param function: Function which is run
+    :type function: Callable
+    :return: The result of the function
+    :rtype: Any
+    """
+    if _records is None:
+        return function(*args, **kwargs)
+
+    start_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    wall_time = time.perf_counter() - start
+    cpu_time = time.process_time() - start_cpu
+    peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+    _records.append({"stage": name,
+                     "wall_time": wall_time,
+                     "cpu_time": cpu_time,
+                     "peak_memory": peak_memory,
+                     "rows_in": count_rows(list(args) + list(kwargs.values())),
+                     "rows_out": count_rows(result)})
+    return result
+
+
+def _show_rows(rows: Optional[int]) -> str:
+    """Function which formats the number of rows for the printed report
+
+    :param rows: Number of rows or None
+    :type rows: Optional[int]
+    :return: Formatted number of rows
+    :rtype: str
+    """
+    return "-" if rows is None else str(rows)
+
+
+def write_report(records: List[dict], file_path: str = "-"):
+    """Function which saves the measurements to a json file
+    or prints them to the standard error
+
+    :param records: Measurements of the stages (see disable_profiling)
+    :type records: List[dict]
+    :param file_path: Name of json file, '-' means the standard error, defaults to "-"
+    :type file_path: str, optional
+    """
+    report = {"stages": records,
+              "total_wall_time": sum(record["wall_time"] for record in records),
+              "total_cpu_time": sum(record["cpu_time"] for record in records)}
+    if file_path != "-":
+        with open(file_path, 'w', encoding='UTF-8') as file:
+            json.dump(report, file, indent=2)
+        return
+
+    lines = [f"{'Stage':<25} {'Wall [s]':>9} {'CPU [s]':>9} {'Peak [MB]':>10} "
+             f"{'Rows in':>9} {'Rows out':>9}"]
+    for record in records:
+        lines.append(f"{record['stage']:<25} {record['wall_time']:>9.4f} "
+                     f"{record['cpu_time']:>9.4f} {record['peak_memory'] / 1024 ** 2:>10.1f} "
+                     f"{_show_rows(record['rows_in']):>9} {_show_rows(record['rows_out']):>9}")
+    lines.append(f"{'Total':<25} {report['total_wall_time']:>9.4f} "
+                 f"{report['total_cpu_time']:>9.4f}")
+    print("\n".join(lines), file=sys.stderr)
@@ -1,37 +1,65 @@
 """Program
 
 This script analyzes the data in the provided files and returns the results
-of them in the form of joined csv file.
+of them in the form of joined csv file (or json, jsonl and npz files).
 
 This script requires that `pandas` be installed within the Python
 environment this script is being used in.
 
-This file can also be imported as a module and contains one function:
-    * main - the main function of the script which calls other modules
+Modules which require `pandas` are imported only after the command line
+arguments are checked, so that help and argument errors are shown quickly.
+
+This file can also be imported as a module and contains the following functions:
+    * get_arguments - returns checked command line arguments
+    * check_input_name - checks if the input is a (compressed) csv file, directory or glob
+    * check_output_name - returns correct name of output file
+    * read_queries - returns queries read from the batch file
+    * main - the main function of the script which reports errors in the data
+    * run - runs the analysis chosen by the command line arguments
+    * run_analysis - runs the analysis with checked command line arguments
+    * run_streaming - analyzes the emission file read in chunks and saves the results
+    * run_queries - analyzes and saves results of the batch mode queries
+    * report_peak_memory - prints peak memory usage of the program
+    * save_analysis - finds changes in CO2 emission and saves all of the results
+    * write_changes - saves changes in CO2 emission of all of the countries
+    * write_results - saves all of the results
 
 """
 import argparse
+import contextlib
+import os
 import sys
-import project_Kochanska.analyze_data as analyze_data
-import project_Kochanska.read_data as read_data
+from typing import TYPE_CHECKING, List, Optional, TextIO
+from project_Kochanska.errors import DataError
+from project_Kochanska.writers import WRITERS, atomic_open
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def main():
-    """Function which joins all parts of the analysis
-    of the emission, gdp and population data.
-    It starts with accepting command line arguments
-    and ends with saving obtained results to a csv file
+
+def get_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Function which reads and checks command line arguments
+
+    :param argv: Command line arguments, defaults to None (sys.argv is used)
+    :type argv: Optional[List[str]], optional
+    :return: Checked command line arguments
+    :rtype: argparse.Namespace
     """
     parser = argparse.ArgumentParser(prog='NYPD final project 2022/23',
                                      description='Program to analyze gdp, '\
                                          'population and co2 emission data',
                                      epilog="Zofia Kochanska, zk406116@students.mimuw.edu.pl")
     parser.add_argument('-gdp', '--gdp_file', action='store', dest='gdp',
-                        help='Name of the file with gdp data in csv format', required=True)
+                        help='Name of the file with gdp data in csv format (also .gz, .bz2, .xz '\
+                            'or .zip), a directory or a glob pattern of csv shards', required=True)
     parser.add_argument('-pop', '--populations_file', action='store', dest='populations',
-                        help='Name of the file with population data in csv format', required=True)
+                        help='Name of the file with population data in csv format (also .gz, '\
+                            '.bz2, .xz or .zip), a directory or a glob pattern of csv shards',
+                        required=True)
     parser.add_argument('-co2', '--co2_file', action='store', dest='co2',
-                        help='Name of the input file with the message in csv format', required=True)
+                        help='Name of the input file with the message in csv format (also .gz, '\
+                            '.bz2, .xz or .zip), a directory or a glob pattern of csv shards',
+                        required=True)
     parser.add_argument('-y1', '--start_year', action='store', dest='y1', type=int,
                         help='Start of date range for the analysis. ' \
                             'If none provided first common year will be used')
@@ -39,13 +67,93 @@ def main():
                         help='End of date range for the analysis. '\
                             'If none provided last common year will be used')
     parser.add_argument('-f', '--output_file', dest='out', default='results.csv',
-                        help='Name of output csv file to which results will be written. '\
+                        help='Name of output file to which results will be written, '\
+                            '"-" writes them to the standard output. '\
                             'Defaults to "results.csv"')
-    args = parser.parse_args()
+    parser.add_argument('--format', dest='format', choices=list(WRITERS),
+                        default='csv',
+                        help='Format of output file: csv tables with titles, one json '\
+                            'document, json object for each row or numpy archive with '\
+                            'an array for each column. Defaults to %(default)s')
+    parser.add_argument('--changes_file', dest='changes_out',
+                        help='Name of csv file to which changes in CO2 emission per capita '\
+                            'of all of the countries will be written')
+    parser.add_argument('--window', dest='window', type=int,
+                        help='Also find countries with biggest changes in CO2 emission per capita '\
+                            'in every window of the given number of consecutive years')
+    parser.add_argument('--countries_file', dest='countries_file',
+                        help='Name of csv (two columns with a header line) or json file with '\
+                            'incorrect country names and their correct counterparts, '\
+                            'which extend the built-in ones')
+    parser.add_argument('--match_countries', dest='match_countries',
+                        choices=['propose', 'apply'],
+                        help='Match names of countries missing from some of the files with '\
+                            'similar names from the other files and print them ("propose") '\
+                            'or also use them in the analysis ("apply")')
+    parser.add_argument('--countries_mapping', dest='countries_mapping',
+                        help='Name of json file in which matched country names are saved, '\
+                            'so that later runs only look them up and match only new names. '\
+                            'Only applied matches are saved. Defaults to "countries.json" '\
+                            'in the cache directory (not used with --no_cache)')
+    parser.add_argument('--index', action='store_true', dest='index',
+                        help='Use (and create if needed) year index of the co2 file '\
+                            'to read only rows from the chosen years. '\
+                            'It can only be used together with --no_cache')
+    parser.add_argument('--workers', dest='workers', type=int, default=3,
+                        help='Number of threads reading the input files at the same time. '\
+                            'Use 1 to read them one after another. Defaults to %(default)s')
+    parser.add_argument('--processes', dest='processes', type=int, default=1,
+                        help='Number of processes finding countries with the highest values, '\
+                            'each of them analyzes some of the years. Defaults to %(default)s')
+    parser.add_argument('--chunk_size', dest='chunk_size', type=int,
+                        help='Read the emission file (sorted by year) in chunks with the given '\
+                            'number of rows, so that memory usage does not depend on its length. '\
+                            'The cache is not used')
+    parser.add_argument('--store', dest='store',
+                        help='Directory of the columnar store created from the input files '\
+                            'with the import command, which is read instead of them')
+    parser.add_argument('--no_cache', action='store_true', dest='no_cache',
+                        help='Do not use the cache of cleaned and joined data, which is '\
+                            'used by default (also not used with --store)')
+    parser.add_argument('--clear_cache', action='store_true', dest='clear_cache',
+                        help='Remove all of the entries from the cache before the analysis')
+    parser.add_argument('--cache_dir', dest='cache_dir',
+                        help='Directory of the cache. Entries are pickle files, only the ones '\
+                            'owned by the current user are loaded. '\
+                            'Defaults to "~/.cache/project_Kochanska"')
+    parser.add_argument('--cache_size', dest='cache_size', type=int, default=256,
+                        help='Maximal size of the cache in MB. Defaults to %(default)s')
+    parser.add_argument('--compact', action='store_true', dest='compact',
+                        help='Store joined data with smaller types of columns '\
+                            '(categorical countries, int16 years and int32 measures)')
+    parser.add_argument('--float32', action='store_true', dest='float32',
+                        help='Together with --compact store floating point measures as float32')
+    parser.add_argument('--engine', dest='engine', choices=['pandas', 'matrix'],
+                        default='pandas',
+                        help='Engine cleaning and joining the data, "matrix" joins '\
+                            'country x year matrices instead of merging on country names. '\
+                            'Defaults to %(default)s')
+    parser.add_argument('--memory', action='store_true', dest='memory',
+                        help='Print peak memory usage of the program at the end')
+    parser.add_argument('--profile', dest='profile', nargs='?', const='-',
+                        help='Measure wall time, CPU time, peak memory and numbers of rows '\
+                            'of each stage of the analysis and save them to the given json '\
+                            'file (or print them to the standard error if no file is given)')
+    parser.add_argument('--incremental', dest='incremental',
+                        help='Name of state file with results of each year. Only years with '\
+                            'new or changed data are analyzed again')
+    parser.add_argument('--watch', dest='watch', type=float,
+                        help='Together with --incremental check the input files every given '\
+                            'number of seconds and update the results when they change')
+    parser.add_argument('--batch', dest='batch',
+                        help='Name of file with queries (start year, end year and output file '\
+                            'in each line). All of them are analyzed after loading data once, '\
+                            'y1, y2 and f arguments are ignored')
+    args = parser.parse_args(argv)
 
-    if not args.co2.endswith(".csv") \
-            or not args.gdp.endswith(".csv") \
-            or not args.populations.endswith(".csv"):
+    if not check_input_name(args.co2) \
+            or not check_input_name(args.gdp) \
+            or not check_input_name(args.populations):
         print("Error, all of the input files need to be in csv format (see help; -h).")
         sys.exit(-1)
 
@@ -54,48 +162,389 @@ def main():
             print("Error value for y1 variable needs to be smaller than  or equal y2 variable")
             sys.exit(-1)
     if args.out:
-        if args.out.count(".") != 1:
-            args.out = args.out.split(".")[0] + ".csv"
-            print(
-                f"Output file name seems to be incorrect. It will be replaced with {args.out}")
-        if not args.out.endswith(".csv"):
-            args.out = args.out.split(".")[0] + ".csv"
-            print(
-                f"Name of output file needs to end with .csv. It will be replaced with {args.out}")
-
-    # Read files to Dataframe's
-    co2 = read_data.read_file_to_df(args.co2, skip=False)
-    populations = read_data.read_file_to_df(args.populations)
-    gdp = read_data.read_file_to_df(args.gdp)
-
-    # Check given data
-    gdp_subset, populations_subset, co2_subset, common_years = read_data.check_data(
-        gdp, populations, co2, [args.y1, args.y2])
-
-    # Join separate Dataframe's
-    joined_data = read_data.join_data(
-        gdp_subset, populations_subset, co2_subset, common_years)
-
-    # Get per capita values
-    data_processed = analyze_data.get_per_capita(joined_data)
-
-    # Find countries with 5 highest values for:
-    # Emission
-    emission = analyze_data.find_5_highest(data_processed=data_processed,
-                                           column_names={"Country": "Country Name",
-                                                         "Total emission": "Total including bunker",
-                                                         "Emission per capita":
-                                                            'Total and bunker per capita'},
-                                           sort_by='Total and bunker per capita' )
-    # GDP
-    gdp = analyze_data.find_5_highest(data_processed=data_processed,
-                                      column_names={"Country": "Country Name",
-                                                    "GDP": "GDP",
-                                                    "GDP per capita": "GDP per capita"},
-                                      sort_by="GDP per capita")
-
-    # Identify countries with biggest changes in CO2 emission
-    changes, years = analyze_data.find_co2_changes(data_processed=data_processed)
+        args.out = check_output_name(args.out, args.format)
+    args.queries = read_queries(args.batch, args.format) if args.batch else None
+    if args.workers < 1 or args.processes < 1:
+        print("Error, number of workers and processes needs to be at least 1")
+        sys.exit(-1)
+    if args.watch is not None and not args.incremental:
+        print("Error, --watch can only be used together with --incremental")
+        sys.exit(-1)
+    if args.index and not args.no_cache:
+        print("Error, --index can only be used together with --no_cache")
+        sys.exit(-1)
+    if args.chunk_size is not None and (args.chunk_size < 1 or args.batch or args.incremental):
+        print("Error, --chunk_size needs to be at least 1 and can't be used together "
+              "with --batch or --incremental")
+        sys.exit(-1)
+    if args.window is not None and (args.window < 2 or args.chunk_size or args.incremental):
+        print("Error, --window needs to be at least 2 and can't be used together "
+              "with --chunk_size or --incremental")
+        sys.exit(-1)
+    if args.match_countries and (args.chunk_size or args.incremental):
+        print("Error, --match_countries can't be used together with --chunk_size "
+              "or --incremental")
+        sys.exit(-1)
+    if args.incremental and args.out == "-":
+        print("Error, --incremental can't write the results to the standard output")
+        sys.exit(-1)
+    return args
+
+
+def check_input_name(file_path: str) -> bool:
+    """Function which checks if the input is a csv file (which may be compressed
+    with gzip, bzip2 or xz), a zip archive or its member given as 'archive.zip:member.csv',
+    a directory or a glob pattern (their shards are checked when they are read)
+
+    :param file_path: Name of input file, directory or glob pattern
+    :type file_path: str
+    :return: Whether the input can be read
+    :rtype: bool
+    """
+    return file_path.endswith((".csv", ".csv.gz", ".csv.bz2", ".csv.xz", ".zip")) \
+        or ".zip:" in file_path or os.path.isdir(file_path) \
+        or any(character in file_path for character in "*?[")
+
+
+def check_output_name(out: str, output_format: str = "csv") -> str:
+    """Function which makes sure that the name of output file ends with
+    the extension of the output format. '-' (the standard output) is not changed
+
+    :param out: Name of output file
+    :type out: str
+    :param output_format: Format of output file, defaults to "csv"
+    :type output_format: str, optional
+    :return: Correct name of output file
+    :rtype: str
+    """
+    if out == "-":
+        return out
+    extension = "." + output_format
+    if out.count(".") != 1:
+        out = out.split(".")[0] + extension
+        print(
+            f"Output file name seems to be incorrect. It will be replaced with {out}")
+    if not out.endswith(extension):
+        out = out.split(".")[0] + extension
+        print(
+            f"Name of output file needs to end with {extension}. It will be replaced with {out}")
+    return out
+
+
+def read_queries(file_path: str, output_format: str = "csv") -> List[tuple]:
+    """Function which reads the file with queries for the batch mode.
+    Each line contains start year, end year and the name of output file
+    separated by whitespace. Use '-' instead of a year to choose
+    the first or last common year. Empty lines and lines starting
+    with '#' are skipped
+
+    :param file_path: Path to the file with queries
+    :type file_path: str
+    :param output_format: Format of output files, defaults to "csv"
+    :type output_format: str, optional
+    :return: List of (start year, end year, output file) tuples
+    :rtype: List[tuple]
+    """
+    try:
+        with open(file_path, 'r', encoding='UTF-8') as file:
+            lines = file.readlines()
+    except FileNotFoundError as error:
+        raise DataError("File not found.") from error
+    queries = []
+    for number, line in enumerate(lines, start=1):
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        try:
+            if len(fields) != 3:
+                raise ValueError
+            years = [None if field == "-" else int(field) for field in fields[:2]]
+        except ValueError as error:
+            raise DataError(f"Error, incorrect query in line {number} of the batch file") \
+                from error
+        if years[0] is not None and years[1] is not None and years[0] > years[1]:
+            raise DataError(f"Error, start year needs to be smaller than or equal end year "
+                            f"in line {number} of the batch file")
+        queries.append((years[0], years[1], check_output_name(fields[2], output_format)))
+    if not queries:
+        raise DataError("Error, the batch file contains no queries")
+    return queries
+
+
+def main(argv: Optional[List[str]] = None):
+    """Function which joins all parts of the analysis
+    of the emission, gdp and population data.
+    It starts with accepting command line arguments
+    and ends with saving obtained results to a csv file.
+    Errors in the data are printed and the program exits with code -1
+
+    :param argv: Command line arguments, defaults to None (sys.argv is used)
+    :type argv: Optional[List[str]], optional
+    """
+    try:
+        run(argv)
+    except DataError as error:
+        print(error)
+        sys.exit(-1)
+
+
+def run(argv: Optional[List[str]] = None):
+    """Function which runs the analysis chosen by the command line arguments
+    with the help of AnalysisSession
+
+    :param argv: Command line arguments, defaults to None (sys.argv is used)
+    :type argv: Optional[List[str]], optional
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "serve":
+        import project_Kochanska.server as server
+        server.main(argv[1:])
+        return
+    if argv and argv[0] == "import":
+        import project_Kochanska.store as store
+        store.main(argv[1:])
+        return
+    args = get_arguments(argv)
+    outputs = [query[2] for query in args.queries] if args.queries else [args.out]
+    if "-" in outputs:
+        # Only the results are written to the standard output,
+        # other messages are printed to the standard error
+        stream = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            run_analysis(args, stream)
+    else:
+        run_analysis(args)
+
+
+def run_analysis(args: argparse.Namespace, stream: Optional[TextIO] = None):
+    """Function which runs the analysis with checked command line arguments
+
+    :param args: Checked command line arguments
+    :type args: argparse.Namespace
+    :param stream: Standard output to which results named '-' are written,
+    defaults to None (sys.stdout)
+    :type stream: Optional[TextIO], optional
+    """
+    # Heavy modules are imported only when the arguments are correct
+    import project_Kochanska.cache as cache
+    import project_Kochanska.profiling as profiling
+    from project_Kochanska.session import AnalysisSession
+
+    if args.profile:
+        profiling.enable_profiling()
+
+    try:
+        if args.incremental:
+            import project_Kochanska.incremental as incremental
+            if args.watch is not None:
+                incremental.watch(args)
+            else:
+                incremental.run(args)
+        elif args.chunk_size:
+            # Emission file is read in chunks, so the cache is not used
+            run_streaming(args, stream)
+        else:
+            if args.cache_dir is None:
+                args.cache_dir = cache.get_cache_dir()
+            if args.clear_cache:
+                cache.clear_cache(args.cache_dir)
+
+            if args.queries:
+                # Load data from all of the years used by the queries
+                first_years = [query[0] for query in args.queries]
+                last_years = [query[1] for query in args.queries]
+                args.y1 = None if None in first_years else min(first_years)
+                args.y2 = None if None in last_years else max(last_years)
+
+            # Read, check and join data or load it from the cache
+            # and find countries with 5 highest values for emission and gdp
+            session = AnalysisSession.from_arguments(args)
+            emission = session.highest("emission", args.y1, args.y2)
+            gdp = session.highest("gdp", args.y1, args.y2)
+
+            if not args.queries:
+                # Identify countries with biggest changes in CO2 emission
+                changes, years = session.co2_changes(args.y1, args.y2)
+                if args.changes_out and years is not None:
+                    write_changes(args.changes_out, session.all_co2_changes(args.y1, args.y2))
+                windows = session.window_changes(args.window, args.y1, args.y2) \
+                    if args.window else None
+                write_results(args.out, emission, gdp, changes, years, args.format, stream,
+                              windows=windows, window=args.window)
+            else:
+                run_queries(args.queries, session.per_capita(args.y1, args.y2), emission, gdp,
+                            args.format, stream, window=args.window)
+    finally:
+        # Reports are written also when the analysis is interrupted or fails
+        if args.memory:
+            report_peak_memory()
+        if args.profile:
+            profiling.write_report(profiling.disable_profiling(), args.profile)
+
+
+def run_streaming(args: argparse.Namespace, stream: Optional[TextIO] = None):
+    """Function which analyzes the emission file read in chunks (see streaming.py)
+    and saves the results
+
+    :param args: Checked command line arguments
+    :type args: argparse.Namespace
+    :param stream: Standard output used for '-', defaults to None (sys.stdout)
+    :type stream: Optional[TextIO], optional
+    """
+    import project_Kochanska.read_data as read_data
+    import project_Kochanska.streaming as streaming
+    from project_Kochanska.profiling import profile_stage
+
+    countries_dict = dict(read_data.COUNTRIES_DICT)
+    if args.countries_file:
+        countries_dict.update(read_data.load_countries_dict(args.countries_file))
+    highest, changes, years, changes_table = profile_stage(
+        "analyze_stream", streaming.analyze_stream, args.gdp, args.populations, args.co2,
+        [args.y1, args.y2], args.chunk_size, countries_dict, workers=args.workers)
+    if args.changes_out and changes_table is not None:
+        write_changes(args.changes_out, changes_table)
+    write_results(args.out, highest["emission"], highest["gdp"], changes, years,
+                  args.format, stream)
+
+
+def run_queries(queries: List[tuple], data_processed: "pd.DataFrame",
+                emission: "pd.DataFrame", gdp: "pd.DataFrame", output_format: str = "csv",
+                stream: Optional[TextIO] = None, window: Optional[int] = None):
+    """Function which analyzes and saves results for each query of the batch mode
+
+    :param queries: List of (start year, end year, output file) tuples
+    :type queries: List[tuple]
+    :param data_processed: Processed DataFrame with data from all of the queried years
+    :type data_processed: pd.DataFrame
+    :param emission: Countries with highest emission per capita in all of the years
+    :type emission: pd.DataFrame
+    :param gdp: Countries with highest gdp per capita in all of the years
+    :type gdp: pd.DataFrame
+    :param output_format: Format of output files, defaults to "csv"
+    :type output_format: str, optional
+    :param stream: Standard output used for '-', defaults to None (sys.stdout)
+    :type stream: Optional[TextIO], optional
+    :param window: Number of years of windows in which changes in CO2 emission
+    are also found, defaults to None (no windows)
+    :type window: Optional[int], optional
+    """
+    import project_Kochanska.analyze_data as analyze_data
+
+    # Highest values are found for each year separately, so the tables
+    # for all of the years are shared by the queries
+    for first, last, out in queries:
+        years = [year for year in set(data_processed["Year"])
+                 if (first is None or year >= first) and (last is None or year <= last)]
+        if not years:
+            print(f"Error, provided files have no data for years {first}-{last}. "
+                  f"{out} will not be created")
+            continue
+        query_data = data_processed[data_processed["Year"].isin(years)]
+        save_analysis(query_data, analyze_data.select_table_years(emission, years),
+                      analyze_data.select_table_years(gdp, years), out, None,
+                      output_format, stream, window)
+
+
+def report_peak_memory():
+    """Function which prints peak memory usage (resident set size) of the program
+    """
+    try:
+        import resource
+    except ImportError:
+        print("Peak memory usage is not available on this system")
+        return
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    peak_mb = peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    print(f"Peak memory usage: {peak_mb:.1f} MB")
+
+
+def save_analysis(data_processed: "pd.DataFrame", emission: "pd.DataFrame",
+                  gdp: "pd.DataFrame", out: str, changes_out: Optional[str],
+                  output_format: str = "csv", stream: Optional[TextIO] = None,
+                  window: Optional[int] = None):
+    """Function which finds the biggest changes in CO2 emission
+    and saves all of the results to a file
+
+    :param data_processed: Processed DataFrame with per capita data
+    :type data_processed: pd.DataFrame
+    :param emission: Countries with highest emission per capita
+    :type emission: pd.DataFrame
+    :param gdp: Countries with highest gdp per capita
+    :type gdp: pd.DataFrame
+    :param out: Name of output csv file
+    :type out: str
+    :param changes_out: Name of csv file for changes in CO2 emission of all of the countries
+    :type changes_out: Optional[str]
+    :param output_format: Format of output file, defaults to "csv"
+    :type output_format: str, optional
+    :param stream: Standard output used for '-', defaults to None (sys.stdout)
+    :type stream: Optional[TextIO], optional
+    :param window: Number of years of windows in which changes in CO2 emission
+    are also found, defaults to None (no windows)
+    :type window: Optional[int], optional
+    """
+    import project_Kochanska.analyze_data as analyze_data
+    from project_Kochanska.profiling import profile_stage
+
+    # Identify countries with biggest changes in CO2 emission, the table of changes
+    # of all of the countries is calculated once and also saved to changes_out
+    changes = None
+    years = analyze_data.get_boundary_years(set(data_processed["Year"]))
+    if years is not None:
+        changes_table = profile_stage("find_co2_changes", analyze_data.get_co2_changes,
+                                      data_processed, years)
+        changes = analyze_data.get_co2_extremes(changes_table)
+        if changes_out:
+            write_changes(changes_out, changes_table)
+
+    windows = profile_stage("window_changes", analyze_data.get_window_changes,
+                            data_processed, window) if window else None
+    write_results(out, emission, gdp, changes, years, output_format, stream,
+                  windows=windows, window=window)
+
+
+def write_changes(changes_out: str, changes_table: "pd.DataFrame"):
+    """Function which saves changes in CO2 emission of all of the countries to a csv file
+
+    :param changes_out: Name of csv file
+    :type changes_out: str
+    :param changes_table: Changes in CO2 emission (see analyze_data.get_co2_changes)
+    :type changes_table: pd.DataFrame
+    """
+    with atomic_open(changes_out) as file:
+        changes_table.to_csv(file, float_format='%.5f')
+
+
+def write_results(out: str, emission: "pd.DataFrame", gdp: "pd.DataFrame",
+                  changes: Optional["pd.DataFrame"], years: Optional[List[int]],
+                  output_format: str = "csv", stream: Optional[TextIO] = None,
+                  windows: Optional["pd.DataFrame"] = None, window: Optional[int] = None):
+    """Function which saves all of the results to a file
+
+    :param out: Name of output file, '-' means the standard output
+    :type out: str
+    :param emission: Countries with highest emission per capita
+    :type emission: pd.DataFrame
+    :param gdp: Countries with highest gdp per capita
+    :type gdp: pd.DataFrame
+    :param changes: Countries with biggest changes in CO2 emission
+    :type changes: Optional[pd.DataFrame]
+    :param years: Years between which the changes were calculated
+    :type years: Optional[List[int]]
+    :param output_format: Format of output file, defaults to "csv"
+    :type output_format: str, optional
+    :param stream: Standard output used for '-', defaults to None (sys.stdout)
+    :type stream: Optional[TextIO], optional
+    :param windows: Countries with biggest changes in CO2 emission in every window
+    of years, defaults to None
+    :type windows: Optional[pd.DataFrame], optional
+    :param window: Number of years of each window, defaults to None
+    :type window: Optional[int], optional
+    """
+    import project_Kochanska.analyze_data as analyze_data
+    from project_Kochanska.profiling import profile_stage
 
     if years is None:
         title= ""
@@ -104,10 +553,14 @@ def main():
             f"{years[0]} and {years[1]} \n"
 
     # Save Dataframe's to file
-    analyze_data.save_results(args.out, [emission, gdp, changes],
-                              ["5 countries with biggest CO2 emission per capita \n",
-                                  "5 countries with highest gdp per capita \n",
-                                  title])
+    profile_stage("save_results", analyze_data.save_results,
+                  out, [emission, gdp, changes, windows],
+                  ["5 countries with biggest CO2 emission per capita \n",
+                   "5 countries with highest gdp per capita \n",
+                   title,
+                   f"Countries with biggest changes in CO2 emission in windows of {window} "
+                   "years \n"], output_format, ["emission", "gdp", "changes", "windows"],
+                  stream)
 
 
 if __name__ == '__main__':
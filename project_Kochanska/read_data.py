@@ -1,57 +1,532 @@
 """Read data
 
 This script is used to read and clean provided files. As a result it
-returns one joined dataframe with all of the information.
+returns one joined dataframe with all of the information. When files
+can't be read or have no common data DataError is raised.
 
 This file contains the following functions:
 
     * read_file_to_df - returns pandas Dataframe
+    * expand_input - returns csv files of an input given as a directory or a glob pattern
+    * get_input_signature - returns paths, modification times and sizes of the files of an input
+    * read_error - returns DataError describing the error of pandas
+    * read_files - returns pandas Dataframe's read at the same time
+    * split_zip_member - returns path to the zip archive and name of its member
+    * find_data_member - returns name of the data file in the zip archive
+    * is_compressed - checks if the file needs to be decompressed
+    * open_input - opens csv file, compressed csv file or member of zip archive
+    * read_year_columns - returns Dataframe with only some of the year columns
+    * build_year_index - returns and saves byte ranges of each year in the file
+    * load_year_index - returns saved year index if it is up to date
+    * read_year_range - returns part of the file with only chosen years
+    * get_year_columns - returns names of the year columns
     * select_years - returns Dataframe's filtered to contain only some years
     * join_same_countries- return Dataframe's with merged rows when their
     content pertains the same year and country
+    * normalize_country_names - returns column with modified country names
+    * load_countries_dict - returns country names which should be changed read from a file
     * check_countries - returns Dataframe's with modified country names
     * check_data - returns cleaned up Dataframe's
+    * report_odd_countries - informs about countries missing from some of the files
     * join_data - returns joined Dataframe with all of the information
+    * compact_data - returns joined Dataframe with smaller types of columns
 """
-import sys
-from typing import Any
+import asyncio
+import bz2
+import contextlib
+import csv
+import glob
+import gzip
+import io
+import json
+import lzma
+import math
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Iterator, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
+from project_Kochanska.errors import DataError
 
 
-def read_file_to_df(file_path: str, skip: bool = True) -> pd.DataFrame:
+# Functions opening compressed csv files for each extension
+DECOMPRESSORS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+# Extensions of csv shards found in directories
+SHARD_EXTENSIONS = [".csv"] + [".csv" + extension for extension in DECOMPRESSORS] + [".zip"]
+# Errors raised when compressed files are damaged
+DECOMPRESSION_ERRORS = (zipfile.BadZipFile, gzip.BadGzipFile, lzma.LZMAError, EOFError)
+
+# Incorrect country names stored as keys and their correct counterparts stored as values
+COUNTRIES_DICT = {"Korea, Dem. People's Rep.": "DEMOCRATIC PEOPLE S REPUBLIC OF KOREA",
+                  "Korea, Rep.": 'REPUBLIC OF KOREA',
+                  "Vietnam": "VIET NAM",
+                  "Czechia": "CZECH REPUBLIC",
+                  "United States": "UNITED STATES OF AMERICA",
+                  "Cameroon": "REPUBLIC OF CAMEROON",
+                  "Slovak Republic": "SLOVAKIA",
+                  "Bosnia and Herzegovina": 'BOSNIA & HERZEGOVINA',
+                  "Venezuela, RB": 'VENEZUELA',
+                  "Egypt, Arab Rep.": 'EGYPT',
+                  "Lao PDR": 'LAO PEOPLE S DEMOCRATIC REPUBLIC',
+                  "Bahamas, The": 'BAHAMAS',
+                  "Hong Kong SAR, China": "HONG KONG SPECIAL ADMINSTRATIVE REGION OF CHINA",
+                  "Macao SAR, China": "MACAU SPECIAL ADMINSTRATIVE REGION OF CHINA",
+                  "Congo, Dem. Rep.": "DEMOCRATIC REPUBLIC OF THE CONGO (FORMERLY ZAIRE)",
+                  "Congo, Rep.": "CONGO",
+                  "China": 'CHINA',
+                  "Tanzania": 'UNITED REPUBLIC OF TANZANIA',
+                  "Gambia, The": "GAMBIA",
+                  "Timor-Leste": 'TIMOR-LESTE (FORMERLY EAST TIMOR)',
+                  "Kyrgyz Republic": 'KYRGYZSTAN',
+                  "Bolivia": 'PLURINATIONAL STATE OF BOLIVIA',
+                  "South Sudan": 'REPUBLIC OF SOUTH SUDAN',
+                  "Sudan": 'SUDAN',
+                  "Sao Tome and Principe": 'SAO TOME & PRINCIPE',
+                  "Yemen, Rep.": "YEMEN",
+                  "St. Lucia": 'SAINT LUCIA',
+                  "Turkiye": "TURKEY",
+                  "St. Kitts and Nevis": 'ST. KITTS-NEVIS',
+                  "Myanmar": 'MYANMAR (FORMERLY BURMA)',
+                  "Guinea-Bissau": 'GUINEA BISSAU',
+                  "Iran, Islamic Rep.": 'ISLAMIC REPUBLIC OF IRAN',
+                  "Cote d'Ivoire": 'COTE D IVOIRE',
+                  "Brunei Darussalam": 'BRUNEI (DARUSSALAM)',
+                  "St. Vincent and the Grenadines": 'ST. VINCENT & THE GRENADINES',
+                  "Micronesia, Fed. Sts.": 'FEDERATED STATES OF MICRONESIA',
+                  "Moldova": 'REPUBLIC OF MOLDOVA',
+                  "Antigua and Barbuda": 'ANTIGUA & BARBUDA',
+                  "Sint Maarten (Dutch part)": 'SAINT MARTIN (DUTCH PORTION)',
+                  "Cabo Verde": 'CAPE VERDE',
+                  "Faroe Islands": 'FAEROE ISLANDS',
+                  "Eswatini": 'SWAZILAND',
+                  "Palau": 'PACIFIC ISLANDS (PALAU)',
+                  "Monaco": "France",
+                  "San Marino": "Italy",
+                  "REPUBLIC OF SUDAN": "SUDAN",
+                  "TAIWAN": "CHINA",
+                  "CHINA (MAINLAND)": "CHINA",
+                  'FRANCE (INCLUDING MONACO)': "FRANCE",
+                  'ITALY (INCLUDING SAN MARINO)': "ITALY"}
+
+
+def read_file_to_df(file_path: str, skip: bool = True,
+                    years: Optional[list] = None) -> pd.DataFrame:
     """Function to read csv files to pandas DataFrames
 
     :param file_path: Path to csv input file
     :type file_path: str
     :param skip: Weather to skip first two non-empty lines (header), defaults to True
     :type skip: bool, optional
+    :param years: Boundary years of the analysis. If provided for files with header
+    lines only 'Country Name' and columns from those years are read and for files with
+    no header only rows from those years are read with the help of the year index
+    (see build_year_index), defaults to None
+    :type years: Optional[list], optional
     :return: Dataframe with loaded data
     :rtype: pd.DataFrame
     """
+    return read_files([(file_path, skip, years)], workers=1)[0]
+
+
+def expand_input(file_path: str) -> List[str]:
+    """Function which finds the csv files (shards) of an input given as a directory
+    or a glob pattern, other paths are returned unchanged. Directories may also contain
+    compressed csv files and zip archives (see open_input)
+
+    :param file_path: Path to csv file, directory with csv files or glob pattern
+    :type file_path: str
+    :return: Sorted paths to the shards of the input
+    :rtype: List[str]
+    """
+    if os.path.isdir(file_path):
+        shards = [shard for extension in SHARD_EXTENSIONS
+                  for shard in glob.glob(os.path.join(glob.escape(file_path), "*" + extension))]
+    elif any(character in file_path for character in "*?["):
+        shards = glob.glob(file_path)
+    else:
+        return [file_path]
+    if not shards:
+        raise DataError(f"Error, no csv files found in {file_path}")
+    return sorted(shards)
+
+
+def get_input_signature(file_path: str) -> List[dict]:
+    """Function which describes the files of an input, so that changes of them can be noticed
+
+    :param file_path: Path to csv file, directory with csv files or glob pattern
+    :type file_path: str
+    :return: Absolute path, modification time and size of each file
+    :rtype: List[dict]
+    """
+    signature = []
+    for shard in expand_input(file_path):
+        status = os.stat(split_zip_member(shard)[0])
+        signature.append({"path": os.path.abspath(shard), "mtime_ns": status.st_mtime_ns,
+                          "size": status.st_size})
+    return signature
+
+
+def split_zip_member(file_path: str) -> Tuple[str, Optional[str]]:
+    """Function which splits path to a member of zip archive written
+    as 'archive.zip:member.csv'
+
+    :param file_path: Path to input file
+    :type file_path: str
+    :return: Path to the file on the disk and name of the member of zip archive
+    (None if it is not given)
+    :rtype: Tuple[str, Optional[str]]
+    """
+    archive, separator, member = file_path.rpartition(".zip:")
+    if separator and member:
+        return archive + ".zip", member
+    return file_path, None
+
+
+def find_data_member(archive: zipfile.ZipFile, file_path: str) -> str:
+    """Function which chooses the data file from zip archive, World Bank archives
+    contain the 'API_*.csv' file together with 'Metadata_*.csv' files
+
+    :param archive: Opened zip archive
+    :type archive: zipfile.ZipFile
+    :param file_path: Path to zip archive
+    :type file_path: str
+    :return: Name of the data file
+    :rtype: str
+    """
+    members = [name for name in archive.namelist() if name.lower().endswith(".csv")]
+    chosen = [name for name in members if os.path.basename(name).startswith("API_")]
+    if not chosen:
+        chosen = [name for name in members if not os.path.basename(name).startswith("Metadata")]
+    if len(chosen) != 1:
+        raise DataError(f"Error, data file in {file_path} could not be chosen. "
+                        f"Name it as {file_path}:member.csv")
+    return chosen[0]
+
+
+def is_compressed(file_path: str) -> bool:
+    """Function which checks if the input file is compressed or is a member of zip archive
+
+    :param file_path: Path to input file
+    :type file_path: str
+    :return: Whether the file needs to be decompressed
+    :rtype: bool
+    """
+    path = split_zip_member(file_path)[0]
+    return path.endswith(".zip") or os.path.splitext(path)[1] in DECOMPRESSORS
+
+
+@contextlib.contextmanager
+def open_input(file_path: str) -> Iterator[Union[str, IO[bytes]]]:
+    """Function which opens csv file compressed with gzip, bzip2 or xz or member of zip
+    archive (given as 'archive.zip:member.csv' or chosen by find_data_member)
+    for reading without extracting it to the disk. Paths to other files are not changed
+
+    :param file_path: Path to input file
+    :type file_path: str
+    :return: Path to csv file or stream of decompressed data which pandas can read
+    :rtype: Iterator[Union[str, IO[bytes]]]
+    """
+    path, member = split_zip_member(file_path)
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            member = find_data_member(archive, path) if member is None else member
+            try:
+                source = archive.open(member)
+            except KeyError as error:
+                raise DataError(f"Error, {member} not found in {path}") from error
+            with source:
+                yield source
+    elif os.path.splitext(path)[1] in DECOMPRESSORS:
+        with DECOMPRESSORS[os.path.splitext(path)[1]](path, 'rb') as source:
+            yield source
+    else:
+        yield file_path
+
+
+def read_error(error: Exception, shard: Optional[str] = None) -> Exception:
+    """Function which changes errors raised while reading csv files to DataError
+
+    :param error: Error raised while reading the file
+    :type error: Exception
+    :param shard: Path to the shard which could not be read, None for inputs
+    which are single files, defaults to None
+    :type shard: Optional[str], optional
+    :return: DataError with the message about the file or the unchanged error
+    :rtype: Exception
+    """
+    if isinstance(error, FileNotFoundError):
+        message = "File not found."
+    elif isinstance(error, pd.errors.EmptyDataError):
+        message = "No data"
+    elif isinstance(error, pd.errors.ParserError):
+        message = "Parser error"
+    elif isinstance(error, DECOMPRESSION_ERRORS):
+        message = "Decompression error"
+    else:
+        return error
+    if shard is not None:
+        message = f"{message.rstrip('.')} in file {shard}"
+    return DataError(message)
+
+
+async def _read_shards(inputs: List[tuple], workers: int) -> List[list]:
+    """Function which schedules reading of all of the shards on a bounded pool of threads
+
+    :param inputs: Shards, skip and years arguments of read_file_to_df for each input
+    :type inputs: List[tuple]
+    :param workers: Number of threads parsing the shards
+    :type workers: int
+    :return: Dataframe's or raised errors of the shards of each input
+    :rtype: List[list]
+    """
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks = [[loop.run_in_executor(executor, _read_file, shard, skip, years)
+                  for shard in shards] for shards, skip, years in inputs]
+        return [await asyncio.gather(*shard_tasks, return_exceptions=True)
+                for shard_tasks in tasks]
+
+
+def _concat_shards(frames: List[pd.DataFrame], skip: bool) -> pd.DataFrame:
+    """Function which joins Dataframe's read from the shards of one input
+
+    :param frames: Dataframe's read from the shards
+    :type frames: List[pd.DataFrame]
+    :param skip: Whether the shards have header lines (and year columns)
+    :type skip: bool
+    :return: Dataframe with rows of all of the shards
+    :rtype: pd.DataFrame
+    """
+    # Shards with no rows (e.g. years outside of the chosen range) would change
+    # types of the columns to object
+    data_frame = pd.concat([frame for frame in frames if len(frame) > 0] or frames[:1],
+                           ignore_index=True)
+    if skip:
+        # Shards may have different years, their columns are kept in increasing order
+        year_columns = get_year_columns(data_frame)
+        other_columns = [column for column in data_frame.columns
+                         if column not in set(year_columns)]
+        data_frame = data_frame[other_columns + sorted(year_columns)]
+    return data_frame
+
+
+def read_files(files: List[tuple], workers: int = 3) -> List[pd.DataFrame]:
+    """Function to read many csv files at the same time on a pool of threads.
+    Inputs given as a directory or a glob pattern are split into shards (see
+    expand_input), all of the shards are read concurrently and joined once per input.
+    DataError is raised for the first file (in the given order) which could not be read
+
+    :param files: Path, skip and years arguments of read_file_to_df for each file
+    :type files: List[tuple]
+    :param workers: Number of threads, with 1 files are read one after another,
+    defaults to 3
+    :type workers: int, optional
+    :return: Dataframe's with loaded data in the same order as files
+    :rtype: List[pd.DataFrame]
+    """
+    inputs = [(expand_input(file[0]), *file[1:]) for file in files]
+    sharded = [shards != [file[0]] for (shards, *_), file in zip(inputs, files)]
+    shard_count = sum(len(shards) for shards, *_ in inputs)
+    coroutine = _read_shards(inputs, max(min(workers, shard_count), 1))
     try:
-        # Files with header lines
-        if skip:
-            data_frame = pd.read_csv(file_path, header=2, sep=",")
-            data_frame = data_frame.iloc[:, :-1]
-            year = list(data_frame.columns)
-            year[4:] = list(map(int, year[4:]))  # type: ignore
-            data_frame.columns = pd.Index(year)
-        # Files with no header
+        asyncio.get_running_loop()
+    except RuntimeError:
+        results = asyncio.run(coroutine)
+    else:
+        # An event loop is already running in this thread (e.g. in a notebook)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            results = executor.submit(asyncio.run, coroutine).result()
+
+    frames = []
+    for (shards, skip, _), is_sharded, shard_results in zip(inputs, sharded, results):
+        for shard, result in zip(shards, shard_results):
+            if isinstance(result, Exception):
+                error = read_error(result, shard if is_sharded else None)
+                if error is result:
+                    raise result
+                raise error from result
+        frames.append(_concat_shards(shard_results, skip) if is_sharded else shard_results[0])
+    return frames
+
+
+def _read_file(file_path: str, skip: bool = True,
+               years: Optional[list] = None) -> pd.DataFrame:
+    """Function which reads csv file to pandas DataFrame (see read_file_to_df)
+    and raises errors of pandas
+
+    :param file_path: Path to csv input file
+    :type file_path: str
+    :param skip: Weather to skip first two non-empty lines (header), defaults to True
+    :type skip: bool, optional
+    :param years: Boundary years of the analysis, defaults to None
+    :type years: Optional[list], optional
+    :return: Dataframe with loaded data
+    :rtype: pd.DataFrame
+    """
+    # Files with header lines
+    if skip and years is not None:
+        data_frame = read_year_columns(file_path, years)
+    elif skip:
+        with open_input(file_path) as source:
+            data_frame = pd.read_csv(source, header=2, sep=",")
+        data_frame = data_frame.iloc[:, :-1]
+        year = list(data_frame.columns)
+        year[4:] = list(map(int, year[4:]))  # type: ignore
+        data_frame.columns = pd.Index(year)
+    # Files with no header
+    else:
+        # Byte ranges of years can't be found in compressed files
+        use_index = years is not None and not is_compressed(file_path)
+        index = load_year_index(file_path) if use_index else None
+        if index is not None and index["sorted"]:
+            data_frame = pd.read_csv(io.BytesIO(read_year_range(file_path, index, years)),
+                                     sep=",")
         else:
-            data_frame = pd.read_csv(file_path, sep=",")
-            data_frame = data_frame.rename(columns={"Country": "Country Name"})
-    except FileNotFoundError:
-        print("File not found.")
-        sys.exit(-1)
-    except pd.errors.EmptyDataError:
-        print("No data")
-        sys.exit(-1)
-    except pd.errors.ParserError:
-        print("Parser error")
-        sys.exit(-1)
+            with open_input(file_path) as source:
+                data_frame = pd.read_csv(source, sep=",")
+            # Prepare the index for the next runs
+            if use_index and index is None:
+                build_year_index(file_path)
+        data_frame = data_frame.rename(columns={"Country": "Country Name"})
     return data_frame
 
 
+def read_year_columns(file_path: str, years: list) -> pd.DataFrame:
+    """Function which reads only 'Country Name' and columns from chosen years
+    from csv files with header lines
+
+    :param file_path: Path to csv input file with header lines
+    :type file_path: str
+    :param years: Boundary years, None means no boundary
+    :type years: list
+    :return: Dataframe with country names and data from chosen years
+    :rtype: pd.DataFrame
+    """
+    first = years[0] if years[0] is not None else -math.inf
+    last = years[1] if years[1] is not None else math.inf
+    # Read only the names of the columns first
+    with open_input(file_path) as source:
+        columns = pd.read_csv(source, header=2, sep=",", nrows=0).columns
+    year_columns = [column for column in columns
+                    if column.isdigit() and first <= int(column) <= last]
+    dtypes = {column: "float64" for column in year_columns}
+    dtypes["Country Name"] = "object"
+    with open_input(file_path) as source:
+        try:
+            data_frame = pd.read_csv(source, header=2, sep=",",
+                                     usecols=["Country Name"] + year_columns, dtype=dtypes)
+        except pd.errors.ParserError:
+            raise
+        except ValueError as error:
+            # Year columns are read as numbers, so other values can't be converted
+            raise DataError(f"Error, {file_path} contains values which are not numbers") \
+                from error
+    return data_frame.rename(columns={column: int(column) for column in year_columns})
+
+
+def build_year_index(file_path: str) -> dict:
+    """Function which finds the range of bytes occupied by each year in the
+    file with no header lines and saves it next to the file (with '.idx' suffix)
+
+    :param file_path: Path to csv file with 'Year' as the first column
+    :type file_path: str
+    :return: Index with the size and modification time of the file, information
+    whether the years are sorted and byte ranges of each year
+    :rtype: dict
+    """
+    status = os.stat(file_path)
+    year_ranges: dict[str, list] = {}
+    is_sorted = True
+    previous = None
+    with open(file_path, 'rb') as file:
+        header_end = len(file.readline())
+        offset = header_end
+        for line in file:
+            if line.strip():
+                try:
+                    year = int(line.split(b",", 1)[0])
+                except ValueError:
+                    is_sorted = False
+                    break
+                # Years have to be stored in non-decreasing order to read them as one range
+                if previous is not None and year < previous:
+                    is_sorted = False
+                    break
+                if year != previous:
+                    year_ranges[str(year)] = [offset, offset]
+                year_ranges[str(year)][1] = offset + len(line)
+                previous = year
+            offset += len(line)
+    index = {"size": status.st_size, "mtime": status.st_mtime_ns, "header": header_end,
+             "sorted": is_sorted, "years": year_ranges if is_sorted else {}}
+    try:
+        with open(file_path + ".idx", 'w', encoding='UTF-8') as file:
+            json.dump(index, file)
+    except OSError:
+        pass
+    return index
+
+
+def load_year_index(file_path: str) -> Optional[dict]:
+    """Function which loads the year index of the file if it exists
+    and still describes the current version of the file
+
+    :param file_path: Path to indexed csv file
+    :type file_path: str
+    :return: Year index or None if it is missing or stale
+    :rtype: Optional[dict]
+    """
+    status = os.stat(file_path)
+    try:
+        with open(file_path + ".idx", 'r', encoding='UTF-8') as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if index.get("size") != status.st_size or index.get("mtime") != status.st_mtime_ns:
+        return None
+    return index
+
+
+def read_year_range(file_path: str, index: dict, years: list) -> bytes:
+    """Function which reads the header and the rows from the chosen years
+    with the help of the year index
+
+    :param file_path: Path to indexed csv file
+    :type file_path: str
+    :param index: Year index of the file
+    :type index: dict
+    :param years: Boundary years, None means no boundary
+    :type years: list
+    :return: Content of the file with only the chosen years
+    :rtype: bytes
+    """
+    first = years[0] if years[0] is not None else -math.inf
+    last = years[1] if years[1] is not None else math.inf
+    ranges = [year_range for year, year_range in index["years"].items()
+              if first <= int(year) <= last]
+    with open(file_path, 'rb') as file:
+        content = file.read(index["header"])
+        if ranges:
+            start = min(year_range[0] for year_range in ranges)
+            end = max(year_range[1] for year_range in ranges)
+            file.seek(start)
+            content += file.read(end - start)
+    return content
+
+
+def get_year_columns(data: pd.DataFrame) -> list:
+    """Function which finds columns with data from each year in
+    Dataframe's read from files with header lines
+
+    :param data: Dataframe read from file with header lines
+    :type data: pd.DataFrame
+    :return: Names of year columns
+    :rtype: list
+    """
+    return [column for column in data.columns if isinstance(column, (int, np.integer))]
+
+
 def select_years(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame,
                  years: list) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, list]:
     """Function which looks for the chosen years in all of the dataframe's
@@ -69,11 +544,10 @@ def select_years(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame
     :rtype: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, list]
     """
     # Get list of all of the common years and sort it
-    common_years = list(set(gdp.columns[4:]).intersection(
-        co2["Year"], populations.columns[4:]))
+    common_years = list(set(get_year_columns(gdp)).intersection(
+        co2["Year"], get_year_columns(populations)))
     if len(common_years) == 0:
-        print("Error, provided files have no common years")
-        sys.exit(-1)
+        raise DataError("Error, provided files have no common years")
     # Select boundary years if they are not provided
     if years[0] is None:
         years[0] = min(common_years)  # type: ignore
@@ -83,8 +557,7 @@ def select_years(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame
     chosen_years = [year for year in common_years
                     if year >= years[0] and year <= years[1]] # type: ignore
     if len(chosen_years) == 0:
-        print("Error, provided files have no data for chosen years")
-        sys.exit(-1)
+        raise DataError("Error, provided files have no data for chosen years")
     # Subset the dataframe's
     gdp_subset = gdp[['Country Name']+chosen_years]
     populations_subset = populations[['Country Name']+chosen_years]
@@ -123,6 +596,62 @@ def join_same_countries(data: pd.DataFrame, data_type: int) -> pd.DataFrame:
     return new_data
 
 
+def normalize_country_names(names: pd.Series, countries_dict: dict,
+                            upper: bool = False) -> pd.Series:
+    """Function which changes country names according to the dictionary.
+    Each distinct name is looked up only once and the results are
+    mapped back to all of the rows
+
+    :param names: Column with country names
+    :type names: pd.Series
+    :param countries_dict: Dictionary with incorrect country names
+    stored as keys and their correct counterparts stored as values
+    :type countries_dict: dict
+    :param upper: Whether to also change the names to upper case, defaults to False
+    :type upper: bool, optional
+    :return: Column with changed country names
+    :rtype: pd.Series
+    """
+    codes, unique_names = pd.factorize(names)
+    new_names = [countries_dict.get(name, name) for name in unique_names]
+    if upper:
+        new_names = [name.upper() if isinstance(name, str) else name for name in new_names]
+    # Missing names have code -1, which points to the last element
+    new_names = np.array(new_names + [np.nan], dtype=object)
+    return pd.Series(new_names[codes], index=names.index, name=names.name)
+
+
+def load_countries_dict(file_path: str) -> dict:
+    """Function which reads country names which should be changed from a file.
+    It can be a csv file with a header line and two columns (incorrect
+    and correct name) or a json file with one object
+
+    :param file_path: Path to the file
+    :type file_path: str
+    :return: Dictionary with incorrect country names stored as keys and
+    their correct counterparts stored as values
+    :rtype: dict
+    """
+    try:
+        with open(file_path, 'r', encoding='UTF-8', newline='') as file:
+            if file_path.endswith(".json"):
+                countries_dict = json.load(file)
+            else:
+                rows = list(csv.reader(file))[1:]
+                if any(len(row) != 2 for row in rows if row):
+                    raise ValueError
+                countries_dict = {row[0]: row[1] for row in rows if row}
+    except FileNotFoundError as error:
+        raise DataError("File not found.") from error
+    except ValueError as error:
+        raise DataError("Error, file with country names needs to contain pairs of names") \
+            from error
+    if not isinstance(countries_dict, dict) or \
+            not all(isinstance(name, str) for name in countries_dict.values()):
+        raise DataError("Error, file with country names needs to contain pairs of names")
+    return countries_dict
+
+
 def check_countries(gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
                     co2_subset: pd.DataFrame, countries_dict: dict) -> tuple[
                         pd.DataFrame, pd.DataFrame, pd.DataFrame]:
@@ -143,16 +672,15 @@ def check_countries(gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
     :rtype: tuple[ pd.DataFrame, pd.DataFrame, pd.DataFrame]
     """
     # Change country names according to the provided dictionary
-    co2_subset = co2_subset.replace(
-        list(countries_dict.keys()), list(countries_dict.values()))  # type: ignore
-    populations_subset = populations_subset.replace(
-        list(countries_dict.keys()), list(countries_dict.values()))  # type: ignore
-    gdp_subset = gdp_subset.replace(
-        list(countries_dict.keys()), list(countries_dict.values()))  # type: ignore
+    co2_subset = co2_subset.assign(**{"Country Name": normalize_country_names(
+        co2_subset["Country Name"], countries_dict)})
+    populations_subset = populations_subset.assign(**{"Country Name": normalize_country_names(
+        populations_subset["Country Name"], countries_dict)})
+    gdp_subset = gdp_subset.assign(**{"Country Name": normalize_country_names(
+        gdp_subset["Country Name"], countries_dict)})
 
     if gdp_subset is None or co2_subset is None or populations_subset is None:
-        print("Error, provided files have no common countries")
-        sys.exit(-1)
+        raise DataError("Error, provided files have no common countries")
     # Merge data about the same countries
     co2_subset = join_same_countries(co2_subset, data_type=1)
     populations_subset = join_same_countries(populations_subset, data_type=0)
@@ -161,7 +689,9 @@ def check_countries(gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
 
 
 def check_data(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame,
-               years: list) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, list]:
+               years: list, report: bool = True,
+               countries_dict: Optional[dict] = None) -> tuple[
+                   pd.DataFrame, pd.DataFrame, pd.DataFrame, list]:
     """Function which joins the 'cleaning data' part of the program
 
     :param gdp: Dataframe with gdp information
@@ -172,79 +702,50 @@ def check_data(gdp: pd.DataFrame, populations: pd.DataFrame, co2: pd.DataFrame,
     :type co2: pd.DataFrame
     :param years: years which will be chosen
     :type years: list
+    :param report: Whether to inform about countries missing from some of the files,
+    defaults to True
+    :type report: bool, optional
+    :param countries_dict: Dictionary with incorrect country names stored as keys and
+    their correct counterparts stored as values, defaults to None (COUNTRIES_DICT is used)
+    :type countries_dict: Optional[dict], optional
     :return: Cleaned dataframe's and list of used years
     :rtype: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, list]
     """
-    countries_dict = {"Korea, Dem. People's Rep.": "DEMOCRATIC PEOPLE S REPUBLIC OF KOREA",
-                      "Korea, Rep.": 'REPUBLIC OF KOREA',
-                      "Vietnam": "VIET NAM",
-                      "Czechia": "CZECH REPUBLIC",
-                      "United States": "UNITED STATES OF AMERICA",
-                      "Cameroon": "REPUBLIC OF CAMEROON",
-                      "Slovak Republic": "SLOVAKIA",
-                      "Bosnia and Herzegovina": 'BOSNIA & HERZEGOVINA',
-                      "Venezuela, RB": 'VENEZUELA',
-                      "Egypt, Arab Rep.": 'EGYPT',
-                      "Lao PDR": 'LAO PEOPLE S DEMOCRATIC REPUBLIC',
-                      "Bahamas, The": 'BAHAMAS',
-                      "Hong Kong SAR, China": "HONG KONG SPECIAL ADMINSTRATIVE REGION OF CHINA",
-                      "Macao SAR, China": "MACAU SPECIAL ADMINSTRATIVE REGION OF CHINA",
-                      "Congo, Dem. Rep.": "DEMOCRATIC REPUBLIC OF THE CONGO (FORMERLY ZAIRE)",
-                      "Congo, Rep.": "CONGO",
-                      "China": 'CHINA',
-                      "Tanzania": 'UNITED REPUBLIC OF TANZANIA',
-                      "Gambia, The": "GAMBIA",
-                      "Timor-Leste": 'TIMOR-LESTE (FORMERLY EAST TIMOR)',
-                      "Kyrgyz Republic": 'KYRGYZSTAN',
-                      "Bolivia": 'PLURINATIONAL STATE OF BOLIVIA',
-                      "South Sudan": 'REPUBLIC OF SOUTH SUDAN',
-                      "Sudan": 'SUDAN',
-                      "Sao Tome and Principe": 'SAO TOME & PRINCIPE',
-                      "Yemen, Rep.": "YEMEN",
-                      "St. Lucia": 'SAINT LUCIA',
-                      "Turkiye": "TURKEY",
-                      "St. Kitts and Nevis": 'ST. KITTS-NEVIS',
-                      "Myanmar": 'MYANMAR (FORMERLY BURMA)',
-                      "Guinea-Bissau": 'GUINEA BISSAU',
-                      "Iran, Islamic Rep.": 'ISLAMIC REPUBLIC OF IRAN',
-                      "Cote d'Ivoire": 'COTE D IVOIRE',
-                      "Brunei Darussalam": 'BRUNEI (DARUSSALAM)',
-                      "St. Vincent and the Grenadines": 'ST. VINCENT & THE GRENADINES',
-                      "Micronesia, Fed. Sts.": 'FEDERATED STATES OF MICRONESIA',
-                      "Moldova": 'REPUBLIC OF MOLDOVA',
-                      "Antigua and Barbuda": 'ANTIGUA & BARBUDA',
-                      "Sint Maarten (Dutch part)": 'SAINT MARTIN (DUTCH PORTION)',
-                      "Cabo Verde": 'CAPE VERDE',
-                      "Faroe Islands": 'FAEROE ISLANDS',
-                      "Eswatini": 'SWAZILAND',
-                      "Palau": 'PACIFIC ISLANDS (PALAU)',
-                      "Monaco": "France",
-                      "San Marino": "Italy",
-                      "REPUBLIC OF SUDAN": "SUDAN",
-                      "TAIWAN": "CHINA",
-                      "CHINA (MAINLAND)": "CHINA",
-                      'FRANCE (INCLUDING MONACO)': "FRANCE",
-                      'ITALY (INCLUDING SAN MARINO)': "ITALY"}
     # Subset correct years from dataframe's
     gdp_subset, populations_subset, co2_subset, common_years = select_years(
         gdp, populations, co2, years)
     # Change countries names to allow for a better merging of dataframe's
     gdp_subset, populations_subset, co2_subset = check_countries(
-        gdp_subset, populations_subset, co2_subset, countries_dict=countries_dict)
+        gdp_subset, populations_subset, co2_subset,
+        countries_dict=COUNTRIES_DICT if countries_dict is None else countries_dict)
     # Change country names
-    gdp_subset['Country Name'] = gdp_subset['Country Name'].str.upper()
-    populations_subset['Country Name'] = populations_subset['Country Name'].str.upper()
+    gdp_subset['Country Name'] = normalize_country_names(
+        gdp_subset['Country Name'], {}, upper=True)
+    populations_subset['Country Name'] = normalize_country_names(
+        populations_subset['Country Name'], {}, upper=True)
     # Look for countries not found in other files
-    gdp_countries = set(gdp_subset["Country Name"].to_list())
-    pop_countries = set(populations_subset["Country Name"].to_list())
-    co2_countries = set(co2_subset["Country Name"].to_list())
+    if report:
+        report_odd_countries(set(gdp_subset["Country Name"].to_list()),
+                             set(populations_subset["Country Name"].to_list()),
+                             set(co2_subset["Country Name"].to_list()))
+    return gdp_subset, populations_subset, co2_subset, common_years
+
 
+def report_odd_countries(gdp_countries: set, pop_countries: set, co2_countries: set):
+    """Function which informs how many countries are not present in all of the files
+
+    :param gdp_countries: Countries from the gdp file
+    :type gdp_countries: set
+    :param pop_countries: Countries from the populations file
+    :type pop_countries: set
+    :param co2_countries: Countries from the emission file
+    :type co2_countries: set
+    """
     odd_countries = (gdp_countries | pop_countries |
                      co2_countries) - (gdp_countries & pop_countries & co2_countries)
     if len(odd_countries) > 0:
         print(f"{len(odd_countries)} countries have not been found in all of the files. "
               "They will be excluded from the analysis.")
-    return gdp_subset, populations_subset, co2_subset, common_years
 
 
 def join_data(gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
@@ -278,3 +779,30 @@ def join_data(gdp_subset: pd.DataFrame, populations_subset: pd.DataFrame,
     joined_data['Population'].replace(
         to_replace=0, value=float('nan'), inplace=True)
     return joined_data
+
+
+def compact_data(data: pd.DataFrame, float32: bool = False) -> pd.DataFrame:
+    """Function which changes the types of columns of joined data to smaller ones.
+    Country names become categorical, years are stored as int16 and integer
+    measures as int32
+
+    :param data: Joined Dataframe
+    :type data: pd.DataFrame
+    :param float32: Whether to store floating point measures as float32, defaults to False
+    :type float32: bool, optional
+    :return: Dataframe with smaller types of columns
+    :rtype: pd.DataFrame
+    """
+    int32 = np.iinfo(np.int32)
+    for column in data.columns:
+        if column == "Country Name":
+            data[column] = data[column].astype("category")
+        elif column == "Year":
+            data[column] = data[column].astype(np.int16)
+        elif pd.api.types.is_integer_dtype(data[column]):
+            if len(data) == 0 or (data[column].min() >= int32.min and
+                                  data[column].max() <= int32.max):
+                data[column] = data[column].astype(np.int32)
+        elif float32 and pd.api.types.is_float_dtype(data[column]):
+            data[column] = data[column].astype(np.float32)
+    return data
@@ -0,0 +1,314 @@
+"""Server
+
+This script loads and joins the gdp, population and emission data once
+and answers queries about it over local HTTP with JSON documents.
+The processed data is never modified after loading, so queries are answered
+concurrently by many threads, and reloading replaces the whole dataset at once.
+
+Available endpoints:
+
+    * GET /years - years available in the dataset
+    * GET /top?by=emission|gdp&y1=&y2=&k= - countries with highest values per capita
+    * GET /changes?y1=&y2= - changes in CO2 emission per capita between two years
+    * POST /reload - reads the input files again
+
+This file contains the following functions:
+
+    * load_dataset - returns processed data used to answer queries
+    * get_top - returns countries with highest values for each year
+    * get_changes - returns changes in CO2 emission between two years
+    * create_server - returns HTTP server answering queries
+    * main - the main function of the server
+"""
+import argparse
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional
+from urllib.parse import parse_qs, urlparse
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.cache as cache
+from project_Kochanska.errors import DataError
+from project_Kochanska.session import AnalysisSession
+
+# Columns used for each of the categories of highest values
+TOP_COLUMNS = {"emission": {"country": "Country Name", "value": "Total including bunker",
+                            "per_capita": "Total and bunker per capita"},
+               "gdp": {"country": "Country Name", "value": "GDP",
+                       "per_capita": "GDP per capita"}}
+
+
+def load_dataset(args: argparse.Namespace) -> dict:
+    """Function which reads, joins and processes data from all of the years
+
+    :param args: Arguments with the names of the input files and cache options
+    :type args: argparse.Namespace
+    :return: Dataset with processed data and the list of its years
+    :rtype: dict
+    """
+    data_processed = AnalysisSession.from_arguments(args).per_capita()
+    return {"data": data_processed, "years": sorted(set(data_processed["Year"]))}
+
+
+def _to_json_value(value: Any) -> Any:
+    """Function which converts pandas and numpy values to JSON values
+
+    :param value: Value to convert
+    :type value: Any
+    :return: Value which can be written as JSON
+    :rtype: Any
+    """
+    if isinstance(value, str) or value is None:
+        return value
+    value = value.item() if hasattr(value, "item") else value
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _choose_years(dataset: dict, first: Optional[int], last: Optional[int]) -> List[int]:
+    """Function which chooses available years from the range
+
+    :param dataset: Dataset created by load_dataset
+    :type dataset: dict
+    :param first: First year, None means the first available year
+    :type first: Optional[int]
+    :param last: Last year, None means the last available year
+    :type last: Optional[int]
+    :return: Chosen years
+    :rtype: List[int]
+    """
+    years = [year for year in dataset["years"]
+             if (first is None or year >= first) and (last is None or year <= last)]
+    if not years:
+        raise ValueError("There is no data for chosen years")
+    return years
+
+
+def get_top(dataset: dict, by: str, first: Optional[int] = None,
+            last: Optional[int] = None, k: int = 5) -> dict:
+    """Function which finds countries with the highest values per capita
+    for each of the years from the range
+
+    :param dataset: Dataset created by load_dataset
+    :type dataset: dict
+    :param by: Category of values ('emission' or 'gdp')
+    :type by: str
+    :param first: First year, defaults to None (first available year)
+    :type first: Optional[int], optional
+    :param last: Last year, defaults to None (last available year)
+    :type last: Optional[int], optional
+    :param k: Number of countries for each year (at most the number of countries),
+    defaults to 5
+    :type k: int, optional
+    :return: Lists of countries with their values for each year
+    :rtype: dict
+    """
+    if by not in TOP_COLUMNS:
+        raise ValueError(f"Unknown category {by}, use one of: {', '.join(TOP_COLUMNS)}")
+    if k < 1:
+        raise ValueError("k needs to be positive")
+    years = _choose_years(dataset, first, last)
+    data = dataset["data"]
+    data = data[data["Year"].isin(years)]
+    # Greater k would only add empty columns to the table
+    k = min(k, max(1, data[TOP_COLUMNS[by]["country"]].nunique()))
+    highest_values = analyze_data.find_5_highest(data,
+                                                 column_names=TOP_COLUMNS[by],
+                                                 sort_by=TOP_COLUMNS[by]["per_capita"], k=k)
+    result = {}
+    for year in years:
+        row = highest_values.loc[year]
+        countries = []
+        for index in range(k):
+            group = row[f"Country {index + 1}"]
+            if isinstance(group["country"], str):
+                countries.append({key: _to_json_value(group[key]) for key in TOP_COLUMNS[by]})
+        result[str(year)] = countries
+    return {"by": by, "k": k, "years": result}
+
+
+def get_changes(dataset: dict, first: Optional[int] = None,
+                last: Optional[int] = None) -> dict:
+    """Function which calculates changes in CO2 emission per capita
+    of all of the countries between two years
+
+    :param dataset: Dataset created by load_dataset
+    :type dataset: dict
+    :param first: First year, defaults to None (first available year)
+    :type first: Optional[int], optional
+    :param last: Last year, defaults to None (last available year)
+    :type last: Optional[int], optional
+    :return: Countries with their changes sorted from the biggest growth
+    :rtype: dict
+    """
+    years = _choose_years(dataset, first, last)
+    if len(years) == 1:
+        raise ValueError("Only one year provided. No changes can be calculated")
+    changes_table = analyze_data.get_co2_changes(dataset["data"], [years[0], years[-1]])
+    countries = [{key.lower().replace("country name", "country"): _to_json_value(value)
+                  for key, value in row.items()}
+                 for row in changes_table.reset_index().to_dict('records')]
+    return {"start": years[0], "end": years[-1], "countries": countries}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Handler of the HTTP requests sent to the server
+    """
+    server: "_DataServer"
+
+    def _send_json(self, document: dict, status: int = 200):
+        """Sends JSON document as the response
+
+        :param document: Content of the response
+        :type document: dict
+        :param status: HTTP status code, defaults to 200
+        :type status: int, optional
+        """
+        body = json.dumps(document).encode('UTF-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Answers queries about the dataset
+        """
+        url = urlparse(self.path)
+        parameters = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        # Take the reference once, so that reloading does not affect the answer
+        dataset = self.server.dataset
+        try:
+            first = int(parameters["y1"]) if "y1" in parameters else None
+            last = int(parameters["y2"]) if "y2" in parameters else None
+            if url.path == "/years":
+                self._send_json({"years": dataset["years"]})
+            elif url.path == "/top":
+                self._send_json(get_top(dataset, parameters.get("by", "emission"), first, last,
+                                        int(parameters.get("k", 5))))
+            elif url.path == "/changes":
+                self._send_json(get_changes(dataset, first, last))
+            else:
+                self._send_json({"error": "Not found"}, 404)
+        except ValueError as error:
+            self._send_json({"error": str(error)}, 400)
+        except Exception:
+            # The server keeps answering other queries
+            self._send_json({"error": "Internal server error"}, 500)
+
+    def do_POST(self):
+        """Reloads the dataset
+        """
+        if urlparse(self.path).path != "/reload":
+            self._send_json({"error": "Not found"}, 404)
+            return
+        try:
+            self.server.reload()
+        except DataError:
+            self._send_json({"error": "Data could not be loaded, previous data is used"}, 500)
+            return
+        self._send_json({"years": self.server.dataset["years"]})
+
+    def log_message(self, format, *args):
+        """Logs requests only in verbose mode
+        """
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _DataServer(ThreadingHTTPServer):
+    """HTTP server which keeps the dataset in memory
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple, args: argparse.Namespace, verbose: bool = False):
+        self.args = args
+        self.verbose = verbose
+        self.dataset = load_dataset(args)
+        self._reload_lock = threading.Lock()
+        super().__init__(address, _RequestHandler)
+
+    def reload(self):
+        """Loads the dataset again and replaces the old one at once
+        """
+        with self._reload_lock:
+            dataset = load_dataset(self.args)
+            self.dataset = dataset
+
+
+def create_server(args: argparse.Namespace) -> ThreadingHTTPServer:
+    """Function which loads the dataset and creates HTTP server answering queries
+
+    :param args: Arguments with the names of the input files, address and cache options
+    :type args: argparse.Namespace
+    :return: Server which is ready to answer queries
+    :rtype: ThreadingHTTPServer
+    """
+    return _DataServer((args.host, args.port), args, verbose=args.verbose)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Function which starts the server
+
+    :param argv: Command line arguments, defaults to None (sys.argv is used)
+    :type argv: Optional[List[str]], optional
+    """
+    parser = argparse.ArgumentParser(prog='NYPD final project 2022/23 serve',
+                                     description='Server answering queries about gdp, '\
+                                         'population and co2 emission data')
+    parser.add_argument('-gdp', '--gdp_file', action='store', dest='gdp',
+                        help='Name of the file with gdp data in csv format', required=True)
+    parser.add_argument('-pop', '--populations_file', action='store', dest='populations',
+                        help='Name of the file with population data in csv format', required=True)
+    parser.add_argument('-co2', '--co2_file', action='store', dest='co2',
+                        help='Name of the input file with the message in csv format', required=True)
+    parser.add_argument('--countries_file', dest='countries_file',
+                        help='Name of csv or json file with incorrect country names '\
+                            'and their correct counterparts')
+    parser.add_argument('--match_countries', dest='match_countries',
+                        choices=['propose', 'apply'],
+                        help='Match names of countries missing from some of the files with '\
+                            'similar names from the other files and print them ("propose") '\
+                            'or also use them in the analysis ("apply")')
+    parser.add_argument('--countries_mapping', dest='countries_mapping',
+                        help='Name of json file in which matched country names are saved, '\
+                            'so that later runs with the same files only look them up. '\
+                            'Defaults to "countries.json" in the cache directory')
+    parser.add_argument('--host', dest='host', default='127.0.0.1',
+                        help='Address of the server. Defaults to %(default)s')
+    parser.add_argument('--port', dest='port', type=int, default=8000,
+                        help='Port of the server. Defaults to %(default)s')
+    parser.add_argument('--store', dest='store',
+                        help='Directory of the columnar store created from the input files '\
+                            'with the import command, which is read instead of them')
+    parser.add_argument('--no_cache', action='store_true', dest='no_cache',
+                        help='Do not use the cache of cleaned and joined data')
+    parser.add_argument('--cache_dir', dest='cache_dir', default=cache.get_cache_dir(),
+                        help='Directory of the cache. Defaults to "%(default)s"')
+    parser.add_argument('--cache_size', dest='cache_size', type=int, default=256,
+                        help='Maximal size of the cache in MB. Defaults to %(default)s')
+    parser.add_argument('--workers', dest='workers', type=int, default=3,
+                        help='Number of threads reading the input files at the same time. '\
+                            'Defaults to %(default)s')
+    parser.add_argument('--engine', dest='engine', choices=['pandas', 'matrix'],
+                        default='pandas',
+                        help='Engine cleaning and joining the data, "matrix" joins '\
+                            'country x year matrices instead of merging on country names. '\
+                            'Defaults to %(default)s')
+    parser.add_argument('-v', '--verbose', action='store_true', dest='verbose',
+                        help='Log all of the requests')
+    args = parser.parse_args(argv)
+    # Data from all of the years is loaded
+    args.y1, args.y2, args.index = None, None, False
+
+    server = create_server(args)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
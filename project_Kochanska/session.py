@@ -0,0 +1,487 @@
+"""Session
+
+This script allows to run many analyses of the same input files without
+the command line. AnalysisSession computes each stage of the analysis
+(cleaned data, joined data, per capita data, tables with the highest values
+and changes in CO2 emission) only when it is needed and remembers its
+result for each range of years. All of the results are forgotten when
+any of the input files changes. Errors in the data are raised as DataError.
+
+    session = AnalysisSession("gdp.csv", "pop.csv", "emissions.csv")
+    emission = session.highest("emission", 2010, 2014)
+    changes, years = session.co2_changes(2010, 2014)
+
+Country names written differently in the input files can be matched
+before the analysis (see matching.py) with session.match_countries().
+
+This file contains the following classes:
+
+    * AnalysisSession - input files and remembered results of their analysis
+"""
+import argparse
+import os
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.cache as cache
+import project_Kochanska.matching as matching
+import project_Kochanska.matrix as matrix
+import project_Kochanska.read_data as read_data
+import project_Kochanska.store as store
+from project_Kochanska.analyze_data import HIGHEST_COLUMNS
+from project_Kochanska.errors import DataError
+from project_Kochanska.profiling import profile_stage
+
+
+class AnalysisSession:
+    """Input files and remembered results of each stage of their analysis
+
+    :param gdp_path: Path to gdp file
+    :type gdp_path: str
+    :param populations_path: Path to population file
+    :type populations_path: str
+    :param co2_path: Path to emission file
+    :type co2_path: str
+    :param countries_dict: Country names which should be changed,
+    defaults to None (read_data.COUNTRIES_DICT is used)
+    :type countries_dict: Optional[dict], optional
+    :param cache_dir: Directory of the cache of joined data, defaults to None (no cache)
+    :type cache_dir: Optional[str], optional
+    :param cache_size: Maximal size of the cache in MB, defaults to 256
+    :type cache_size: int, optional
+    :param workers: Number of threads reading the files, defaults to 3
+    :type workers: int, optional
+    :param processes: Number of processes finding the highest values, defaults to 1
+    :type processes: int, optional
+    :param prune: Whether to read only data from the chosen years instead of reading
+    all of the data once (useful when only one range of years is analyzed), defaults to False
+    :type prune: bool, optional
+    :param index: Whether to use the year index of the emission file together
+    with prune, defaults to False
+    :type index: bool, optional
+    :param compact: Whether to store joined data with smaller types, defaults to False
+    :type compact: bool, optional
+    :param float32: Whether to store floating point measures as float32
+    together with compact, defaults to False
+    :type float32: bool, optional
+    :param engine: Engine cleaning and joining the data, 'pandas' or 'matrix'
+    (see matrix.py), defaults to "pandas"
+    :type engine: str, optional
+    :param store_dir: Directory of the columnar store created from the input files
+    (see store.py), which is read instead of them while they don't change,
+    defaults to None
+    :type store_dir: Optional[str], optional
+    """
+
+    def __init__(self, gdp_path: str, populations_path: str, co2_path: str,
+                 countries_dict: Optional[dict] = None, cache_dir: Optional[str] = None,
+                 cache_size: int = 256, workers: int = 3, processes: int = 1,
+                 prune: bool = False, index: bool = False, compact: bool = False,
+                 float32: bool = False, engine: str = "pandas",
+                 store_dir: Optional[str] = None):
+        self.gdp_path = gdp_path
+        self.populations_path = populations_path
+        self.co2_path = co2_path
+        self.countries_dict = dict(read_data.COUNTRIES_DICT) if countries_dict is None \
+            else countries_dict
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.workers = workers
+        self.processes = processes
+        self.prune = prune
+        self.index = index
+        self.compact = compact
+        self.float32 = float32
+        self.engine = engine
+        self.store_dir = store_dir
+        self._results: Dict[tuple, Any] = {}
+        self._signature = None
+
+    @classmethod
+    def from_arguments(cls, args: argparse.Namespace) -> "AnalysisSession":
+        """Function which creates the session from the command line arguments
+
+        :param args: Command line arguments
+        :type args: argparse.Namespace
+        :return: New session
+        :rtype: AnalysisSession
+        """
+        countries_dict = dict(read_data.COUNTRIES_DICT)
+        if getattr(args, "countries_file", None):
+            countries_dict.update(read_data.load_countries_dict(args.countries_file))
+        no_cache = getattr(args, "no_cache", False)
+        cache_dir = None if no_cache else (getattr(args, "cache_dir", None)
+                                           or cache.get_cache_dir())
+        store_dir = getattr(args, "store", None)
+        # Hashing the input files takes longer than reading the store, so it is not cached
+        # (the mapping cache of country names is still kept in the cache directory)
+        data_cache_dir = None if store_dir else cache_dir
+        session = cls(args.gdp, args.populations, args.co2, countries_dict=countries_dict,
+                      cache_dir=data_cache_dir,
+                      cache_size=getattr(args, "cache_size", 256),
+                      workers=getattr(args, "workers", 1),
+                      processes=getattr(args, "processes", 1), prune=no_cache,
+                      index=getattr(args, "index", False),
+                      compact=getattr(args, "compact", False),
+                      float32=getattr(args, "float32", False),
+                      engine=getattr(args, "engine", "pandas"),
+                      store_dir=store_dir)
+        match_countries = getattr(args, "match_countries", None)
+        if match_countries:
+            mapping_file = getattr(args, "countries_mapping", None)
+            if not mapping_file and cache_dir:
+                mapping_file = os.path.join(cache_dir, matching.MAPPING_FILE)
+            matches = session.match_countries(match_countries == "apply", mapping_file)
+            matching.report_matches(matches, match_countries == "apply")
+        return session
+
+    def invalidate(self):
+        """Function which forgets all of the remembered results
+        """
+        self._results.clear()
+
+    def match_countries(self, apply: bool = True,
+                        mapping_file: Optional[str] = None) -> Dict[str, str]:
+        """Function which matches country names of gdp and population files missing from
+        the emission file with names found only in it (see matching.update_mapping)
+
+        :param apply: Whether to use the matches in the analysis, defaults to True
+        :type apply: bool, optional
+        :param mapping_file: Path to the mapping cache, matches saved in it are only looked up
+        and new ones are saved when they are applied, defaults to None (no cache)
+        :type mapping_file: Optional[str], optional
+        :return: Names stored as keys and names from the emission file stored as values
+        :rtype: Dict[str, str]
+        """
+        mapping = matching.load_mapping(mapping_file)
+        co2, populations, gdp = self.frames()
+        matches = profile_stage("match_countries", matching.update_mapping, mapping,
+                                gdp, populations, co2, self.countries_dict)
+        # Only applied matches are confirmed, proposed ones are found again next time
+        if apply and mapping_file:
+            matching.save_mapping(mapping_file, mapping)
+        if apply and matches:
+            self.countries_dict = {**self.countries_dict, **matches}
+            # Data read from the files does not depend on country names
+            frames = self._results.get(("frames",))
+            self.invalidate()
+            if frames is not None:
+                self._results[("frames",)] = frames
+        return matches
+
+    def _check_inputs(self):
+        """Function which forgets the remembered results if any of the input files
+        has changed since they were computed
+        """
+        signature = []
+        for path in (self.co2_path, self.populations_path, self.gdp_path):
+            try:
+                signature.append(read_data.get_input_signature(path))
+            except (OSError, DataError):
+                # Reading the file will report the problem
+                signature.append(None)
+        if signature != self._signature:
+            self.invalidate()
+            self._signature = signature
+
+    def _remember(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """Function which returns remembered result or computes and remembers it
+
+        :param key: Stage and its arguments
+        :type key: tuple
+        :param compute: Function computing the result
+        :type compute: Callable[[], Any]
+        :return: Result of the stage
+        :rtype: Any
+        """
+        self._check_inputs()
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    def _read(self, years: List[Optional[int]], index: bool = False) -> List[pd.DataFrame]:
+        """Function which reads emission, population and gdp files or opens the store
+
+        :param years: Boundary years of the data which is read
+        :type years: List[Optional[int]]
+        :param index: Whether to use the year index of the emission file, defaults to False
+        :type index: bool, optional
+        :return: Dataframe's with emission, population and gdp data
+        :rtype: List[pd.DataFrame]
+        """
+        if self.store_dir:
+            frames = profile_stage("open_store", store.open_store, self.store_dir,
+                                   [self.co2_path, self.populations_path, self.gdp_path])
+            if frames is not None:
+                # All of the data is mapped, so the years are chosen later
+                return frames
+            print("Store is out of date, the input files will be read instead. "
+                  "Update it with the import command.")
+        files = [(self.co2_path, False, years if index else None),
+                 (self.populations_path, True, years),
+                 (self.gdp_path, True, years)]
+        if self.workers > 1:
+            return profile_stage("read_files", read_data.read_files, files,
+                                 workers=self.workers)
+        return [profile_stage(name, read_data.read_file_to_df, *file)
+                for name, file in zip(["read_co2", "read_populations", "read_gdp"], files)]
+
+    def frames(self) -> List[pd.DataFrame]:
+        """Function which returns all of the data read from the input files
+
+        :return: Dataframe's with emission, population and gdp data
+        :rtype: List[pd.DataFrame]
+        """
+        return self._remember(("frames",), lambda: self._read([None, None]))
+
+    def subsets(self, first: Optional[int] = None, last: Optional[int] = None) -> tuple:
+        """Function which returns cleaned data from the chosen years (see read_data.check_data)
+
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :return: Cleaned gdp, population and emission data and the list of years
+        :rtype: tuple
+        """
+        def compute():
+            co2, populations, gdp = self._range_frames(first, last)
+            return profile_stage("check_data", read_data.check_data, gdp, populations, co2,
+                                 [first, last], countries_dict=self.countries_dict)
+        return self._remember(("subsets", first, last), compute)
+
+    def _range_frames(self, first: Optional[int], last: Optional[int]) -> List[pd.DataFrame]:
+        """Function which returns data read from the input files needed for the chosen years
+
+        :param first: First year
+        :type first: Optional[int]
+        :param last: Last year
+        :type last: Optional[int]
+        :return: Dataframe's with emission, population and gdp data
+        :rtype: List[pd.DataFrame]
+        """
+        if self.prune and ("frames",) not in self._results:
+            return self._read([first, last], index=self.index)
+        return self.frames()
+
+    def matrices(self, first: Optional[int] = None,
+                 last: Optional[int] = None) -> Optional[dict]:
+        """Function which returns country x year matrices with cleaned data and per capita
+        values from the chosen years (see matrix.build_matrices)
+
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :return: Matrices or None if the data can't be joined this way
+        :rtype: Optional[dict]
+        """
+        def compute():
+            co2, populations, gdp = self._range_frames(first, last)
+            matrices = profile_stage("build_matrices", matrix.build_matrices, gdp, populations,
+                                     co2, [first, last], self.countries_dict)
+            if matrices is None:
+                return None
+            matrix.report_odd_countries(matrices)
+            return matrix.get_per_capita_matrices(matrices)
+        return self._remember(("matrices", first, last), compute)
+
+    def _use_matrices(self, first: Optional[int], last: Optional[int]) -> bool:
+        """Function which checks whether the results are calculated on the matrices
+
+        :param first: First year
+        :type first: Optional[int]
+        :param last: Last year
+        :type last: Optional[int]
+        :return: True if the matrix engine is used without the cache
+        and the data can be joined with it
+        :rtype: bool
+        """
+        return self.engine == "matrix" and not self.cache_dir and \
+            self.matrices(first, last) is not None
+
+    def _cache_entry(self) -> dict:
+        """Function which returns cleaned and joined data from all of the years
+        taken from the cache or saved to it
+
+        :return: Cache entry (see cache.create_entry)
+        :rtype: dict
+        """
+        def compute():
+            try:
+                key = cache.get_cache_key([self.co2_path, self.populations_path,
+                                           self.gdp_path], self.countries_dict)
+            except (OSError, DataError):
+                # Reading the files will report the problem
+                key = None
+            entry = profile_stage("load_cache_entry", cache.load_entry, key,
+                                  self.cache_dir) if key else None
+            if entry is None:
+                co2, populations, gdp = self.frames()
+                entry = profile_stage("create_cache_entry", cache.create_entry,
+                                      gdp, populations, co2, self.countries_dict,
+                                      engine=self.engine)
+                if key:
+                    profile_stage("save_cache_entry", cache.save_entry, key, entry,
+                                  self.cache_dir, self.cache_size * 1024 * 1024)
+            return entry
+        return self._remember(("cache_entry",), compute)
+
+    def joined(self, first: Optional[int] = None, last: Optional[int] = None) -> pd.DataFrame:
+        """Function which returns joined data from the chosen years
+
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :return: Joined data
+        :rtype: pd.DataFrame
+        """
+        def compute():
+            if self.cache_dir:
+                joined_data = profile_stage("select_entry_years", cache.select_entry_years,
+                                            self._cache_entry(), [first, last])[0]
+            elif self._use_matrices(first, last):
+                joined_data = profile_stage("join_data", matrix.matrices_to_frame,
+                                            self.matrices(first, last))
+            else:
+                joined_data = profile_stage("join_data", read_data.join_data,
+                                            *self.subsets(first, last))
+            if self.compact:
+                joined_data = profile_stage("compact_data", read_data.compact_data,
+                                            joined_data, float32=self.float32)
+            return joined_data
+        return self._remember(("joined", first, last), compute)
+
+    def per_capita(self, first: Optional[int] = None,
+                   last: Optional[int] = None) -> pd.DataFrame:
+        """Function which returns joined data with per capita columns from the chosen years
+
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :return: Processed data
+        :rtype: pd.DataFrame
+        """
+        def compute():
+            if not self.compact and self._use_matrices(first, last):
+                matrices = self.matrices(first, last)
+                return profile_stage("get_per_capita", matrix.matrices_to_frame, matrices,
+                                     matrices["co2_columns"] + ["GDP", "Population"]
+                                     + matrix.PER_CAPITA_COLUMNS)
+            # New columns are added to a shallow copy, so joined data stays unchanged
+            return profile_stage("get_per_capita", analyze_data.get_per_capita,
+                                 self.joined(first, last).copy(deep=False))
+        return self._remember(("per_capita", first, last), compute)
+
+    def highest(self, by: str, first: Optional[int] = None, last: Optional[int] = None,
+                k: int = 5) -> pd.DataFrame:
+        """Function which returns countries with the highest emission or gdp per capita
+        of each of the chosen years (see analyze_data.find_5_highest)
+
+        :param by: Category, 'emission' or 'gdp'
+        :type by: str
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :param k: Number of countries chosen for each year, defaults to 5
+        :type k: int, optional
+        :return: Table with countries with the highest values
+        :rtype: pd.DataFrame
+        """
+        if by not in HIGHEST_COLUMNS:
+            raise ValueError(f"Unknown category {by}, use one of: {', '.join(HIGHEST_COLUMNS)}")
+        self._check_inputs()
+        if ("highest", by, first, last, k) not in self._results and self.processes > 1:
+            # All of the tables are found at once, each process analyzes some of the years
+            import project_Kochanska.parallel as parallel
+            tables = profile_stage("find_5_highest_parallel", parallel.find_highest_tables,
+                                   self.per_capita(first, last), list(HIGHEST_COLUMNS.values()),
+                                   processes=self.processes, k=k)
+            self._results.update({("highest", name, first, last, k): table
+                                  for name, table in zip(HIGHEST_COLUMNS, tables)})
+        column_names, sort_by = HIGHEST_COLUMNS[by]
+        return self._remember(("highest", by, first, last, k), lambda: profile_stage(
+            f"find_5_highest_{by}", analyze_data.find_5_highest,
+            self.per_capita(first, last), column_names, sort_by, k))
+
+    def co2_changes(self, first: Optional[int] = None, last: Optional[int] = None) -> tuple:
+        """Function which returns countries with the biggest changes in CO2 emission
+        per capita (see analyze_data.find_co2_changes)
+
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :return: Table with the changes and years between which they were calculated
+        or (None, None) if there is not enough data
+        :rtype: tuple
+        """
+        def compute():
+            years = self._co2_years(first, last)
+            if years is None:
+                return None, None
+            # Extremes are chosen from the table of changes of all of the countries
+            return analyze_data.get_co2_extremes(self.all_co2_changes(first, last)), years
+        return self._remember(("co2_changes", first, last), compute)
+
+    def _co2_years(self, first: Optional[int], last: Optional[int]) -> Optional[List[int]]:
+        """Function which returns years between which changes in CO2 emission are calculated
+        (chosen the same way find_co2_changes chooses them)
+
+        :param first: First year
+        :type first: Optional[int]
+        :param last: Last year
+        :type last: Optional[int]
+        :return: First and last of the chosen years or None if there is only one year
+        :rtype: Optional[List[int]]
+        """
+        return self._remember(("co2_years", first, last), lambda: analyze_data.get_boundary_years(
+            set(self.per_capita(first, last)["Year"])))
+
+    def all_co2_changes(self, first: Optional[int] = None,
+                        last: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """Function which returns changes in CO2 emission per capita of all of the countries
+        (see analyze_data.get_co2_changes)
+
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :return: Table with the changes or None if there is not enough data
+        :rtype: Optional[pd.DataFrame]
+        """
+        def compute():
+            years = self._co2_years(first, last)
+            if years is None:
+                return None
+            if self._use_matrices(first, last):
+                return profile_stage("find_co2_changes", matrix.get_co2_changes_matrix,
+                                     self.matrices(first, last), years)
+            return profile_stage("find_co2_changes", analyze_data.get_co2_changes,
+                                 self.per_capita(first, last), years)
+        return self._remember(("all_co2_changes", first, last), compute)
+
+    def window_changes(self, window: int, first: Optional[int] = None,
+                       last: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """Function which returns countries with biggest changes in CO2 emission per capita
+        in every window of the chosen number of years (see analyze_data.get_window_changes)
+
+        :param window: Number of years in each window
+        :type window: int
+        :param first: First year, defaults to None (first common year)
+        :type first: Optional[int], optional
+        :param last: Last year, defaults to None (last common year)
+        :type last: Optional[int], optional
+        :return: Table with the changes in each window or None if there is not enough data
+        :rtype: Optional[pd.DataFrame]
+        """
+        def compute():
+            if self._use_matrices(first, last):
+                return profile_stage("window_changes", matrix.get_window_changes_matrix,
+                                     self.matrices(first, last), window)
+            return profile_stage("window_changes", analyze_data.get_window_changes,
+                                 self.per_capita(first, last), window)
+        return self._remember(("window_changes", window, first, last), compute)
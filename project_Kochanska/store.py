@@ -0,0 +1,240 @@
+"""Store
+
+This script converts the gdp, population and emission files to a columnar
+store, so that they don't need to be parsed in every run. Each numeric column
+is saved as a .npy file and text columns (like country names) are saved
+as integer codes and an array of their distinct values. A json manifest
+describes the columns and the csv files the store was created from.
+
+The store is opened with memory mapping, so loading it takes almost no time
+and many processes reading it share its pages through the cache of the
+system. Dataframe's opened from the store are the same as the ones read by
+read_data.read_file_to_df, so the rest of the analysis works on them unchanged.
+Each import writes the columns to a new directory and replaces the manifest
+at the end, so programs which opened the previous version are not affected.
+Columns of a version are removed only by the import after the next one.
+
+Example:
+
+    project_Kochanska import -gdp gdp.csv -pop pop.csv -co2 emissions.csv --store store
+    project_Kochanska -gdp gdp.csv -pop pop.csv -co2 emissions.csv --store store
+
+This file contains the following functions:
+
+    * import_files - creates the store from the input files
+    * open_store - returns Dataframe's backed by the store
+    * main - the main function of the import command
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import project_Kochanska.read_data as read_data
+from project_Kochanska.errors import DataError
+from project_Kochanska.writers import atomic_open
+
+STORE_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+# Names of the tables in the order in which AnalysisSession reads the files
+TABLES = ["co2", "populations", "gdp"]
+
+
+def _save_table(data: pd.DataFrame, name: str, directory: str) -> dict:
+    """Function which saves each column of the Dataframe to a .npy file
+
+    :param data: Dataframe read from the input file
+    :type data: pd.DataFrame
+    :param name: Name of the table
+    :type name: str
+    :param directory: Directory of the columns
+    :type directory: str
+    :return: Description of the table for the manifest
+    :rtype: dict
+    """
+    columns = []
+    for position, column in enumerate(data.columns):
+        file_name = f"{name}_{position}.npy"
+        description = {"name": column, "file": file_name, "values": None}
+        values = data[column]
+        if pd.api.types.is_object_dtype(values):
+            # Missing values get code -1
+            codes, uniques = pd.factorize(values)
+            if not all(isinstance(value, str) for value in uniques):
+                raise DataError(f"Error, column {column} of {name} file contains text "
+                                "and numbers and can't be saved in the store")
+            description["values"] = f"{name}_{position}_values.npy"
+            np.save(os.path.join(directory, description["values"]),
+                    np.asarray(uniques, dtype=str))
+            np.save(os.path.join(directory, file_name), codes.astype(np.int32))
+        else:
+            np.save(os.path.join(directory, file_name), values.to_numpy())
+        columns.append(description)
+    return {"rows": len(data), "columns": columns}
+
+
+def import_files(gdp_path: str, populations_path: str, co2_path: str, store_dir: str,
+                 workers: int = 3):
+    """Function which reads the input files and saves them as a columnar store
+
+    :param gdp_path: Path to gdp file
+    :type gdp_path: str
+    :param populations_path: Path to population file
+    :type populations_path: str
+    :param co2_path: Path to emission file
+    :type co2_path: str
+    :param store_dir: Directory of the store
+    :type store_dir: str
+    :param workers: Number of threads reading the files, defaults to 3
+    :type workers: int, optional
+    """
+    paths = [co2_path, populations_path, gdp_path]
+    frames = read_data.read_files([(co2_path, False, None), (populations_path, True, None),
+                                   (gdp_path, True, None)], workers=workers)
+    os.makedirs(store_dir, exist_ok=True)
+    previous = _read_manifest(store_dir)
+    data_dir = tempfile.mkdtemp(dir=store_dir, prefix="data_")
+    try:
+        manifest = {"version": STORE_VERSION, "data": os.path.basename(data_dir),
+                    "sources": {}, "tables": {}}
+        for name, path, data in zip(TABLES, paths, frames):
+            manifest["sources"][name] = read_data.get_input_signature(path)
+            manifest["tables"][name] = _save_table(data, name, data_dir)
+        with atomic_open(os.path.join(store_dir, MANIFEST_NAME)) as file:
+            json.dump(manifest, file, indent=2)
+    except BaseException:
+        shutil.rmtree(data_dir, ignore_errors=True)
+        raise
+    if previous is not None:
+        _remove_old_data(store_dir, previous.get("data"), manifest["data"])
+
+
+def _remove_old_data(store_dir: str, previous_data: Optional[str], data: str):
+    """Function which removes columns of the versions older than the previous one.
+    Columns of the previous version stay available to the programs which have read
+    its manifest and directories changed after it (written by other imports) are kept
+
+    :param store_dir: Directory of the store
+    :type store_dir: str
+    :param previous_data: Directory of the columns of the previous version
+    :type previous_data: Optional[str]
+    :param data: Directory of the columns of the new version
+    :type data: str
+    """
+    try:
+        previous_time = os.stat(os.path.join(store_dir, previous_data)).st_mtime_ns
+    except (OSError, TypeError):
+        return
+    for entry in os.listdir(store_dir):
+        if not entry.startswith("data_") or entry in (previous_data, data):
+            continue
+        path = os.path.join(store_dir, entry)
+        try:
+            if os.stat(path).st_mtime_ns < previous_time:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            continue
+
+
+def _read_manifest(store_dir: str) -> Optional[dict]:
+    """Function which reads the manifest of the store
+
+    :param store_dir: Directory of the store
+    :type store_dir: str
+    :return: Manifest or None if it does not exist or can't be read
+    :rtype: Optional[dict]
+    """
+    try:
+        with open(os.path.join(store_dir, MANIFEST_NAME), 'r', encoding='UTF-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def _open_table(description: dict, directory: str) -> pd.DataFrame:
+    """Function which opens the columns of one table with memory mapping
+
+    :param description: Description of the table from the manifest
+    :type description: dict
+    :param directory: Directory of the columns
+    :type directory: str
+    :return: Dataframe backed by the store
+    :rtype: pd.DataFrame
+    """
+    data = {}
+    for column in description["columns"]:
+        values = np.load(os.path.join(directory, column["file"]), mmap_mode='r')
+        if column["values"] is not None:
+            # Text is decoded to the same object column read_csv creates
+            uniques = np.load(os.path.join(directory, column["values"])).astype(object)
+            values = np.append(uniques, np.nan)[values]
+        data[column["name"]] = values
+    # Numeric columns are not copied, so they stay backed by the mapped files
+    return pd.DataFrame(data, columns=list(data), copy=False)
+
+
+def open_store(store_dir: str, paths: Optional[List[str]] = None) -> Optional[
+        List[pd.DataFrame]]:
+    """Function which opens the store with memory mapping
+
+    :param store_dir: Directory of the store
+    :type store_dir: str
+    :param paths: Paths to co2, populations and gdp files (in this order), if provided
+    None is returned when the store was not created from their current versions,
+    defaults to None
+    :type paths: Optional[List[str]], optional
+    :return: Dataframe's with emission, population and gdp data (the same as
+    read_data.read_file_to_df returns) or None if the store is out of date
+    :rtype: Optional[List[pd.DataFrame]]
+    """
+    # Columns may be removed by an import after the manifest is read,
+    # then the new manifest is read once more
+    for attempt in range(2):
+        manifest = _read_manifest(store_dir)
+        if manifest is None:
+            raise DataError("Error, store not found. Create it with the import command")
+        if manifest.get("version") != STORE_VERSION:
+            return None
+        if paths is not None:
+            for name, path in zip(TABLES, paths):
+                try:
+                    if read_data.get_input_signature(path) != manifest["sources"][name]:
+                        return None
+                except (OSError, DataError):
+                    return None
+        directory = os.path.join(store_dir, manifest["data"])
+        try:
+            return [_open_table(manifest["tables"][name], directory) for name in TABLES]
+        except FileNotFoundError as error:
+            if attempt == 1:
+                raise DataError("Error, store is being updated. Try again later") from error
+    return None
+
+
+def main(argv: Optional[List[str]] = None):
+    """Function which creates the store from the input files
+
+    :param argv: Command line arguments, defaults to None (sys.argv is used)
+    :type argv: Optional[List[str]], optional
+    """
+    parser = argparse.ArgumentParser(prog='NYPD final project 2022/23 import',
+                                     description='Converts gdp, population and co2 emission '\
+                                         'files to a columnar store')
+    parser.add_argument('-gdp', '--gdp_file', action='store', dest='gdp',
+                        help='Name of the file with gdp data in csv format', required=True)
+    parser.add_argument('-pop', '--populations_file', action='store', dest='populations',
+                        help='Name of the file with population data in csv format', required=True)
+    parser.add_argument('-co2', '--co2_file', action='store', dest='co2',
+                        help='Name of the input file with the message in csv format', required=True)
+    parser.add_argument('--store', dest='store', required=True,
+                        help='Directory of the store')
+    parser.add_argument('--workers', dest='workers', type=int, default=3,
+                        help='Number of threads reading the input files at the same time. '\
+                            'Defaults to %(default)s')
+    args = parser.parse_args(argv)
+    import_files(args.gdp, args.populations, args.co2, args.store, workers=max(args.workers, 1))
+    print(f"Store saved in {args.store}")
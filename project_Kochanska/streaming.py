@@ -0,0 +1,249 @@
+"""Streaming
+
+This script analyzes the emission file read in chunks, so that the memory
+used by the program does not depend on the length of the file. The gdp and
+population files are small and are kept in memory as lookup tables. Rows
+of the emission file are kept only until all rows of their year are read
+(the file, or its shards taken in the order of their names, is expected to be
+sorted by year, as the provided one is). Then
+the year is cleaned, joined and per capita values are calculated the same
+way check_data, join_data and get_per_capita do it, and only the rows with
+the highest values of the year and emission per capita from the last 10
+years are kept. When the file is not sorted by year it is read again and
+all of its rows are kept until the end of the file.
+
+This file contains the following functions:
+
+    * prepare_lookup - returns cleaned gdp or population data
+    * read_chunks - returns the emission file read in chunks
+    * stream_years - returns rows of the emission file grouped by year
+    * analyze_stream - returns results of the analysis of the emission file read in chunks
+"""
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.read_data as read_data
+from project_Kochanska.analyze_data import HIGHEST_COLUMNS
+from project_Kochanska.errors import DataError
+
+
+class _UnsortedFile(Exception):
+    """Raised when rows of the emission file are not sorted by year"""
+
+
+def prepare_lookup(data: pd.DataFrame, years: List[int], countries_dict: dict) -> pd.DataFrame:
+    """Function which chooses the years of gdp or population data, changes country
+    names and merges rows about the same country (see read_data.check_data)
+
+    :param data: Dataframe with gdp or population information
+    :type data: pd.DataFrame
+    :param years: Years which will be chosen
+    :type years: List[int]
+    :param countries_dict: Dictionary with incorrect country names
+    stored as keys and their correct counterparts stored as values
+    :type countries_dict: dict
+    :return: Cleaned Dataframe with 'Country Name' and year columns
+    :rtype: pd.DataFrame
+    """
+    data = data[['Country Name'] + years]
+    data = data.assign(**{"Country Name": read_data.normalize_country_names(
+        data["Country Name"], countries_dict)})
+    data = read_data.join_same_countries(data, data_type=0)
+    data['Country Name'] = read_data.normalize_country_names(data['Country Name'], {},
+                                                             upper=True)
+    return data
+
+
+def read_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Function which reads the emission file (with no header lines) in chunks,
+    shards of a directory or a glob pattern are read one after another and compressed
+    files are decompressed while they are read (see read_data.open_input)
+
+    :param file_path: Path to csv input file, directory with csv files or glob pattern
+    :type file_path: str
+    :param chunk_size: Number of rows of each chunk
+    :type chunk_size: int
+    :return: Chunks of the file
+    :rtype: Iterator[pd.DataFrame]
+    """
+    shards = read_data.expand_input(file_path)
+    for shard in shards:
+        try:
+            with read_data.open_input(shard) as source, \
+                    pd.read_csv(source, sep=",", chunksize=chunk_size) as reader:
+                for chunk in reader:
+                    yield chunk.rename(columns={"Country": "Country Name"})
+        except (FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError) \
+                + read_data.DECOMPRESSION_ERRORS as error:
+            raise read_data.read_error(error, shard if shards != [file_path] else None) \
+                from error
+
+
+def stream_years(file_path: str, chunk_size: int, years: set, countries_dict: dict,
+                 common_years: set, sorted_file: bool = True) -> Iterator[
+                     Tuple[int, pd.DataFrame]]:
+    """Function which reads the emission file in chunks and returns rows
+    of each of the chosen years once all of them are read
+
+    :param file_path: Path to the emission file
+    :type file_path: str
+    :param chunk_size: Number of rows of each chunk
+    :type chunk_size: int
+    :param years: Years which will be chosen
+    :type years: set
+    :param countries_dict: Dictionary with incorrect country names
+    stored as keys and their correct counterparts stored as values
+    :type countries_dict: dict
+    :param common_years: Set to which years of the file are added
+    :type common_years: set
+    :param sorted_file: Whether the file is sorted by year, if it is not
+    rows are returned at the end of the file, defaults to True
+    :type sorted_file: bool, optional
+    :return: Years in increasing order and rows with changed country names from each of them
+    :rtype: Iterator[Tuple[int, pd.DataFrame]]
+    """
+    buffers: Dict[int, List[pd.DataFrame]] = {}
+    last_year = None
+    for chunk in read_chunks(file_path, chunk_size):
+        common_years.update(chunk["Year"].unique().tolist())
+        chunk = chunk[chunk["Year"].isin(years)]
+        if len(chunk) == 0:
+            continue
+        chunk_years = chunk["Year"].to_numpy()
+        if sorted_file and ((last_year is not None and chunk_years[0] < last_year)
+                            or np.any(np.diff(chunk_years) < 0)):
+            raise _UnsortedFile
+        last_year = chunk_years[-1]
+        chunk = chunk.assign(**{"Country Name": read_data.normalize_country_names(
+            chunk["Country Name"], countries_dict)})
+        for year, rows in chunk.groupby("Year", sort=False):
+            buffers.setdefault(year, []).append(rows)
+        if sorted_file:
+            # Rows of the earlier years can't appear later in a sorted file
+            for year in sorted(year for year in buffers if year < last_year):
+                yield year, pd.concat(buffers.pop(year), ignore_index=True)
+    for year in sorted(buffers):
+        yield year, pd.concat(buffers.pop(year), ignore_index=True)
+
+
+def _analyze_years(year_rows: Iterator[Tuple[int, pd.DataFrame]], gdp_lookup: pd.DataFrame,
+                   populations_lookup: pd.DataFrame, tables: Dict[str, tuple],
+                   k: int) -> dict:
+    """Function which joins and processes rows of each year and keeps
+    only the rows with the highest values and emission per capita of the last 10 years
+
+    :param year_rows: Years and their rows (see stream_years)
+    :type year_rows: Iterator[Tuple[int, pd.DataFrame]]
+    :param gdp_lookup: Cleaned gdp data (see prepare_lookup)
+    :type gdp_lookup: pd.DataFrame
+    :param populations_lookup: Cleaned population data (see prepare_lookup)
+    :type populations_lookup: pd.DataFrame
+    :param tables: Column names and the sort column of each table (see analyze_data.HIGHEST_COLUMNS)
+    :type tables: Dict[str, tuple]
+    :param k: Number of countries chosen for each year
+    :type k: int
+    :return: Years with joined data, co2 country names, chosen rows and their ranks
+    for each table and emission per capita of the last 10 years
+    :rtype: dict
+    """
+    state = {"years": [], "co2_countries": set(),
+             "largest": {name: [] for name in tables}, "ranks": {name: [] for name in tables},
+             "recent": deque(maxlen=10)}
+    for year, rows in year_rows:
+        co2_year = read_data.join_same_countries(rows, data_type=1)
+        state["co2_countries"].update(co2_year["Country Name"].to_list())
+        data_processed = analyze_data.get_per_capita(read_data.join_data(
+            gdp_lookup[['Country Name', year]], populations_lookup[['Country Name', year]],
+            co2_year, [year]))
+        if len(data_processed) == 0:
+            continue
+        state["years"].append(year)
+        for name, (column_names, sort_by) in tables.items():
+            largest, ranks = analyze_data.select_highest(data_processed, sort_by, k)
+            state["largest"][name].append(largest[["Year"] + list(column_names.values())])
+            state["ranks"][name].append(ranks)
+        state["recent"].append(
+            data_processed[["Country Name", "Year", "Total and bunker per capita"]])
+    return state
+
+
+def analyze_stream(gdp_path: str, populations_path: str, co2_path: str, years: list,
+                   chunk_size: int, countries_dict: Optional[dict] = None,
+                   workers: int = 3, report: bool = True, k: int = 5) -> tuple:
+    """Function which reads the emission file in chunks and finds countries
+    with the highest values of each year and the biggest changes in CO2 emission
+
+    :param gdp_path: Path to gdp file
+    :type gdp_path: str
+    :param populations_path: Path to population file
+    :type populations_path: str
+    :param co2_path: Path to emission file
+    :type co2_path: str
+    :param years: First and last year, None means the first or last common year
+    :type years: list
+    :param chunk_size: Number of rows of the emission file read at once
+    :type chunk_size: int
+    :param countries_dict: Dictionary with incorrect country names stored as keys and
+    their correct counterparts stored as values, defaults to None (COUNTRIES_DICT is used)
+    :type countries_dict: Optional[dict], optional
+    :param workers: Number of threads reading gdp and population files, defaults to 3
+    :type workers: int, optional
+    :param report: Whether to inform about countries missing from some of the files,
+    defaults to True
+    :type report: bool, optional
+    :param k: Number of countries chosen for each year, defaults to 5
+    :type k: int, optional
+    :return: Tables with the highest values (see analyze_data.HIGHEST_COLUMNS), countries with
+    the biggest changes in CO2 emission, years between which the changes were calculated
+    and changes of all of the countries (see analyze_data.find_co2_changes
+    and analyze_data.get_co2_changes)
+    :rtype: tuple
+    """
+    countries_dict = read_data.COUNTRIES_DICT if countries_dict is None else countries_dict
+    populations, gdp = read_data.read_files([(populations_path, True, None),
+                                             (gdp_path, True, None)], workers=workers)
+    wdi_years = set(read_data.get_year_columns(gdp)).intersection(
+        read_data.get_year_columns(populations))
+    first = -np.inf if years[0] is None else years[0]
+    last = np.inf if years[1] is None else years[1]
+    chosen_years = sorted(year for year in wdi_years if first <= year <= last)
+    gdp_lookup = prepare_lookup(gdp, chosen_years, countries_dict)
+    populations_lookup = prepare_lookup(populations, chosen_years, countries_dict)
+
+    co2_years: set = set()
+    try:
+        state = _analyze_years(stream_years(co2_path, chunk_size, set(chosen_years),
+                                            countries_dict, co2_years),
+                               gdp_lookup, populations_lookup, HIGHEST_COLUMNS, k)
+    except _UnsortedFile:
+        print("Emission file is not sorted by year, all of its rows will be kept in memory.")
+        co2_years = set()
+        state = _analyze_years(stream_years(co2_path, chunk_size, set(chosen_years),
+                                            countries_dict, co2_years, sorted_file=False),
+                               gdp_lookup, populations_lookup, HIGHEST_COLUMNS, k)
+
+    if not wdi_years & co2_years:
+        raise DataError("Error, provided files have no common years")
+    if not set(chosen_years) & co2_years:
+        raise DataError("Error, provided files have no data for chosen years")
+    if report:
+        read_data.report_odd_countries(set(gdp_lookup["Country Name"].to_list()),
+                                       set(populations_lookup["Country Name"].to_list()),
+                                       state["co2_countries"])
+    if not state["years"]:
+        raise DataError("Error, provided files have no common countries")
+
+    highest = {}
+    for name, (column_names, _) in HIGHEST_COLUMNS.items():
+        # Rows of all of the years are joined, so their columns get the same types
+        # as when the whole file is read at once
+        highest[name] = analyze_data.fill_highest_table(
+            pd.concat(state["largest"][name]), np.concatenate(state["ranks"][name]),
+            pd.Index(set(state["years"])), column_names, k)
+    boundary_years = analyze_data.get_boundary_years(state["years"])
+    if boundary_years is None:
+        return highest, None, None, None
+    changes_table = analyze_data.get_co2_changes(pd.concat(state["recent"]), boundary_years)
+    return highest, analyze_data.get_co2_extremes(changes_table), boundary_years, changes_table
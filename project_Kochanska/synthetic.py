@@ -0,0 +1,210 @@
+"""Synthetic data
+
+This script generates deterministic synthetic input files in the same layout
+as the real ones: gdp and population files in the World Bank layout (with
+header lines and one column for each year) and emission file in the long
+layout (one row for each year and country, ordered by year). It is used
+by the benchmarks and tests.
+
+Some of the countries can have aliases: in the gdp and population files
+they are written the way the World Bank writes them and in the emission file
+some of their rows are written with another spelling. Both are changed to
+the emission name by the dictionary returned by get_aliases, so the same
+country and year is then merged, like in the real files.
+
+This file contains the following functions:
+
+    * get_aliases - returns dictionary changing aliases to the emission names
+    * generate_wdi_file - saves file in the World Bank layout
+    * generate_emission_file - saves file in the long emission layout
+    * generate_data - saves all three input files
+"""
+import csv
+import os
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# Size of the real input files
+COUNTRIES = 256
+WDI_YEARS = (1960, 2021)
+EMISSION_YEARS = (1751, 2014)
+EMISSION_COLUMNS = ["Year", "Country", "Total", "Solid Fuel", "Liquid Fuel", "Gas Fuel",
+                    "Cement", "Gas Flaring", "Per Capita", "Bunker fuels (Not in Total)"]
+
+
+def _country_names(countries: int) -> List[str]:
+    """Function which creates names of the countries
+
+    :param countries: Number of countries
+    :type countries: int
+    :return: Names of the countries
+    :rtype: List[str]
+    """
+    return [f"Country {index:06d}" for index in range(countries)]
+
+
+def _alias_indices(countries: int, aliases: float) -> np.ndarray:
+    """Function which chooses countries with aliases, spread evenly among all of them
+
+    :param countries: Number of countries
+    :type countries: int
+    :param aliases: Fraction of countries with aliases
+    :type aliases: float
+    :return: Indices of the chosen countries
+    :rtype: np.ndarray
+    """
+    return np.flatnonzero(np.diff(np.floor(np.arange(countries + 1) * aliases)) > 0)
+
+
+def get_aliases(countries: int, aliases: float) -> Dict[str, str]:
+    """Function which creates dictionary changing aliases of the countries
+    (see _alias_indices) to their names in the emission file
+
+    :param countries: Number of countries
+    :type countries: int
+    :param aliases: Fraction of countries with aliases
+    :type aliases: float
+    :return: Aliases stored as keys and names from the emission file stored as values
+    :rtype: Dict[str, str]
+    """
+    names = _country_names(countries)
+    result = {}
+    for index in _alias_indices(countries, aliases):
+        result[f"{names[index]}, Rep."] = names[index].upper()
+        result[f"{names[index].upper()} (FORMERLY ALIAS)"] = names[index].upper()
+    return result
+
+
+def generate_wdi_file(file_path: str, countries: int, years: tuple, indicator: str,
+                      seed: int = 0, missing: float = 0.05, aliases: float = 0) -> str:
+    """Function which saves random data in the World Bank layout (four header
+    lines, metadata columns, one column for each year and trailing comma)
+
+    :param file_path: Path to the new file
+    :type file_path: str
+    :param countries: Number of countries
+    :type countries: int
+    :param years: First and last year
+    :type years: tuple
+    :param indicator: Name of the indicator ('gdp' or 'population')
+    :type indicator: str
+    :param seed: Seed of the random numbers, defaults to 0
+    :type seed: int, optional
+    :param missing: Fraction of missing values, defaults to 0.05
+    :type missing: float, optional
+    :param aliases: Fraction of countries written with their aliases (see get_aliases),
+    defaults to 0
+    :type aliases: float, optional
+    :return: Path to the new file
+    :rtype: str
+    """
+    generator = np.random.default_rng(seed)
+    year_list = list(range(years[0], years[1] + 1))
+    scale = 1e10 if indicator == "gdp" else 1e6
+    values = generator.lognormal(0, 1.5, size=(countries, 1)) * scale * \
+        np.cumprod(generator.uniform(0.97, 1.06, size=(countries, len(year_list))), axis=1)
+    values[generator.random(values.shape) < missing] = np.nan
+    if indicator != "gdp":
+        values = np.round(values)
+    names = _country_names(countries)
+    for index in _alias_indices(countries, aliases):
+        names[index] = f"{names[index]}, Rep."
+    with open(file_path, 'w', encoding='UTF-8', newline='') as file:
+        file.write('"Data Source","World Development Indicators",\n\n'
+                   '"Last Updated Date","2022-09-16",\n\n')
+        writer = csv.writer(file, quoting=csv.QUOTE_ALL, lineterminator=",\n")
+        writer.writerow(["Country Name", "Country Code", "Indicator Name", "Indicator Code"]
+                        + [str(year) for year in year_list])
+        for index, name in enumerate(names):
+            writer.writerow([name, f"C{index:05d}", indicator, indicator.upper()]
+                            + ["" if np.isnan(value) else f"{value:.15g}"
+                               for value in values[index]])
+    return file_path
+
+
+def generate_emission_file(file_path: str, countries: int, years: tuple, seed: int = 0,
+                           duplicates: float = 0.01, aliases: float = 0) -> str:
+    """Function which saves random data in the long emission layout ordered by year.
+    Countries start to report emission in random years, like in the real file
+
+    :param file_path: Path to the new file
+    :type file_path: str
+    :param countries: Number of countries
+    :type countries: int
+    :param years: First and last year
+    :type years: tuple
+    :param seed: Seed of the random numbers, defaults to 0
+    :type seed: int, optional
+    :param duplicates: Fraction of rows split into two rows with the same
+    country and year, defaults to 0.01
+    :type duplicates: float, optional
+    :param aliases: Fraction of countries whose rows are split into two rows, the second
+    one written with their alias (see get_aliases), defaults to 0
+    :type aliases: float, optional
+    :return: Path to the new file
+    :rtype: str
+    """
+    generator = np.random.default_rng(seed + 1)
+    names = np.array([name.upper() for name in _country_names(countries)])
+    # Most of the countries start reporting in the 20th century
+    first_years = np.clip(generator.normal(1930, 50, size=countries).astype(int),
+                          years[0], years[1])
+    year_list = np.arange(years[0], years[1] + 1)
+    mask = year_list[np.newaxis, :] >= first_years[:, np.newaxis]
+    # Rows ordered by year and then by country
+    year_index, country_index = np.nonzero(mask.T)
+    row_count = len(country_index)
+    sources = generator.integers(0, 200000, size=(row_count, 5))
+    data = pd.DataFrame({"Year": year_list[year_index], "Country": names[country_index]})
+    data["Total"] = sources.sum(axis=1)
+    for index, column in enumerate(EMISSION_COLUMNS[3:8]):
+        data[column] = sources[:, index]
+    data["Per Capita"] = np.round(generator.uniform(0, 10, size=row_count), 2)
+    data["Bunker fuels (Not in Total)"] = generator.integers(0, 5000, size=row_count)
+    # Split some rows into two rows about the same country and year
+    split = data[generator.random(row_count) < duplicates]
+    # Rows of countries with aliases are split into rows with both of their names
+    aliased = np.isin(country_index, _alias_indices(countries, aliases))
+    alias_rows = data[aliased].assign(Country=data["Country"][aliased] + " (FORMERLY ALIAS)")
+    data = pd.concat([data, split, alias_rows]).sort_values("Year", kind='mergesort')
+    data.to_csv(file_path, index=False, columns=EMISSION_COLUMNS)
+    return file_path
+
+
+def generate_data(directory: str, scale: float = 1, seed: int = 0, duplicates: float = 0.01,
+                  wdi_years: tuple = WDI_YEARS, emission_years: tuple = EMISSION_YEARS,
+                  countries: int = COUNTRIES, aliases: float = 0) -> tuple[str, str, str]:
+    """Function which saves gdp, population and emission files. Scale 1
+    corresponds to the size of the real files and greater scales
+    multiply the number of countries
+
+    :param directory: Directory of the new files
+    :type directory: str
+    :param scale: Multiplier of the number of countries, defaults to 1
+    :type scale: float, optional
+    :param seed: Seed of the random numbers, defaults to 0
+    :type seed: int, optional
+    :param duplicates: Fraction of duplicated emission rows, defaults to 0.01
+    :type duplicates: float, optional
+    :param wdi_years: First and last year of gdp and population files, defaults to WDI_YEARS
+    :type wdi_years: tuple, optional
+    :param emission_years: First and last year of emission file, defaults to EMISSION_YEARS
+    :type emission_years: tuple, optional
+    :param countries: Number of countries at scale 1, defaults to COUNTRIES
+    :type countries: int, optional
+    :param aliases: Fraction of countries with aliases (see get_aliases), defaults to 0
+    :type aliases: float, optional
+    :return: Paths to gdp, population and emission files
+    :rtype: tuple[str, str, str]
+    """
+    os.makedirs(directory, exist_ok=True)
+    countries = max(1, int(countries * scale))
+    gdp = generate_wdi_file(os.path.join(directory, "gdp.csv"), countries, wdi_years,
+                            "gdp", seed=seed, aliases=aliases)
+    populations = generate_wdi_file(os.path.join(directory, "pop.csv"), countries, wdi_years,
+                                    "population", seed=seed + 2, aliases=aliases)
+    co2 = generate_emission_file(os.path.join(directory, "emissions.csv"), countries,
+                                 emission_years, seed=seed, duplicates=duplicates,
+                                 aliases=aliases)
+    return gdp, populations, co2
@@ -0,0 +1,68 @@
+"""Test cache
+
+This script contains tests for checking the cache of cleaned and
+joined data.
+
+This file contains 3 test
+"""
+import os
+import pytest
+import pandas as pd
+import project_Kochanska.cache as cache
+from project_Kochanska.errors import DataError
+from project_Kochanska.test.test_program import emission_df, gdp_df, pop_df, write_file
+
+
+def test_get_cache_key(tmp_path):
+    """Checks if the name of the entry changes with the content
+    of the files and with the dictionary of country names
+    """
+    file_name = write_file(str(tmp_path / "test_emission.csv"), False)
+    key = cache.get_cache_key([file_name], {"A": "B"})
+    assert key == cache.get_cache_key([file_name], {"A": "B"})
+    assert key != cache.get_cache_key([file_name], {"A": "C"})
+    with open(file_name, 'a', encoding='UTF-8') as file:
+        file.write("2015,SPAIN,1,1,1,1,1,0,1.38,1\n")
+    assert key != cache.get_cache_key([file_name], {"A": "B"})
+
+
+def test_save_and_load_entry(tmp_path, monkeypatch):
+    """Checks if saved entries of the current user are loaded and if the oldest
+    ones are removed when the cache is too big
+    """
+    entry = cache.create_entry(gdp_df, pop_df, emission_df)
+    assert entry["years"] == [2013, 2014]
+    cache.save_entry("first", entry, str(tmp_path), max_size=10 ** 6)
+    loaded = cache.load_entry("first", str(tmp_path))
+    assert loaded is not None
+    pd.testing.assert_frame_equal(loaded["joined"], entry["joined"])
+    assert cache.load_entry("missing", str(tmp_path)) is None
+    # Entries of other users are not loaded
+    user = os.getuid()
+    monkeypatch.setattr(cache.os, "getuid", lambda: user + 1)
+    assert cache.load_entry("first", str(tmp_path)) is None
+    monkeypatch.undo()
+
+    # Make the first entry older and exceed the limit with the second one
+    os.utime(tmp_path / "first.pkl", (0, 0))
+    size = os.path.getsize(tmp_path / "first.pkl")
+    cache.save_entry("second", entry, str(tmp_path), max_size=size)
+    assert sorted(os.listdir(tmp_path)) == ["second.pkl"]
+    cache.clear_cache(str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_select_entry_years():
+    """Checks if the data from the chosen years is selected
+    """
+    entry = {"joined": pd.DataFrame({"Year": [2013, 2014, 2014], "Country Name": ["A", "A", "B"]}),
+             "years": [2013, 2014], "gdp_countries": {"A", "B"}, "pop_countries": {"A", "B"},
+             "co2_countries": pd.DataFrame({"Year": [2013, 2014, 2014],
+                                            "Country Name": ["A", "A", "B"]})}
+    joined_data, years = cache.select_entry_years(entry, [2014, None])
+    assert years == [2014]
+    assert joined_data["Country Name"].to_list() == ["A", "B"]
+    assert joined_data.index.to_list() == [0, 1]
+    with pytest.raises(DataError) as error_info:
+        cache.select_entry_years(entry, [1800, 1801])
+    assert str(error_info.value) == "Error, provided files have no data for chosen years"
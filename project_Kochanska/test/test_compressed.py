@@ -0,0 +1,73 @@
+"""Test compressed
+
+This script contains tests for checking if compressed input files and
+members of zip archives give the same data as the csv files.
+
+This file contains 2 test
+"""
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import zipfile
+import pandas as pd
+import pytest
+import project_Kochanska.read_data as read_data
+import project_Kochanska.synthetic as synthetic
+from project_Kochanska.errors import DataError
+
+
+def test_same_data(tmp_path):
+    """Checks if files compressed with gzip, bzip2 and xz and World Bank zip archives
+    (also in a directory of shards) are read the same as the csv files
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    co2 = read_data.read_file_to_df(co2_path, skip=False)
+    for extension, open_file in ((".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)):
+        with open(co2_path, 'rb') as source, open_file(co2_path + extension, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        pd.testing.assert_frame_equal(
+            read_data.read_file_to_df(co2_path + extension, skip=False, years=[2000, 2010]), co2)
+        # Year index can't be used for compressed files
+        assert not os.path.exists(co2_path + extension + ".idx")
+
+    archive_path = str(tmp_path / "gdp.zip")
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.write(gdp_path, "API_NY.GDP.MKTP.CD_DS2_en_csv_v2.csv")
+        archive.writestr("Metadata_Country_API_NY.GDP.MKTP.CD_DS2_en_csv_v2.csv", "a,b\n1,2\n")
+    gdp = read_data.read_file_to_df(gdp_path)
+    pd.testing.assert_frame_equal(read_data.read_file_to_df(archive_path), gdp)
+    pd.testing.assert_frame_equal(
+        read_data.read_file_to_df(archive_path + ":API_NY.GDP.MKTP.CD_DS2_en_csv_v2.csv",
+                                  years=[2005, 2010]),
+        read_data.read_file_to_df(gdp_path, years=[2005, 2010]))
+
+    shards = tmp_path / "shards"
+    shards.mkdir()
+    shutil.copy(co2_path + ".gz", shards)
+    assert read_data.expand_input(str(shards)) == [str(shards / "emissions.csv.gz")]
+
+
+def test_archive_errors(tmp_path):
+    """Checks if missing members, archives with many data files
+    and damaged files are reported
+    """
+    archive_path = str(tmp_path / "data.zip")
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr("first.csv", "Year,Country,Total\n2010,POLAND,5\n")
+        archive.writestr("second.csv", "Year,Country,Total\n2011,POLAND,6\n")
+    with pytest.raises(DataError) as error_info:
+        read_data.read_file_to_df(archive_path, skip=False)
+    assert str(error_info.value).startswith(f"Error, data file in {archive_path} could not")
+    with pytest.raises(DataError) as error_info:
+        read_data.read_file_to_df(archive_path + ":third.csv", skip=False)
+    assert str(error_info.value) == f"Error, third.csv not found in {archive_path}"
+    assert len(read_data.read_file_to_df(archive_path + ":second.csv", skip=False)) == 1
+
+    damaged_path = tmp_path / "emissions.csv.gz"
+    damaged_path.write_bytes(gzip.compress(b"Year,Country,Total\n" * 100)[:20])
+    with pytest.raises(DataError) as error_info:
+        read_data.read_file_to_df(str(damaged_path), skip=False)
+    assert str(error_info.value) == "Decompression error"
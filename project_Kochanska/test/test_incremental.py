@@ -0,0 +1,78 @@
+"""Test incremental
+
+This script contains tests for checking the incremental updates
+of the results.
+
+This file contains 3 test
+"""
+import json
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.incremental as incremental
+import project_Kochanska.program as program
+import project_Kochanska.read_data as read_data
+import project_Kochanska.synthetic as synthetic
+
+gdp_subset = pd.DataFrame({"Country Name": ["A", "B", "C"], 2012: [10.0, 20.0, 30.0],
+                           2013: [10.0, 20.0, 30.0], 2014: [10.0, 20.0, 40.0]})
+populations_subset = pd.DataFrame({"Country Name": ["A", "B", "C"], 2012: [1.0, 2.0, 3.0],
+                                   2013: [1.0, 2.0, 3.0], 2014: [1.0, 2.0, 2.0]})
+co2_subset = pd.DataFrame({"Year": [2012] * 3 + [2013] * 3 + [2014] * 3,
+                           "Country Name": ["A", "B", "C"] * 3,
+                           "Total": [1, 4, 9, 2, 4, 9, 1, 8, 9],
+                           "Bunker fuels (Not in Total)": [0] * 9})
+
+
+def test_get_year_fingerprints():
+    """Checks if fingerprints change only for years with changed data
+    """
+    fingerprints = incremental.get_year_fingerprints(gdp_subset, populations_subset,
+                                                     co2_subset, [2012, 2013, 2014])
+    changed_gdp = gdp_subset.copy()
+    changed_gdp[2013] = [10.0, 20.0, 31.0]
+    changed = incremental.get_year_fingerprints(changed_gdp, populations_subset,
+                                                co2_subset, [2012, 2013, 2014])
+    assert [year for year in fingerprints if fingerprints[year] != changed[year]] == [2013]
+
+
+def test_update_results():
+    """Checks if only new years are analyzed and the results are the same
+    as the results of analysis of all of the years
+    """
+    state = incremental.load_state("non_existent_state")
+    first_years = [2012, 2013]
+    incremental.update_results(state, gdp_subset[["Country Name"] + first_years],
+                               populations_subset[["Country Name"] + first_years],
+                               co2_subset[co2_subset["Year"].isin(first_years)], first_years)
+    emission, gdp, changes, years, changed_years = incremental.update_results(
+        state, gdp_subset, populations_subset, co2_subset, [2012, 2013, 2014])
+    assert changed_years == [2014]
+
+    # Compare with the analysis of all of the years
+    data_processed = analyze_data.get_per_capita(read_data.join_data(
+        gdp_subset, populations_subset, co2_subset, [2012, 2013, 2014]))
+    pd.testing.assert_frame_equal(emission, analyze_data.find_5_highest(
+        data_processed, *analyze_data.HIGHEST_COLUMNS["emission"]))
+    pd.testing.assert_frame_equal(gdp, analyze_data.find_5_highest(
+        data_processed, *analyze_data.HIGHEST_COLUMNS["gdp"]))
+    expected_changes, expected_years = analyze_data.find_co2_changes(data_processed)
+    pd.testing.assert_frame_equal(changes, expected_changes)
+    assert years == expected_years
+
+    # Nothing is analyzed again when the data does not change
+    assert incremental.update_results(state, gdp_subset, populations_subset, co2_subset,
+                                      [2012, 2013, 2014])[4] == []
+
+
+def test_profile_report(tmp_path, capsys):
+    """Checks if the profile and peak memory usage are reported after incremental updates
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.05, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    profile_path = str(tmp_path / "profile.json")
+    program.main(["-gdp", gdp_path, "-pop", populations_path, "-co2", co2_path,
+                  "-f", str(tmp_path / "results.csv"), "--incremental",
+                  str(tmp_path / "state.pkl"), "--profile", profile_path, "--memory"])
+    with open(profile_path, 'r', encoding='UTF-8') as file:
+        assert "stages" in json.load(file)
+    assert "Peak memory usage" in capsys.readouterr().out
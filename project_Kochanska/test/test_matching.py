@@ -0,0 +1,82 @@
+"""Test matching
+
+This script contains tests for checking if country names written differently
+in the input files are matched and if the matches are saved in the mapping cache
+under the names, so later runs only look them up.
+
+This file contains 2 test
+"""
+import os
+import pandas as pd
+import project_Kochanska.matching as matching
+import project_Kochanska.synthetic as synthetic
+from project_Kochanska.session import AnalysisSession
+
+
+def test_find_matches(monkeypatch):
+    """Checks if only the names which are the best match of each other are matched
+    and if only names missing from the mapping cache are matched again
+    """
+    gdp = pd.DataFrame({"Country Name": ["Libya", "North Macedonia", "Poland",
+                                         "St. Martin (French part)", "Lao PDR"],
+                        2010: [1.0, 2.0, 3.0, 4.0, 5.0]})
+    co2 = pd.DataFrame({"Year": [2010] * 5,
+                        "Country Name": ["LIBYAN ARAB JAMAHIRIYAH", "MACEDONIA", "POLAND",
+                                         "MARTINIQUE", "LAO PEOPLE S DEMOCRATIC REPUBLIC"],
+                        "Total": [1, 2, 3, 4, 5]})
+    assert matching.find_country_matches(gdp, gdp, co2, {}) == {
+        "Lao PDR": "LAO PEOPLE S DEMOCRATIC REPUBLIC", "Libya": "LIBYAN ARAB JAMAHIRIYAH",
+        "North Macedonia": "MACEDONIA"}
+    # Names with two equally good candidates are not matched
+    assert matching.match_names(["SAINT HELENA"], ["ST. HELENA", "SAINT-HELENA"]) == {}
+    assert matching.normalize_tokens("Côte d'Ivoire") == ["COTE", "D", "IVOIRE"]
+
+    mapping = matching.load_mapping(None)
+    matches = matching.update_mapping(mapping, gdp, gdp, co2, {})
+    assert matches == matching.find_country_matches(gdp, gdp, co2, {})
+    assert mapping["unmatched"] == ["ST. MARTIN (FRENCH PART)"]
+    compared = []
+    match_names = matching.match_names
+
+    def record(names, *args):
+        compared.append(names)
+        return match_names(names, *args)
+    monkeypatch.setattr(matching, "match_names", record)
+    # Saved matches and names which could not be matched are only looked up
+    assert matching.update_mapping(mapping, gdp, gdp, co2, {}) == matches
+    assert compared == []
+    # Unmatched names are compared again with new names from the emission file
+    co2.loc[len(co2)] = [2010, "SAINT MARTIN (FRENCH PART)", 6]
+    assert matching.update_mapping(mapping, gdp, gdp, co2, {}) == {
+        **matches, "St. Martin (French part)": "SAINT MARTIN (FRENCH PART)"}
+    assert compared == [["ST. MARTIN (FRENCH PART)"]] and mapping["unmatched"] == []
+
+
+def test_mapping_cache(tmp_path, monkeypatch):
+    """Checks if matches are used in the analysis and if later sessions
+    take the applied ones from the mapping cache, also when the files change
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.05, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    co2 = pd.read_csv(co2_path)
+    co2["Country"] = co2["Country"].replace("COUNTRY 000003", "REPUBLIC OF COUNTRY 000003")
+    co2.to_csv(co2_path, index=False)
+    mapping_file = str(tmp_path / "mapping" / "countries.json")
+
+    session = AnalysisSession(gdp_path, populations_path, co2_path)
+    assert "REPUBLIC OF COUNTRY 000003" not in set(session.joined()["Country Name"])
+    # Proposed matches are not saved
+    session.match_countries(apply=False, mapping_file=mapping_file)
+    assert not os.path.exists(mapping_file)
+    matches = session.match_countries(mapping_file=mapping_file)
+    assert matches == {"Country 000003": "REPUBLIC OF COUNTRY 000003"}
+    assert "REPUBLIC OF COUNTRY 000003" in set(session.joined()["Country Name"])
+
+    def fail(*args):
+        raise AssertionError("Matches should be taken from the mapping cache")
+    monkeypatch.setattr(matching, "match_names", fail)
+    co2["Total"] = co2["Total"] + 1
+    co2.to_csv(co2_path, index=False)
+    session = AnalysisSession(gdp_path, populations_path, co2_path)
+    assert session.match_countries(apply=False, mapping_file=mapping_file) == matches
+    assert "REPUBLIC OF COUNTRY 000003" not in set(session.joined()["Country Name"])
@@ -0,0 +1,76 @@
+"""Test matrix
+
+This script contains tests for checking if the data joined on
+country x year matrices is the same as the data joined by pandas.
+
+This file contains 2 test
+"""
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.matrix as matrix
+import project_Kochanska.read_data as read_data
+import project_Kochanska.synthetic as synthetic
+from project_Kochanska.session import AnalysisSession
+
+
+def test_same_as_pandas(tmp_path):
+    """Checks if joined data, per capita values and changes in CO2 emission
+    (also in windows of years) are the same as the ones calculated
+    on the joined Dataframe
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.2, duplicates=0.05, wdi_years=(2000, 2014),
+        emission_years=(1990, 2014))
+    # Copy of a country has the same changes in emission as the country
+    for file_path in (gdp_path, populations_path):
+        with open(file_path, 'r', encoding='UTF-8') as file:
+            row = next(line for line in file if line.startswith('"Country 000001"'))
+        with open(file_path, 'a', encoding='UTF-8') as file:
+            file.write(row.replace("Country 000001", "Copy 000001").replace("C00001", "X00001"))
+    co2 = pd.read_csv(co2_path)
+    copy = co2[co2["Country"] == "COUNTRY 000001"].assign(Country="COPY 000001")
+    pd.concat([co2, copy]).to_csv(co2_path, index=False)
+    gdp = read_data.read_file_to_df(gdp_path)
+    populations = read_data.read_file_to_df(populations_path)
+    co2 = read_data.read_file_to_df(co2_path, skip=False)
+    session = AnalysisSession(gdp_path, populations_path, co2_path, engine="matrix")
+    for years in ([None, None], [2005, 2014], [2010, 2010]):
+        expected = read_data.join_data(*read_data.check_data(
+            gdp, populations, co2, list(years), report=False))
+        pd.testing.assert_frame_equal(session.joined(*years), expected)
+
+    expected = analyze_data.get_per_capita(expected)
+    pd.testing.assert_frame_equal(session.per_capita(2010, 2010), expected)
+    changes_table = session.all_co2_changes(2005, 2014)
+    pd.testing.assert_frame_equal(changes_table, analyze_data.get_co2_changes(
+        session.per_capita(2005, 2014), [2005, 2014]))
+    assert changes_table.loc["COUNTRY 000001", "Rank"] == \
+        changes_table.loc["COPY 000001", "Rank"]
+    pandas_session = AnalysisSession(gdp_path, populations_path, co2_path)
+    for result, expected in zip(session.co2_changes(2005, 2014),
+                                pandas_session.co2_changes(2005, 2014)):
+        assert str(result) == str(expected)
+    pd.testing.assert_frame_equal(session.window_changes(3, 2005, 2014),
+                                  pandas_session.window_changes(3, 2005, 2014))
+
+
+def test_pandas_fallback(tmp_path):
+    """Checks if names which become equal only after changing them to upper case
+    are joined by pandas
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.05, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    with open(gdp_path, 'r', encoding='UTF-8') as file:
+        lines = file.read().splitlines()
+    first_row = next(line for line in lines if line.startswith('"Country 000000"'))
+    with open(gdp_path, 'a', encoding='UTF-8') as file:
+        file.write(first_row.replace("Country 000000", "COUNTRY 000000") + "\n")
+    gdp = read_data.read_file_to_df(gdp_path)
+    populations = read_data.read_file_to_df(populations_path)
+    co2 = read_data.read_file_to_df(co2_path, skip=False)
+    assert matrix.build_matrices(gdp, populations, co2, [None, None]) is None
+
+    session = AnalysisSession(gdp_path, populations_path, co2_path, engine="matrix")
+    expected = read_data.join_data(*read_data.check_data(
+        gdp, populations, co2, [None, None], report=False))
+    pd.testing.assert_frame_equal(session.joined(), expected)
@@ -0,0 +1,45 @@
+"""Test parallel
+
+This script contains tests for checking finding countries with
+the highest values on a pool of processes.
+
+This file contains 2 test
+"""
+import numpy as np
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.parallel as parallel
+from project_Kochanska.analyze_data import HIGHEST_COLUMNS
+
+
+def test_partition_years():
+    """Checks if rows of each year are always in one partition
+    """
+    sorted_years = np.array([2010] * 5 + [2011] * 2 + [2012] * 6 + [2013])
+    partitions = parallel.partition_years(sorted_years, 3)
+    assert partitions[0][0] == 0 and partitions[-1][1] == len(sorted_years)
+    assert all(first[1] == second[0] for first, second in zip(partitions, partitions[1:]))
+    for start, _ in partitions[1:]:
+        assert sorted_years[start] != sorted_years[start - 1]
+    assert parallel.partition_years(sorted_years, 100) == [(0, 5), (5, 7), (7, 13), (13, 14)]
+
+
+def test_find_highest_tables():
+    """Checks if tables found by many processes are the same as
+    tables found by find_5_highest, also for equal and missing values
+    """
+    generator = np.random.default_rng(0)
+    rows = 400
+    data = pd.DataFrame({"Year": generator.integers(1990, 2000, size=rows).astype(object),
+                         "Country Name": [f"COUNTRY {index % 37}" for index in range(rows)],
+                         "Total including bunker": generator.integers(0, 10, size=rows),
+                         "GDP": generator.uniform(0, 100, size=rows)})
+    data["Total and bunker per capita"] = data["Total including bunker"] / 2
+    data["GDP per capita"] = data["GDP"].where(generator.random(rows) > 0.2)
+    data.loc[data["Year"] == 1995, "GDP per capita"] = np.nan
+
+    tables = [HIGHEST_COLUMNS["emission"], HIGHEST_COLUMNS["gdp"]]
+    results = parallel.find_highest_tables(data, tables, processes=2)
+    for (column_names, sort_by), result in zip(tables, results):
+        pd.testing.assert_frame_equal(
+            result, analyze_data.find_5_highest(data, column_names, sort_by))
@@ -3,7 +3,7 @@
 This script contains tests for checking the program which analyzes the
 emission, gdp and population data.
 
-This file contains 9 test
+This file contains 18 test
 """
 import csv
 import os
@@ -12,6 +12,9 @@ import pandas as pd
 import numpy as np
 import project_Kochanska.read_data as read_data
 import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.program as program
+import project_Kochanska.profiling as profiling
+from project_Kochanska.errors import DataError
 
 
 def write_file(file_name: str, header: bool, empty: bool = False) -> str:
@@ -110,23 +113,22 @@ def test_read_file_to_df():
     """
     # Check if program raises errors for non-existent files
     if not os.path.isfile("non_existent_file"):
-        with pytest.raises(SystemExit) as exit_info:
+        with pytest.raises(DataError) as error_info:
             read_data.read_file_to_df("non_existent_file")
-        assert exit_info.value.code == -1
+        assert str(error_info.value) == "File not found."
 
     # Check if program raises errors for empty files
     if not os.path.isfile("empty_file"):
-        with pytest.raises(SystemExit) as exit_info:
+        with pytest.raises(DataError) as error_info:
             read_data.read_file_to_df(write_file(
                 "empty_file", False, empty=True,))
-            os.remove("empty_file")
-            assert exit_info.value.code == -1
         os.remove("empty_file")
+        assert str(error_info.value) == "No data"
 
     # Check if program raises errors for files in wrong format
-    with pytest.raises(SystemExit) as exit_info:
-        read_data.read_file_to_df("read_data.py")
-        assert exit_info.value.code == -1
+    with pytest.raises(DataError) as error_info:
+        read_data.read_file_to_df(read_data.__file__)
+    assert str(error_info.value) == "Parser error"
 
     # Check if program correctly reads files with no headers
     emission = read_data.read_file_to_df(
@@ -142,15 +144,77 @@ def test_read_file_to_df():
     assert isinstance(gdp, pd.DataFrame)
     assert gdp.shape == (3, 5)
 
+    # Check if program reads only chosen years from files with headers
+    gdp = read_data.read_file_to_df(write_file(
+        "test_gdp.csv", header=True, empty=False), years=[2004, None])
+    os.remove("test_gdp.csv")
+    assert list(gdp.columns) == ["Country Name", 2004]
+    assert gdp[2004].dtype == np.float64
+    assert read_data.get_year_columns(gdp) == [2004]
+    with open(write_file("test_gdp.csv", header=True, empty=False), 'a',
+              encoding='UTF-8') as file:
+        file.write("Poland,POL,GDP (current US$),NY.GDP.MKTP.CD,1,abc\n")
+    with pytest.raises(DataError) as error_info:
+        read_data.read_file_to_df("test_gdp.csv", years=[2004, None])
+    os.remove("test_gdp.csv")
+    assert str(error_info.value) == "Error, test_gdp.csv contains values which are not numbers"
+
+
+def test_read_files(tmp_path):
+    """Function which tests if files read at the same time are the same
+    as files read one after another and if errors are reported in their order
+    """
+    emission_file = write_file(str(tmp_path / "test_emission.csv"), False)
+    gdp_file = write_file(str(tmp_path / "test_gdp.csv"), True)
+    files = [(emission_file, False, None), (gdp_file, True, None), (gdp_file, True, [2004, None])]
+    for data, expected in zip(read_data.read_files(files, workers=3),
+                              [read_data.read_file_to_df(*file) for file in files]):
+        pd.testing.assert_frame_equal(data, expected)
+
+    # The first file which can't be read is reported
+    empty_file = write_file(str(tmp_path / "empty_file"), False, empty=True)
+    with pytest.raises(DataError) as error_info:
+        read_data.read_files([(gdp_file, True, None), (empty_file, False, None),
+                              (str(tmp_path / "non_existent_file"), True, None)], workers=3)
+    assert str(error_info.value) == "No data"
+
+
+def test_year_index(tmp_path):
+    """Function which tests if program reads only chosen years with the help
+    of the year index and falls back to reading the whole file
+    """
+    file_name = str(tmp_path / "test_emission.csv")
+    write_file(file_name, False)
+    # First read creates the index
+    assert read_data.read_file_to_df(file_name, skip=False, years=[2014, None]).shape == (2, 10)
+    index = read_data.load_year_index(file_name)
+    assert index is not None and index["sorted"]
+    assert list(index["years"].keys()) == ["2013", "2014"]
+    # Next reads use it
+    emission = read_data.read_file_to_df(file_name, skip=False, years=[2014, None])
+    assert emission["Year"].to_list() == [2014]
+    assert read_data.read_file_to_df(file_name, skip=False, years=[1800, 1801]).shape == (0, 10)
+
+    # Check if program ignores stale index
+    with open(file_name, 'a', encoding='UTF-8') as file:
+        file.write("2012,SPAIN,1,1,1,1,1,0,1.39,1\n")
+    assert read_data.load_year_index(file_name) is None
+    emission = read_data.read_file_to_df(file_name, skip=False, years=[2014, None])
+    assert emission.shape == (3, 10)
+    # Check if program reads whole unsorted files
+    assert not read_data.load_year_index(file_name)["sorted"]
+    emission = read_data.read_file_to_df(file_name, skip=False, years=[2014, None])
+    assert emission.shape == (3, 10)
+
 
 def test_select_years():
     """Function which checks is program correctly selects data
     from common years and if the restrictions are present uses them
     """
     # Check for years which result in no data
-    with pytest.raises(SystemExit) as exit_info:
+    with pytest.raises(DataError) as error_info:
         read_data.select_years(gdp_df, pop_df, emission_df, years=[1800, 1801])
-        assert exit_info.value.code == -1
+    assert str(error_info.value) == "Error, provided files have no data for chosen years"
     # Check if program acts correctly when no years are provided
     assert read_data.select_years(gdp_df, pop_df, emission_df,
                                   years=[None, None])[3] == [2013, 2014]
@@ -188,6 +252,25 @@ def test_check_countries():
     assert "SPAIN NEW" in co2_changed["Country Name"].to_list()
 
 
+def test_normalize_country_names(tmp_path):
+    """Tests if function changes only the country names
+    and reads additional names from files
+    """
+    names = pd.Series(["Aruba", "SPAIN", np.nan, "Aruba"], index=[3, 4, 5, 6])
+    changed = read_data.normalize_country_names(names, {"Aruba": "Aruba new"}, upper=True)
+    assert changed.index.to_list() == [3, 4, 5, 6]
+    assert changed.to_list()[:2] == ["ARUBA NEW", "SPAIN"]
+    assert pd.isna(changed.iloc[2]) and changed.iloc[3] == "ARUBA NEW"
+
+    file_name = tmp_path / "countries.csv"
+    file_name.write_text("Country Name,Replacement\nAruba,ARUBA NEW\n", encoding='UTF-8')
+    assert read_data.load_countries_dict(str(file_name)) == {"Aruba": "ARUBA NEW"}
+    file_name.write_text("Country Name\nAruba\n", encoding='UTF-8')
+    with pytest.raises(DataError) as error_info:
+        read_data.load_countries_dict(str(file_name))
+    assert str(error_info.value) == "Error, file with country names needs to contain pairs of names"
+
+
 def test_join_data():
     """Checks if program correctly joins 3 dataframe's
     """
@@ -199,6 +282,23 @@ def test_join_data():
                                          'Population']
 
 
+def test_compact_data():
+    """Checks if program stores joined data with smaller types of columns
+    and keeps them while calculating per capita values
+    """
+    joined_data = pd.DataFrame({"Year": [2013, 2014] * 50, "Country Name": ["SPAIN"] * 100,
+                                "Total": [10] * 100, "Bunker fuels (Not in Total)": [1] * 100,
+                                "GDP": [100.0] * 100, "Population": [10.0] * 100})
+    size = joined_data.memory_usage(deep=True).sum()
+    compact = read_data.compact_data(joined_data.copy(), float32=True)
+    assert compact.memory_usage(deep=True).sum() < size
+    assert str(compact["Country Name"].dtype) == "category"
+    assert compact["Year"].dtype == np.int16
+    assert compact["GDP"].dtype == np.float32
+    per_capita_data = analyze_data.get_per_capita(compact)
+    assert per_capita_data["GDP per capita"].dtype == np.float32
+
+
 def test_get_per_capita():
     """Check if program adds columns with per capita values
     """
@@ -208,6 +308,22 @@ def test_get_per_capita():
     assert per_capita_data['Total and bunker per capita'].to_list() == [1.0, 1.0]
 
 
+def test_get_per_capita_sub_columns():
+    """Check if program adds per capita columns for every emission
+    source and handles rows with no population
+    """
+    data = pd.DataFrame({"Total": [10, 10], "Solid Fuel": [4, 4], "Liquid Fuel": [2, 2],
+                         "Gas Fuel": [2, 2], "Cement": [2, 2], "Gas Flaring": [0, 0],
+                         "Bunker fuels (Not in Total)": [10, 10], "GDP": [100, 100],
+                         "Population": [10, 0]})
+    per_capita_data = analyze_data.get_per_capita(data, sub_columns=True)
+    assert len(list(per_capita_data.columns)) == 18
+    assert per_capita_data["Solid Fuel per capita"].to_list()[0] == 0.4
+    assert per_capita_data['Total and bunker per capita'].to_list()[0] == 2.0
+    assert per_capita_data.iloc[1][["Total per capita", "GDP per capita",
+                                    "Cement per capita"]].isna().all()
+
+
 def test_create_multiindex():
     """Check if function correctly creates pandas Multiindex
     """
@@ -239,6 +355,20 @@ def test_find_5_highest():
                                              'D', '10', 100, 'E', '10', 10]
 
 
+def test_find_k_highest():
+    """Check if program correctly identifies configurable number of
+    countries and fills missing places when a year has fewer countries
+    """
+    highest_gdp = analyze_data.find_5_highest(per_capita_df,
+                                              column_names={"Country": "Country Name",
+                                                            "GDP per capita": "GDP per capita"},
+                                              sort_by="GDP per capita", k=3)
+    assert highest_gdp.shape == (2, 6)
+    assert highest_gdp.loc[2013].to_list() == ['A', 1000, 'B', 1000, 'C', 100]
+    assert highest_gdp.loc[2014].to_list()[:4] == ['A', 1, 'B', 1]
+    assert highest_gdp.loc[2014].isna().to_list()[4:] == [True, True]
+
+
 def test_find_co2_changes():
     """Check if program correctly identifies countries with
     biggest increase and decrease in co2 emission
@@ -257,4 +387,74 @@ def test_find_co2_changes():
     result_double_df = analyze_data.find_co2_changes(per_capita_df)[0]
     assert result_double_df.iloc[0].to_list() in [['C, B', 9900.0, 'A', -900.0],
                                                   ['B, C', 9900.0, 'A', -900.0]]
-    
\ No newline at end of file
+
+    # Check if function returns changes for all of the countries
+    changes_table = analyze_data.get_co2_changes(per_capita_df, [2013, 2014])
+    assert changes_table.index.to_list() == ['B', 'C', 'A']
+    assert changes_table["Change"].to_list() == [9900.0, 9900.0, -900.0]
+    # Countries with the same change have the same rank
+    assert changes_table["Rank"].to_list() == [1, 1, 3]
+
+
+def test_window_changes():
+    """Check if program chooses the same boundary years for any order of years and
+    identifies countries with biggest changes in co2 emission in every window of years
+    """
+    # Set of these years is not ordered
+    years = [2040, 2100, 2041, 2099, 2042]
+    assert list(set(years)) != sorted(years)
+    assert analyze_data.get_boundary_years(set(years)) == [2040, 2100]
+
+    data = pd.DataFrame({"Year": [2010, 2010, 2011, 2011, 2012, 2012, 2012, 2013],
+                         "Country Name": ["A", "B", "A", "B", "A", "B", "C", "C"],
+                         "Total and bunker per capita": [1.0, 5.0, 3.0, 2.0, 2.0, 1.0,
+                                                         4.0, 8.0]})
+    windows = analyze_data.get_window_changes(data, 2)
+    assert windows[["Start", "End"]].values.tolist() == [[2010, 2011], [2011, 2012],
+                                                         [2012, 2013]]
+    assert windows.iloc[0].to_list()[2:] == ['A', 2.0, 'B', -3.0]
+    assert windows.iloc[1].to_list()[2:] == ['', 0, 'A, B', -1.0]
+    assert windows.iloc[2].to_list()[2:] == ['C', 4.0, '', 0]
+    for _, window in windows.iterrows():
+        extremes = analyze_data.get_co2_extremes(analyze_data.get_co2_changes(
+            data, [window["Start"], window["End"]]))
+        assert extremes.iloc[0].to_list() == window.to_list()[2:]
+    assert analyze_data.get_window_changes(data, 3).iloc[0].to_list()[2:] == \
+        ['A', 1.0, 'B', -4.0]
+    assert analyze_data.get_window_changes(data, 5) is None
+
+
+def test_read_queries(tmp_path):
+    """Check if program correctly reads queries of the batch mode
+    and selects their years from the shared tables
+    """
+    file_name = tmp_path / "queries.txt"
+    file_name.write_text("# comment\n2013 2014 first.csv\n\n- 2013 second\n", encoding='UTF-8')
+    assert program.read_queries(str(file_name)) == [(2013, 2014, "first.csv"),
+                                                    (None, 2013, "second.csv")]
+    file_name.write_text("2014 2013 first.csv\n", encoding='UTF-8')
+    with pytest.raises(DataError) as error_info:
+        program.read_queries(str(file_name))
+    assert str(error_info.value) == "Error, start year needs to be smaller than or equal end year in line 1 of the batch file"
+
+    highest_gdp = analyze_data.find_5_highest(per_capita_df,
+                                              column_names={"Country": "Country Name"},
+                                              sort_by="GDP per capita")
+    assert analyze_data.select_table_years(highest_gdp, [2014]).index.to_list() == [2014]
+
+
+def test_profile_stage():
+    """Checks if stages are measured only when profiling is enabled
+    """
+    data = pd.DataFrame({"Year": [2010, 2011, 2012], "Value": [1, 2, 3]})
+    assert profiling.profile_stage("head", data.head, 2).equals(data.head(2))
+    assert not profiling.is_enabled()
+
+    profiling.enable_profiling()
+    result = profiling.profile_stage("concat", pd.concat, [data, data])
+    records = profiling.disable_profiling()
+    assert len(result) == 6
+    assert [record["stage"] for record in records] == ["concat"]
+    assert records[0]["rows_in"] == 6 and records[0]["rows_out"] == 6
+    assert records[0]["wall_time"] >= 0 and records[0]["peak_memory"] >= 0
+    assert profiling.disable_profiling() == []
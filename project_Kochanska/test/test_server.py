@@ -0,0 +1,83 @@
+"""Test server
+
+This script contains tests for checking the server answering
+queries about the processed data.
+
+This file contains 3 test
+"""
+import argparse
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import project_Kochanska.server as server
+from project_Kochanska.test.test_program import per_capita_df
+
+dataset = {"data": per_capita_df.iloc[:9].copy(), "years": [2013, 2014]}
+
+
+def test_get_top():
+    """Checks if the server finds countries with highest values
+    """
+    top = server.get_top(dataset, "gdp", k=2)
+    assert [country["country"] for country in top["years"]["2013"]] == ["A", "B"]
+    assert top["years"]["2013"][0]["per_capita"] == 1000
+    assert len(server.get_top(dataset, "emission", first=2014)["years"]["2014"]) == 2
+    # k is limited to the number of countries
+    assert server.get_top(dataset, "gdp", first=2014, k=10**9)["k"] == 2
+    with pytest.raises(ValueError):
+        server.get_top(dataset, "unknown")
+    with pytest.raises(ValueError):
+        server.get_top(dataset, "gdp", first=1800, last=1801)
+
+
+def test_get_changes():
+    """Checks if the server calculates changes in emission
+    """
+    changes = server.get_changes(dataset)
+    assert changes["start"] == 2013 and changes["end"] == 2014
+    assert [country["country"] for country in changes["countries"]] == ["B", "A"]
+    assert changes["countries"][0]["change"] == 9900.0
+    assert changes["countries"][0]["rank"] == 1
+    with pytest.raises(ValueError):
+        server.get_changes(dataset, first=2014)
+
+
+def test_server(monkeypatch):
+    """Checks if the server answers concurrent requests and reloads data
+    """
+    loaded = [dataset, {"data": dataset["data"][dataset["data"]["Year"] == 2013],
+                        "years": [2013]}]
+    monkeypatch.setattr(server, "load_dataset", lambda args: loaded.pop(0))
+    http_server = server.create_server(argparse.Namespace(host="127.0.0.1", port=0,
+                                                          verbose=False))
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    address = f"http://127.0.0.1:{http_server.server_address[1]}"
+
+    def get(path: str) -> dict:
+        with urllib.request.urlopen(address + path) as response:
+            return json.loads(response.read())
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            answers = list(executor.map(get, ["/top?by=gdp&k=2"] * 16))
+        assert all(answer == answers[0] for answer in answers)
+        assert get("/years") == {"years": [2013, 2014]}
+        request = urllib.request.Request(address + "/reload", method="POST")
+        with urllib.request.urlopen(request) as response:
+            assert json.loads(response.read()) == {"years": [2013]}
+        assert get("/years") == {"years": [2013]}
+
+        def fail(*args):
+            raise KeyError("Country Name")
+        monkeypatch.setattr(server, "get_changes", fail)
+        with pytest.raises(urllib.error.HTTPError) as error_info:
+            get("/changes")
+        assert error_info.value.code == 500
+        assert json.loads(error_info.value.read()) == {"error": "Internal server error"}
+        assert get("/years") == {"years": [2013]}
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
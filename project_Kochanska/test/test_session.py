@@ -0,0 +1,71 @@
+"""Test session
+
+This script contains tests for checking the analysis session
+which remembers the results of each stage.
+
+This file contains 2 test
+"""
+import os
+import pytest
+import pandas as pd
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.read_data as read_data
+import project_Kochanska.synthetic as synthetic
+from project_Kochanska.errors import DataError
+from project_Kochanska.session import AnalysisSession
+
+
+def test_remembered_results(tmp_path):
+    """Checks if results are computed once for each range of years and
+    are the same as results of the separate functions
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    session = AnalysisSession(gdp_path, populations_path, co2_path)
+    emission = session.highest("emission", 2005, 2014)
+    assert session.highest("emission", 2005, 2014) is emission
+    assert session.per_capita(2005, 2014) is session.per_capita(2005, 2014)
+    # Per capita columns are not added to the remembered joined data
+    assert "GDP per capita" not in session.joined(2005, 2014).columns
+
+    gdp = read_data.read_file_to_df(gdp_path)
+    populations = read_data.read_file_to_df(populations_path)
+    co2 = read_data.read_file_to_df(co2_path, skip=False)
+    data_processed = analyze_data.get_per_capita(read_data.join_data(
+        *read_data.check_data(gdp, populations, co2, [2005, 2014])))
+    pd.testing.assert_frame_equal(emission, analyze_data.find_5_highest(
+        data_processed, {"Country": "Country Name", "Total emission": "Total including bunker",
+                         "Emission per capita": 'Total and bunker per capita'},
+        'Total and bunker per capita'))
+    changes, years = session.co2_changes(2005, 2014)
+    expected_changes, expected_years = analyze_data.find_co2_changes(data_processed)
+    pd.testing.assert_frame_equal(changes, expected_changes)
+    assert years == expected_years
+    assert session.joined(2010, 2014)["Year"].min() == 2010
+
+    with pytest.raises(ValueError):
+        session.highest("population", 2005, 2014)
+
+
+def test_changed_inputs(tmp_path):
+    """Checks if results are computed again when an input file changes
+    and if errors are raised as DataError
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    session = AnalysisSession(gdp_path, populations_path, co2_path)
+    per_capita = session.per_capita()
+    synthetic.generate_data(str(tmp_path), scale=0.1, seed=1, wdi_years=(2000, 2014),
+                            emission_years=(1990, 2014))
+    # Make sure that the change is visible even on file systems with coarse timestamps
+    os.utime(gdp_path, ns=(0, 0))
+    assert session.per_capita() is not per_capita
+    assert not session.per_capita().equals(per_capita)
+
+    with pytest.raises(DataError) as error_info:
+        session.per_capita(1800, 1801)
+    assert str(error_info.value) == "Error, provided files have no data for chosen years"
+    os.remove(co2_path)
+    with pytest.raises(DataError) as error_info:
+        session.per_capita()
+    assert str(error_info.value) == "File not found."
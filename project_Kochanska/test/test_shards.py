@@ -0,0 +1,87 @@
+"""Test shards
+
+This script contains tests for checking if inputs given as a directory
+or a glob pattern of csv shards give the same data as the whole files.
+
+This file contains 2 test
+"""
+import os
+import pandas as pd
+import pytest
+import project_Kochanska.read_data as read_data
+import project_Kochanska.synthetic as synthetic
+from project_Kochanska.errors import DataError
+from project_Kochanska.session import AnalysisSession
+
+
+def _split_wdi_file(file_path: str, directory: str, parts: int) -> str:
+    """Function which splits rows of the file with header lines into shards
+
+    :param file_path: Path to the file with header lines
+    :type file_path: str
+    :param directory: Directory of the shards
+    :type directory: str
+    :param parts: Number of shards
+    :type parts: int
+    :return: Glob pattern of the shards
+    :rtype: str
+    """
+    with open(file_path, 'r', encoding='UTF-8') as file:
+        lines = file.read().splitlines()
+    header_end = next(number for number, line in enumerate(lines)
+                      if line.startswith('"Country Name"')) + 1
+    rows = lines[header_end:]
+    name = os.path.basename(file_path)[:-len(".csv")]
+    for part in range(parts):
+        with open(os.path.join(directory, f"{name}_{part}.csv"), 'w', encoding='UTF-8') as file:
+            file.write("\n".join(lines[:header_end] + rows[part::parts]) + "\n")
+    return os.path.join(directory, f"{name}_*.csv")
+
+
+def test_same_as_whole_files(tmp_path):
+    """Checks if the emission file split by years into a directory and gdp and
+    population files split by countries give the same results as the whole files
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, duplicates=0.05, wdi_years=(2000, 2014),
+        emission_years=(1990, 2014))
+    co2_dir = tmp_path / "co2"
+    co2_dir.mkdir()
+    co2 = pd.read_csv(co2_path)
+    for start in range(1990, 2015, 10):
+        co2[(co2["Year"] >= start) & (co2["Year"] < start + 10)].to_csv(
+            co2_dir / f"emission_{start}.csv", index=False)
+    gdp_pattern = _split_wdi_file(gdp_path, str(tmp_path), 3)
+    populations_pattern = _split_wdi_file(populations_path, str(tmp_path), 2)
+
+    assert len(read_data.expand_input(str(co2_dir))) == 3
+    sharded = read_data.read_files([(str(co2_dir), False, None), (gdp_pattern, True, None)])
+    pd.testing.assert_frame_equal(sharded[0], read_data.read_file_to_df(co2_path, skip=False))
+    pd.testing.assert_frame_equal(
+        sharded[1].sort_values("Country Code", ignore_index=True),
+        read_data.read_file_to_df(gdp_path).sort_values("Country Code", ignore_index=True))
+
+    session = AnalysisSession(gdp_pattern, populations_pattern, str(co2_dir))
+    expected = AnalysisSession(gdp_path, populations_path, co2_path)
+    for name in ("emission", "gdp"):
+        pd.testing.assert_frame_equal(session.highest(name, 2005, 2014),
+                                      expected.highest(name, 2005, 2014))
+    pd.testing.assert_frame_equal(session.all_co2_changes(2005, 2014),
+                                  expected.all_co2_changes(2005, 2014))
+
+
+def test_shard_errors(tmp_path):
+    """Checks if the shard which can't be read is named in the error
+    and if an empty directory is reported
+    """
+    co2_dir = tmp_path / "co2"
+    co2_dir.mkdir()
+    with pytest.raises(DataError) as error_info:
+        read_data.read_file_to_df(str(co2_dir), skip=False)
+    assert str(error_info.value) == f"Error, no csv files found in {co2_dir}"
+
+    (co2_dir / "emission_1.csv").write_text("Year,Country,Total\n2010,POLAND,5\n")
+    (co2_dir / "emission_2.csv").write_text("")
+    with pytest.raises(DataError) as error_info:
+        read_data.read_file_to_df(str(co2_dir), skip=False)
+    assert str(error_info.value) == f"No data in file {co2_dir / 'emission_2.csv'}"
@@ -0,0 +1,49 @@
+"""Test startup
+
+This script contains tests for checking that the program starts quickly
+when it only shows help or reports incorrect arguments.
+
+This file contains 2 test
+"""
+import subprocess
+import sys
+import time
+
+# Maximal time (in seconds) of showing help, importing pandas alone takes longer
+STARTUP_BUDGET = 0.35
+
+
+def run_program(arguments: list) -> float:
+    """Function which runs the program in a new process and measures its time
+
+    :param arguments: Command line arguments
+    :type arguments: list
+    :return: Time of the run in seconds
+    :rtype: float
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "project_Kochanska.program"] + arguments,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+def test_heavy_modules_not_imported():
+    """Checks that pandas is not imported when the arguments are incorrect
+    """
+    code = ("import sys\n"
+            "import project_Kochanska.program as program\n"
+            "try:\n"
+            "    program.main(['-gdp', 'gdp.txt', '-pop', 'pop.csv', '-co2', 'co2.csv'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print('pandas' in sys.modules, 'numpy' in sys.modules)\n")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                            text=True, check=True)
+    assert result.stdout.splitlines()[-1] == "False False"
+
+
+def test_startup_time():
+    """Checks that showing help fits in the startup time budget
+    """
+    # Use the best of a few runs to ignore random delays
+    assert min(run_program(["--help"]) for _ in range(3)) < STARTUP_BUDGET
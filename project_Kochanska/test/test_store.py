@@ -0,0 +1,64 @@
+"""Test store
+
+This script contains tests for checking if the columnar store gives
+the same data as the input files.
+
+This file contains 2 test
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import project_Kochanska.program as program
+import project_Kochanska.read_data as read_data
+import project_Kochanska.store as store
+import project_Kochanska.synthetic as synthetic
+from project_Kochanska.errors import DataError
+from project_Kochanska.session import AnalysisSession
+
+
+def test_same_data(tmp_path):
+    """Checks if Dataframe's opened from the store are the same as the ones
+    read from the input files and if numeric columns are mapped from the store
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    store_dir = str(tmp_path / "store")
+    program.main(["import", "-gdp", gdp_path, "-pop", populations_path, "-co2", co2_path,
+                  "--store", store_dir])
+    co2, populations, gdp = store.open_store(store_dir, [co2_path, populations_path, gdp_path])
+    pd.testing.assert_frame_equal(co2, read_data.read_file_to_df(co2_path, skip=False))
+    pd.testing.assert_frame_equal(populations, read_data.read_file_to_df(populations_path))
+    pd.testing.assert_frame_equal(gdp, read_data.read_file_to_df(gdp_path))
+    assert isinstance(co2["Total"].to_numpy().base, np.memmap)
+
+    session = AnalysisSession(gdp_path, populations_path, co2_path, store_dir=store_dir)
+    pd.testing.assert_frame_equal(session.joined(2005, 2014), AnalysisSession(
+        gdp_path, populations_path, co2_path).joined(2005, 2014))
+    # Columns of the previous version are kept for the programs which opened it
+    # and older ones are removed
+    store.import_files(gdp_path, populations_path, co2_path, store_dir)
+    assert len([name for name in os.listdir(store_dir) if name.startswith("data_")]) == 2
+    store.import_files(gdp_path, populations_path, co2_path, store_dir)
+    assert len([name for name in os.listdir(store_dir) if name.startswith("data_")]) == 2
+    pd.testing.assert_frame_equal(store.open_store(store_dir)[0], co2)
+
+
+def test_out_of_date(tmp_path, capsys):
+    """Checks if the input files are read when they have changed after the import
+    and if a missing store is reported
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    store_dir = str(tmp_path / "store")
+    with pytest.raises(DataError) as error_info:
+        store.open_store(store_dir)
+    assert str(error_info.value) == "Error, store not found. Create it with the import command"
+
+    store.import_files(gdp_path, populations_path, co2_path, store_dir)
+    co2 = pd.read_csv(co2_path)
+    co2[co2["Year"] < 2014].to_csv(co2_path, index=False)
+    assert store.open_store(store_dir, [co2_path, populations_path, gdp_path]) is None
+    session = AnalysisSession(gdp_path, populations_path, co2_path, store_dir=store_dir)
+    assert max(session.joined()["Year"]) == 2013
+    assert "Store is out of date" in capsys.readouterr().out
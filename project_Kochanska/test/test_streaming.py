@@ -0,0 +1,61 @@
+"""Test streaming
+
+This script contains tests for checking if the analysis of the emission
+file read in chunks gives the same results as the analysis of the whole file.
+
+This file contains 2 test
+"""
+import pandas as pd
+import project_Kochanska.synthetic as synthetic
+import project_Kochanska.streaming as streaming
+from project_Kochanska.session import AnalysisSession
+
+
+def _compare(gdp_path: str, populations_path: str, co2_path: str, years: list,
+             chunk_size: int):
+    """Function which checks if results of analyze_stream are the same as results
+    of AnalysisSession
+
+    :param gdp_path: Path to gdp file
+    :type gdp_path: str
+    :param populations_path: Path to population file
+    :type populations_path: str
+    :param co2_path: Path to emission file
+    :type co2_path: str
+    :param years: First and last year
+    :type years: list
+    :param chunk_size: Number of rows of each chunk
+    :type chunk_size: int
+    """
+    highest, changes, boundary_years, changes_table = streaming.analyze_stream(
+        gdp_path, populations_path, co2_path, list(years), chunk_size, report=False)
+    session = AnalysisSession(gdp_path, populations_path, co2_path)
+    for name in ("emission", "gdp"):
+        pd.testing.assert_frame_equal(highest[name], session.highest(name, *years))
+    expected_changes, expected_years = session.co2_changes(*years)
+    assert boundary_years == expected_years
+    pd.testing.assert_frame_equal(changes, expected_changes)
+    pd.testing.assert_frame_equal(changes_table, session.all_co2_changes(*years))
+
+
+def test_same_results(tmp_path):
+    """Checks if results are the same for chunks smaller than one year and
+    chunks with many years
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, duplicates=0.05, wdi_years=(2000, 2014),
+        emission_years=(1990, 2014))
+    _compare(gdp_path, populations_path, co2_path, [None, None], 7)
+    _compare(gdp_path, populations_path, co2_path, [2005, 2012], 1000)
+
+
+def test_unsorted_file(tmp_path, capsys):
+    """Checks if the emission file which is not sorted by year is read again
+    with all of its rows kept until the end
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=0.1, wdi_years=(2000, 2014), emission_years=(1990, 2014))
+    co2 = pd.read_csv(co2_path)
+    co2.sample(frac=1, random_state=0).to_csv(co2_path, index=False)
+    _compare(gdp_path, populations_path, co2_path, [None, None], 50)
+    assert "not sorted by year" in capsys.readouterr().out
@@ -0,0 +1,57 @@
+"""Test synthetic
+
+This script contains tests for checking the synthetic data
+used by the benchmarks.
+
+This file contains 2 test
+"""
+import project_Kochanska.read_data as read_data
+import project_Kochanska.synthetic as synthetic
+
+
+def test_generate_data(tmp_path):
+    """Checks if the synthetic files can be read and joined like the real ones
+    and if they are the same for the same seed
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path / "first"), scale=0.1, duplicates=0.1)
+    gdp = read_data.read_file_to_df(gdp_path)
+    populations = read_data.read_file_to_df(populations_path)
+    co2 = read_data.read_file_to_df(co2_path, skip=False)
+    assert len(gdp) == len(populations) == 25
+    assert read_data.get_year_columns(gdp) == list(range(1960, 2022))
+    assert co2["Year"].is_monotonic_increasing
+    assert co2.duplicated(["Year", "Country Name"]).any()
+
+    gdp_subset, populations_subset, co2_subset, years = read_data.check_data(
+        gdp, populations, co2, [2000, 2014], report=False)
+    joined_data = read_data.join_data(gdp_subset, populations_subset, co2_subset, years)
+    assert not joined_data.empty
+    assert not joined_data.duplicated(["Year", "Country Name"]).any()
+
+    second_paths = synthetic.generate_data(str(tmp_path / "second"), scale=0.1, duplicates=0.1)
+    for first, second in zip((gdp_path, populations_path, co2_path), second_paths):
+        with open(first, 'rb') as first_file, open(second, 'rb') as second_file:
+            assert first_file.read() == second_file.read()
+
+
+def test_aliases(tmp_path):
+    """Checks if countries with aliases are changed by the dictionary and merged
+    with the rows written with their emission names
+    """
+    gdp_path, populations_path, co2_path = synthetic.generate_data(
+        str(tmp_path), scale=1, duplicates=0, wdi_years=(2000, 2014),
+        emission_years=(1990, 2014), countries=20, aliases=0.25)
+    aliases = synthetic.get_aliases(20, 0.25)
+    assert len(aliases) == 10 and aliases["Country 000003, Rep."] == "COUNTRY 000003"
+    gdp = read_data.read_file_to_df(gdp_path)
+    populations = read_data.read_file_to_df(populations_path)
+    co2 = read_data.read_file_to_df(co2_path, skip=False)
+    assert "Country 000003, Rep." in set(gdp["Country Name"])
+    assert "COUNTRY 000003 (FORMERLY ALIAS)" in set(co2["Country Name"])
+
+    countries_dict = {**read_data.COUNTRIES_DICT, **aliases}
+    joined_data = read_data.join_data(*read_data.check_data(
+        gdp, populations, co2, [2000, 2014], report=False, countries_dict=countries_dict))
+    assert joined_data["Country Name"].nunique() == 20
+    assert not joined_data.duplicated(["Year", "Country Name"]).any()
@@ -0,0 +1,81 @@
+"""Test writers
+
+This script contains tests for checking if the results are saved
+correctly in each of the output formats.
+
+This file contains 2 test
+"""
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import project_Kochanska.analyze_data as analyze_data
+import project_Kochanska.writers as writers
+
+
+def _tables() -> list:
+    """Function which creates tables similar to the results of the analysis
+
+    :return: List of (name, title, table) tuples
+    :rtype: list
+    """
+    highest = pd.DataFrame([["POLAND", 10, 0.5], ["CHAD", 20, float('nan')]], index=[2010, 2011],
+                           columns=pd.MultiIndex.from_tuples([("Country 1", "Country"),
+                                                              ("Country 1", "GDP"),
+                                                              ("Country 1", "GDP per capita")]))
+    changes = pd.DataFrame({"Growth in emission": "POLAND", "Growth": [0.25]}, index=[1])
+    return [("gdp", "Highest gdp \n", highest), ("changes", "Changes \n", changes)]
+
+
+def test_formats(tmp_path, capsys):
+    """Checks if the tables are saved in json, jsonl and npz formats
+    and if the csv format is written to the standard output
+    """
+    tables = _tables()
+    writers.write_tables(str(tmp_path / "results.json"), tables, "json")
+    with open(tmp_path / "results.json", 'r', encoding='UTF-8') as file:
+        document = json.load(file)
+    assert [table["name"] for table in document["tables"]] == ["gdp", "changes"]
+    assert document["tables"][0]["title"] == "Highest gdp"
+    assert document["tables"][0]["columns"][2] == "Country 1/GDP per capita"
+    assert document["tables"][0]["index"] == [2010, 2011]
+    assert document["tables"][0]["data"] == [["POLAND", 10, 0.5], ["CHAD", 20, None]]
+
+    writers.write_tables(str(tmp_path / "results.jsonl"), tables, "jsonl")
+    with open(tmp_path / "results.jsonl", 'r', encoding='UTF-8') as file:
+        rows = [json.loads(line) for line in file]
+    assert len(rows) == 3
+    assert rows[2] == {"table": "changes", "index": 1,
+                       "values": {"Growth in emission": "POLAND", "Growth": 0.25}}
+
+    writers.write_tables(str(tmp_path / "results.npz"), tables, "npz")
+    with np.load(tmp_path / "results.npz") as arrays:
+        assert str(arrays["gdp/title"]) == "Highest gdp"
+        assert arrays["gdp/Country 1/Country"].tolist() == ["POLAND", "CHAD"]
+        np.testing.assert_array_equal(arrays["gdp/Country 1/GDP per capita"], [0.5, np.nan])
+        assert arrays["changes/Growth"].tolist() == [0.25]
+
+    analyze_data.save_results("-", [tables[1][2], None], ["Changes \n", "Missing \n"])
+    assert capsys.readouterr().out == \
+        "Changes \n,Growth in emission,Growth\n1,POLAND,0.25000\n\n"
+
+
+def test_atomic_write(tmp_path):
+    """Checks if the output file is unchanged and no temporary file
+    is left when writing fails
+    """
+    file_name = tmp_path / "results.csv"
+    file_name.write_text("previous results", encoding='UTF-8')
+
+    def fail(file, tables):
+        file.write("partial results")
+        raise RuntimeError("writing failed")
+
+    writers.register_writer("failing", fail)
+    try:
+        with pytest.raises(RuntimeError):
+            writers.write_tables(str(file_name), _tables(), "failing")
+    finally:
+        del writers.WRITERS["failing"]
+    assert file_name.read_text(encoding='UTF-8') == "previous results"
+    assert [path.name for path in tmp_path.iterdir()] == ["results.csv"]
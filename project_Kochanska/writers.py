@@ -0,0 +1,255 @@
+"""Writers
+
+This script saves the tables with the results of the analysis in one
+of the output formats:
+
+    * csv - titles and tables one after another (the default format)
+    * json - one document with named tables
+    * jsonl - one line for each row of the tables
+    * npz - numpy archive with one array for each column of the tables
+
+Files are written to a temporary file in the same directory, which then
+replaces the output file, so readers never see partial results. Name '-'
+means the standard output. Other formats can be added with register_writer.
+
+numpy and pandas are imported only when the tables are written, so that
+the names of the formats can be read quickly while checking the arguments.
+
+This file contains the following functions:
+
+    * atomic_open - opens a temporary file which replaces the output file
+    * register_writer - adds a new output format
+    * write_tables - saves the tables in the chosen format
+"""
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Name of the table, its title and the table
+Table = Tuple[str, str, "pd.DataFrame"]
+# Umask of the process, reading it changes it for a moment, so it is read only once
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _write_csv(file: TextIO, tables: List[Table]):
+    """Function which writes the titles and the tables one after another
+
+    :param file: Opened output file
+    :type file: TextIO
+    :param tables: Tables to write
+    :type tables: List[Table]
+    """
+    for _, title, dataframe in tables:
+        file.write(title)
+        dataframe.to_csv(file, float_format='%.5f')
+        file.write("\n")
+
+
+def _cell(value):
+    """Function which changes a value of the table to a json value
+
+    :param value: Value of the table
+    :return: The same value as a Python object, missing values become None
+    """
+    import numpy as np
+
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _column_name(column) -> str:
+    """Function which joins the levels of a column name with '/'
+
+    :param column: Name of the column, a tuple for many levels
+    :return: Name of the column
+    :rtype: str
+    """
+    if isinstance(column, tuple):
+        return "/".join(str(level) for level in column)
+    return str(column)
+
+
+def _table_document(name: str, title: str, dataframe: "pd.DataFrame") -> dict:
+    """Function which changes the table to a json document
+
+    :param name: Name of the table
+    :type name: str
+    :param title: Title of the table
+    :type title: str
+    :param dataframe: The table
+    :type dataframe: pd.DataFrame
+    :return: Title, names of the columns, index and rows of the table
+    :rtype: dict
+    """
+    return {"name": name,
+            "title": title.strip(),
+            "columns": [_column_name(column) for column in dataframe.columns],
+            "index": [_cell(value) for value in dataframe.index],
+            "data": [[_cell(value) for value in row]
+                     for row in dataframe.itertuples(index=False, name=None)]}
+
+
+def _write_json(file: TextIO, tables: List[Table]):
+    """Function which writes one json document with all of the tables
+
+    :param file: Opened output file
+    :type file: TextIO
+    :param tables: Tables to write
+    :type tables: List[Table]
+    """
+    json.dump({"tables": [_table_document(*table) for table in tables]}, file, indent=2)
+    file.write("\n")
+
+
+def _write_jsonl(file: TextIO, tables: List[Table]):
+    """Function which writes one json object for each row of the tables
+
+    :param file: Opened output file
+    :type file: TextIO
+    :param tables: Tables to write
+    :type tables: List[Table]
+    """
+    for table in tables:
+        document = _table_document(*table)
+        for index, row in zip(document["index"], document["data"]):
+            file.write(json.dumps({"table": document["name"], "index": index,
+                                   "values": dict(zip(document["columns"], row))}))
+            file.write("\n")
+
+
+def _column_array(column: "pd.Series") -> "np.ndarray":
+    """Function which changes a column to an array which can be saved without pickle
+
+    :param column: Column of the table
+    :type column: pd.Series
+    :return: Numeric or text array
+    :rtype: np.ndarray
+    """
+    import pandas as pd
+
+    if not pd.api.types.is_object_dtype(column):
+        return column.to_numpy()
+    if all(isinstance(value, str) for value in column):
+        return column.to_numpy(dtype=str)
+    try:
+        return pd.to_numeric(column).to_numpy()
+    except (TypeError, ValueError):
+        return column.astype(str).to_numpy(dtype=str)
+
+
+def _write_npz(file: io.BufferedIOBase, tables: List[Table]):
+    """Function which writes a numpy archive with arrays '<table>/title', '<table>/index',
+    '<table>/columns' and '<table>/<column>' for each column of the tables
+
+    :param file: Opened binary output file
+    :type file: io.BufferedIOBase
+    :param tables: Tables to write
+    :type tables: List[Table]
+    """
+    import numpy as np
+
+    arrays = {}
+    for name, title, dataframe in tables:
+        columns = [_column_name(column) for column in dataframe.columns]
+        arrays[f"{name}/title"] = np.array(title.strip())
+        arrays[f"{name}/index"] = _column_array(dataframe.index.to_series())
+        arrays[f"{name}/columns"] = np.array(columns, dtype=str)
+        for position, column in enumerate(columns):
+            arrays[f"{name}/{column}"] = _column_array(dataframe.iloc[:, position])
+    # Archive is created in memory, because the standard output can't be sought
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    file.write(buffer.getvalue())
+
+
+# Writing function and whether the output is binary for each format
+WRITERS: Dict[str, Tuple[Callable, bool]] = {"csv": (_write_csv, False),
+                                             "json": (_write_json, False),
+                                             "jsonl": (_write_jsonl, False),
+                                             "npz": (_write_npz, True)}
+
+
+def register_writer(output_format: str, function: Callable, binary: bool = False):
+    """Function which adds a new output format
+
+    :param output_format: Name of the format, which is also the extension of the files
+    :type output_format: str
+    :param function: Function writing the list of (name, title, table) tuples
+    to an opened file
+    :type function: Callable
+    :param binary: Whether the file is opened in binary mode, defaults to False
+    :type binary: bool, optional
+    """
+    WRITERS[output_format] = (function, binary)
+
+
+@contextmanager
+def atomic_open(file_path: str, binary: bool = False) -> Iterator:
+    """Function which opens a temporary file in the directory of the output file.
+    The temporary file replaces the output file when it is closed
+    or is removed when writing fails
+
+    :param file_path: Path to the output file
+    :type file_path: str
+    :param binary: Whether the file is opened in binary mode, defaults to False
+    :type binary: bool, optional
+    :return: Opened temporary file
+    :rtype: Iterator
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        if binary:
+            file = os.fdopen(file_descriptor, 'wb')
+        else:
+            file = os.fdopen(file_descriptor, 'w', encoding='UTF-8', newline='')
+        with file:
+            yield file
+        # Temporary files are readable only by the owner, unlike files created by open
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_tables(file_path: str, tables: List[Table], output_format: str = "csv",
+                 stream: Optional[TextIO] = None):
+    """Function which saves the tables in the chosen format
+
+    :param file_path: Path to the output file, '-' means the standard output
+    :type file_path: str
+    :param tables: List of (name, title, table) tuples
+    :type tables: List[Table]
+    :param output_format: Name of the format (see WRITERS), defaults to "csv"
+    :type output_format: str, optional
+    :param stream: Standard output used for '-', defaults to None (sys.stdout)
+    :type stream: Optional[TextIO], optional
+    """
+    function, binary = WRITERS[output_format]
+    if file_path != "-":
+        with atomic_open(file_path, binary) as file:
+            function(file, tables)
+        return
+    stream = sys.stdout if stream is None else stream
+    if binary:
+        stream.flush()
+        function(stream.buffer, tables)
+        stream.buffer.flush()
+    else:
+        function(stream, tables)
+        stream.flush()